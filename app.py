@@ -1,42 +1,87 @@
-import os
+import sys
 import time
 import json
-import pickle
+import shutil
 import pyperclip
 
+from typing import Tuple
 from pathlib import Path
 from getpass import getpass
 
 from rich import print
+from rich.text import Text
+from rich.style import Style
 from rich.console import Console
 
 # import app_constants
 # import app_constants as constants
 from app_constants import *
 from app_about import display_about
+from app_item import VaultItem
+from app_vault import VaultItems
+from app_vault import VaultSession
+from app_vault import VaultStorage
+from app_vault import VaultFormatError
+from app_vault import VaultDecryptionError
+from app_vault import serialize_item
+from app_vault import load_legacy_vault
+from app_vault import is_vault_container
+from app_storage import get_storage_class
+from app_storage import detect_storage_class
+from app_backup import BackupStore
+from app_backup import split_snapshot_name
+from app_common import DataFileLock
+from app_common import get_now
+from app_common import prune_backups
+from app_common import snapshot_data_file
+from app_common import fix_special_field_value
+from app_screen import Screen
+from app_table import TableRows
+from app_table import MASKED_PASSWORD
+from app_table import get_total_width
+from app_table import fix_missing_value
+
+from dt_compression import get_codec
 
-from dt_cryptography import hash_data
 from dt_cryptography import generate_password
-from dt_cryptography import encrypt_plain_text
-from dt_cryptography import decrypt_encrypted_data
 from dt_cryptography import validate_password_strength
 
+from dt_password_strength import estimate_password_strength
+
+from dt_breached_passwords import BreachedPasswords
+from dt_breached_passwords import check_passwords
+
+from dt_password_similarity import find_similar_groups
+
 
 __version__ = "1.0"
 
 
-def get_now(format: str = DATE_TIME_FORMAT) -> str:
-    """Get now"""
+def read_input() -> str:
+    """Read a line (the screen is painted first, in full-screen mode)"""
+
+    if screen:
+        screen.refresh()
+
+    text: str = input()
 
-    now: str = time.strftime(format)
+    if screen:
+        screen.echo(text=f"{text}\n")
 
-    return now
+    return text
 
 
 def get_password() -> str:
     """Get password"""
 
+    if screen:
+        screen.refresh()
+
     password: str = getpass(prompt="")
+
+    if screen:
+        screen.echo(text="\n")
+
     # print(f"Your 'Password' is |{password}|")  # Debug
     password = password.replace(" ", "")
     # print(f"Your 'Password' is |{password}|")  # Debug
@@ -45,18 +90,15 @@ def get_password() -> str:
     return password
 
 
-def sort_items_by_name_and_update_ids() -> None:
-    """Sort items by name and update IDs"""
-
-    items.sort(key=lambda item: item[KEY_NAME_NAME])
-    for index, item in enumerate(iterable=items, start=1):
-        item[KEY_NAME_ID] = index
-
-
 def clear_screen() -> None:
     """Clear screen"""
 
-    os.system(command="cls" if os.name == "nt" else "clear")
+    # NOTE: A new frame in full-screen mode, else escape codes (no 'cls' or
+    # 'clear' subprocess)
+    if screen:
+        screen.clear()
+    else:
+        console.clear()
 
 
 def display(title: str, display_line: bool = False) -> None:
@@ -86,7 +128,7 @@ def display_menu_and_get_user_prompt(menu_items: list[str]) -> str:
         console.print(menu_item, style=STYLE_MENU_ITEM)
 
     console.print("\nEnter your choice:", end=" ", style=STYLE_MESSAGE_WAITING)
-    choice: str = input().strip()
+    choice: str = read_input().strip()
 
     return choice
 
@@ -94,7 +136,8 @@ def display_menu_and_get_user_prompt(menu_items: list[str]) -> str:
 def goodbye() -> None:
     """Encrypt and save data before exit."""
 
-    encrypt_and_save_data(password=master_password)
+    encrypt_and_save_data()
+    vault.close()
 
     console.print("\nGoodbye!\n", style=STYLE_MESSAGE_SUCCESS)
     exit()
@@ -111,20 +154,41 @@ def display_label(label: str, width: int, inline: bool = True) -> None:
     console.print(label, end=end, style=STYLE_LABEL)
 
 
-def fix_special_field_value(value: str) -> str:
-    """Fix special field value"""
-
-    value = value.replace(" ", "")
-
-    return value
-
-
 def press_enter_to_continue() -> None:
     """Press [ENTER] to continue"""
 
     message: str = "\nPress [ENTER] to continue..."
     console.print(message, end="", style=STYLE_MESSAGE_WAITING)
-    input()
+    read_input()
+
+
+def get_items_secrets(items_list: list[VaultItem]) -> dict[int, dict]:
+    """Get password and description of items (decrypted on demand)"""
+
+    result: dict[int, dict] = {}
+    record_ids: list[int] = []
+
+    for item in items_list:
+        record_id: int = item.record_id
+
+        # NOTE: New or edited (not saved yet) items hold their secrets
+        if item.has_secrets:
+            result[record_id] = item.get_secrets()
+        else:
+            record_ids.append(record_id)
+
+    if record_ids:
+        result.update(vault.read_secrets(record_ids=record_ids))
+
+    return result
+
+
+def get_item_secrets(item: VaultItem) -> dict:
+    """Get password and description of item (decrypted on demand)"""
+
+    secrets: dict = get_items_secrets(items_list=[item])[item.record_id]
+
+    return secrets
 
 
 def add_new_item() -> None:
@@ -152,122 +216,128 @@ def add_new_item() -> None:
 
         label_name: str = f"{LABEL_NAME} (required)"
         display_label(label=label_name, width=max_width)
-        name: str = input().strip()
+        name: str = read_input().strip()
         if name != "":
             break
 
     display_label(label=LABEL_EMAIL, width=max_width)
-    email: str = fix_special_field_value(value=input().lower())
+    email: str = fix_special_field_value(value=read_input().lower())
     if email == "":
         email = DEFAULT_EMAIL
 
     display_label(label=LABEL_MOBILE, width=max_width)
-    mobile: str = fix_special_field_value(value=input().lower())
+    mobile: str = fix_special_field_value(value=read_input().lower())
     if mobile == "":
         mobile = DEFAULT_MOBILE
 
     display_label(label=LABEL_USERNAME, width=max_width)
-    username: str = fix_special_field_value(value=input().lower())
+    username: str = fix_special_field_value(value=read_input().lower())
     if username == "":
         username = DEFAULT_USERNAME
 
     display_label(label=LABEL_PASSWORD, width=max_width)
-    password: str = fix_special_field_value(value=input())
+    password: str = fix_special_field_value(value=read_input())
     if password == "":
         password = generate_password(
             length=GENERATED_PASSWORD_LENGTH,
         )
 
     display_label(label=LABEL_DESCRIPTION, width=max_width)
-    description: str = input().strip()
+    description: str = read_input().strip()
 
     now: str = get_now()
 
-    item: dict = {
-        KEY_NAME_NAME: name,
-        KEY_NAME_EMAIL: email,
-        KEY_NAME_MOBILE: mobile,
-        KEY_NAME_PASSWORD: password,
-        KEY_NAME_USERNAME: username,
-        KEY_NAME_DESCRIPTION: description,
+    item = VaultItem(
+        name=name,
+        email=email,
+        mobile=mobile,
+        password=password,
+        username=username,
+        description=description,
         #
-        KEY_NAME_INSERT_TIME: now,
-        KEY_NAME_UPDATE_TIME: now,
-    }
+        insert_time=now,
+        update_time=now,
+    )
 
     items.append(item)
 
-    sort_items_by_name_and_update_ids()
+    # NOTE: Journal the change right away (one small append and fsync)
+    encrypt_and_save_data()
 
     display_success_message(message="Item added successfully.")
+    display_breached_password_error(password=password)
+    display_weak_password_error(item=item, password=password)
+    display_password_reuse_warning(item=item)
     press_enter_to_continue()
 
 
-def edit_item(item: dict) -> None:
+def edit_item(item: VaultItem) -> None:
     """Edit item"""
 
     clear_screen_and_display(title="Edit Item")
 
+    secrets: dict = get_item_secrets(item=item)
+
     label_password: str = f"{LABEL_PASSWORD} (NEW)"
     max_width: int = len(label_password)
 
     display_label(label=LABEL_ID, width=max_width)
-    print(item.get(KEY_NAME_ID, MESSAGE_NOT_SET))
+    print(item.record_id)
 
     display_label(label=LABEL_NAME, width=max_width)
-    print(item.get(KEY_NAME_NAME, MESSAGE_NOT_SET))
+    print(fix_missing_value(value=item.name))
 
     display_label(label=LABEL_EMAIL, width=max_width)
-    print(item.get(KEY_NAME_NAME, MESSAGE_NOT_SET))
+    print(fix_missing_value(value=item.email))
 
     display_label(label=LABEL_MOBILE, width=max_width)
-    print(item.get(KEY_NAME_MOBILE, MESSAGE_NOT_SET))
+    print(fix_missing_value(value=item.mobile))
 
     display_label(label=LABEL_USERNAME, width=max_width)
-    print(item.get(KEY_NAME_USERNAME, MESSAGE_NOT_SET))
+    print(fix_missing_value(value=item.username))
 
     display_label(label=LABEL_PASSWORD, width=max_width)
-    print(item.get(KEY_NAME_PASSWORD, MESSAGE_NOT_SET))
+    print(secrets.get(KEY_NAME_PASSWORD, MESSAGE_NOT_SET))
 
     display_label(label=LABEL_DESCRIPTION, width=max_width)
-    print(item.get(KEY_NAME_DESCRIPTION, MESSAGE_NOT_SET))
+    print(secrets.get(KEY_NAME_DESCRIPTION, MESSAGE_NOT_SET))
 
     print()
 
     updated: bool = False
 
     display_label(label=LABEL_NAME, width=max_width)
-    name: str = input().strip()
+    name: str = read_input().strip()
     if name == "":
-        name = item[KEY_NAME_NAME]
+        name = item.name
     else:
         updated = True
 
     display_label(label=LABEL_EMAIL, width=max_width)
-    email: str = fix_special_field_value(value=input().lower())
+    email: str = fix_special_field_value(value=read_input().lower())
     if email == "":
-        email = item[KEY_NAME_EMAIL]
+        email = item.email
     else:
         updated = True
 
     display_label(label=LABEL_MOBILE, width=max_width)
-    mobile: str = fix_special_field_value(value=input().lower())
+    mobile: str = fix_special_field_value(value=read_input().lower())
     if mobile == "":
-        mobile = item[KEY_NAME_MOBILE]
+        mobile = item.mobile
     else:
         updated = True
 
     display_label(label=LABEL_USERNAME, width=max_width)
-    username: str = fix_special_field_value(value=input().lower())
+    username: str = fix_special_field_value(value=read_input().lower())
     if username == "":
-        username = item[KEY_NAME_USERNAME]
+        username = item.username
     else:
         updated = True
 
     display_label(label=label_password, width=max_width)
-    password: str = fix_special_field_value(value=input())
+    password: str = fix_special_field_value(value=read_input())
     if password == "":
-        password = item[KEY_NAME_PASSWORD]
+        password = secrets[KEY_NAME_PASSWORD]
     elif password.upper() == "NEW":
         updated = True
         password = generate_password(
@@ -277,31 +347,32 @@ def edit_item(item: dict) -> None:
         updated = True
 
     display_label(label=LABEL_DESCRIPTION, width=max_width)
-    description: str = input().strip()
+    description: str = read_input().strip()
     if description == "":
-        description = item[KEY_NAME_DESCRIPTION]
+        description = secrets[KEY_NAME_DESCRIPTION]
     else:
         updated = True
 
     if updated:
         now: str = get_now()
 
-        item.update(
-            {
-                KEY_NAME_NAME: name,
-                KEY_NAME_EMAIL: email,
-                KEY_NAME_MOBILE: mobile,
-                KEY_NAME_PASSWORD: password,
-                KEY_NAME_USERNAME: username,
-                KEY_NAME_DESCRIPTION: description,
-                #
-                KEY_NAME_UPDATE_TIME: now,
-            }
-        )
+        item.name = name
+        item.email = email
+        item.mobile = mobile
+        item.password = password
+        item.username = username
+        item.description = description
+        #
+        item.update_time = now
+
+        items.touch(item=item)
 
-        sort_items_by_name_and_update_ids()
+        encrypt_and_save_data()
 
         display_success_message(message="Item updated successfully.")
+        display_breached_password_error(password=password)
+        display_weak_password_error(item=item, password=password)
+        display_password_reuse_warning(item=item)
 
         press_enter_to_continue()
 
@@ -312,14 +383,141 @@ def display_error_message(message: str) -> None:
     console.print(f"[-] {message}", style=STYLE_MESSAGE_ERROR)
 
 
+def display_warning_message(message: str) -> None:
+    """Display warning message"""
+
+    console.print(f"\n[!] {message}", style=STYLE_MESSAGE_WARNING)
+
+
+def is_password_weak(item: VaultItem) -> bool:
+    """Check if the (cached) strength score of the password of item is weak"""
+
+    result: bool = (
+        item.password_score is not None and item.password_score < WEAK_PASSWORD_SCORE
+    )
+
+    return result
+
+
+def is_password_strong_enough(password: str) -> Tuple[bool, str]:
+    """Check if password is strong enough to be the master password"""
+
+    is_valid, message = validate_password_strength(password=password)
+    if not is_valid:
+        return is_valid, message
+
+    score, _, message = estimate_password_strength(password=password)
+    if score < MASTER_PASSWORD_SCORE:
+        return False, f"Password is too predictable ({message})!"
+
+    result = True, "Password is valid and strong enough."
+
+    return result
+
+
+def display_password_reuse_warning(item: VaultItem) -> None:
+    """Display warning message, if the password of item is used by other items"""
+
+    record_ids: set[int] = items.get_password_reuse(item=item)
+
+    if record_ids:
+        ids: str = ", ".join(str(record_id) for record_id in sorted(record_ids))
+        display_warning_message(message=f"Password is also used by item ID: {ids}!")
+
+
+def display_weak_password_error(item: VaultItem, password: str) -> None:
+    """Display error message, if the password of item is weak"""
+
+    # NOTE: The cached score decides, the estimate only explains it
+    if not is_password_weak(item=item):
+        return
+
+    _, _, message = estimate_password_strength(password=password)
+    display_error_message(message=f"Password is weak ({message})!")
+
+
+def is_password_breached(password: str) -> bool:
+    """Check password against the offline breached-password corpus (if any)"""
+
+    if not BREACHED_PASSWORDS_FILE_PATH.is_file():
+        return False
+
+    # NOTE: Memory-mapped, opening it reads only a few pages
+    with BreachedPasswords(path=BREACHED_PASSWORDS_FILE_PATH) as corpus:
+        result: bool = corpus.is_breached(password=password)
+
+    return result
+
+
+def display_breached_password_error(password: str) -> None:
+    """Display error message, if the password is in the breached-password corpus"""
+
+    if is_password_breached(password=password):
+        display_error_message(message="Password is found in breached passwords!")
+
+
 def display_success_message(message: str) -> None:
     """Display success message"""
 
     console.print(f"\n[+] {message}", style=STYLE_MESSAGE_SUCCESS)
 
 
+def get_item_table_row(
+    item: VaultItem,
+    display_password: bool = False,
+    password: str = MESSAGE_NOT_SET,
+    password_is_weak: bool = False,
+    password_is_reused: bool = False,
+) -> Text:
+    """Get the table row of an item"""
+
+    if not display_password:
+        password = MASKED_PASSWORD
+
+    # NOTE: Weak passwords are displayed in the error color and reused
+    # passwords in the warning color
+    password_style: Style | None = None
+    if password_is_weak:
+        password_style = STYLE_MESSAGE_ERROR
+    elif password_is_reused:
+        password_style = STYLE_MESSAGE_WARNING
+
+    row: Text = table_rows.get_row(
+        item=item,
+        password=password,
+        password_style=password_style,
+    )
+
+    return row
+
+
+def display_table(sections: list[list[Text]]) -> None:
+    """Display a table of rows (one write)"""
+
+    # NOTE: Rows of deleted (or restored away) items are not kept
+    table_rows.prune(items=items)
+
+    # NOTE: Soft wrap: the terminal wraps rows wider than it, not rich
+    console.print(table_rows.render(sections=sections), soft_wrap=True)
+
+
+def get_page_size() -> int:
+    """Get the number of table rows that fit the terminal (one page)"""
+
+    columns, lines = shutil.get_terminal_size()
+
+    # NOTE: A table wider than the terminal wraps every row
+    row_lines: int = -(-get_total_width() // max(columns, 1))
+
+    page_size: int = max((lines - TABLE_PAGE_CHROME_LINES) // row_lines, 1)
+
+    return page_size
+
+
 def display_items(display_password: bool = False) -> None:
-    """Display items"""
+    """Display items (one page at a time)"""
+
+    page: int = 0
 
     while True:
         clear_screen()
@@ -329,66 +527,208 @@ def display_items(display_password: bool = False) -> None:
             press_enter_to_continue()
             break
 
-        display_table_header()
-        for item in items:
-            display_item_in_table_row(
-                item=item,
-                display_password=display_password,
-            )
-        display_table_footer()
+        # NOTE: Display order is separate from (stable) item IDs
+        sorted_items: list[VaultItem] = items.get_sorted()
+
+        # NOTE: Only the visible page is rendered, a redraw does not depend
+        # on the vault size (the page size follows the terminal height)
+        page_size: int = get_page_size()
+        page_count: int = -(-len(sorted_items) // page_size)
+        page = min(max(page, 0), page_count - 1)
+
+        page_items: list[VaultItem] = sorted_items[
+            page * page_size : (page + 1) * page_size
+        ]
+
+        # NOTE: Passwords are decrypted only for 'List with Password' (and
+        # only for the visible page)
+        secrets: dict[int, dict] = {}
+        if display_password:
+            secrets = get_items_secrets(items_list=page_items)
+
+        display_table(
+            sections=[
+                [
+                    get_item_table_row(
+                        item=item,
+                        display_password=display_password,
+                        password=secrets.get(item.record_id, {}).get(
+                            KEY_NAME_PASSWORD, MESSAGE_NOT_SET
+                        ),
+                        password_is_weak=is_password_weak(item=item),
+                        password_is_reused=bool(items.get_password_reuse(item=item)),
+                    )
+                    for item in page_items
+                ]
+            ],
+        )
+
+        console.print(
+            f"Page {page + 1:,} of {page_count:,} ({len(sorted_items):,} items) - "
+            "'n' next | 'p' previous | 'f' first | 'l' last | "
+            "'g PAGE' go to page | 'j NAME' jump to name",
+            style=STYLE_LABEL,
+        )
 
         message: str = (
             "Type 'ID' and then press [ENTER] to display item details or just press [ENTER] to go back:"
         )
         console.print(message, end=" ", style=STYLE_MESSAGE_WAITING)
-        choice: str = input().strip()
+        choice: str = read_input().strip()
 
         if not choice:
             break
 
+        command, _, argument = choice.partition(" ")
+        argument = argument.strip()
+
+        match command.lower():
+            case "n":
+                page += 1
+                continue
+            case "p":
+                page -= 1
+                continue
+            case "f":
+                page = 0
+                continue
+            case "l":
+                page = page_count - 1
+                continue
+            case "g":
+                if argument.isdigit():
+                    page = int(argument) - 1
+                continue
+            case "j":
+                # NOTE: Binary search of the display order (by name)
+                page = items.get_sorted_index(name=argument) // page_size
+                continue
+
         try:
             choice_int: int = int(choice)
-            display_item_details(item=items[choice_int - 1])
+        except:
+            continue
+
+        item: VaultItem | None = items.get(record_id=choice_int)
+        if item:
+            display_item_details(item=item)
+
+
+def load_description_index() -> None:
+    """Index descriptions (decrypted once, the index is only kept in memory)"""
+
+    secrets: dict[int, dict] = get_items_secrets(items_list=list(items))
+
+    items.load_description_index(
+        descriptions={
+            record_id: item_secrets.get(KEY_NAME_DESCRIPTION) or ""
+            for record_id, item_secrets in secrets.items()
+        },
+    )
+
+
+def search_items(in_descriptions: bool = False) -> None:
+    """Search items by name, email and username, or in descriptions"""
+
+    while True:
+        if in_descriptions:
+            clear_screen_and_display(title="Search in Descriptions")
+            search_label: str = 'Search (Words or "Phrase")'
+        else:
+            clear_screen_and_display(title="Search")
+            search_label = "Search (Name, Email or Username)"
+
+        display_label(label=search_label, width=len(search_label))
+        query: str = read_input().strip()
+
+        if not query:
+            break
+
+        found_items: list[VaultItem]
+        if in_descriptions:
+            if items.description_index is None:
+                load_description_index()
+
+            # NOTE: BM25 ranking, no description is decrypted per query
+            found_items = items.search_descriptions(query=query)
+        else:
+            # NOTE: Prefix and typo-tolerant matches, best match first
+            found_items = items.search(query=query)
 
+        if not found_items:
+            display_error_message(message="Items not found!")
+            press_enter_to_continue()
+            continue
+
+        display_table(
+            sections=[
+                [
+                    get_item_table_row(
+                        item=item,
+                        password_is_weak=is_password_weak(item=item),
+                        password_is_reused=bool(items.get_password_reuse(item=item)),
+                    )
+                    for item in found_items
+                ]
+            ],
+        )
+
+        message: str = (
+            "Type 'ID' and then press [ENTER] to display item details or just press [ENTER] to search again:"
+        )
+        console.print(message, end=" ", style=STYLE_MESSAGE_WAITING)
+        choice: str = read_input().strip()
+
+        try:
+            choice_int: int = int(choice)
         except:
-            pass
+            continue
+
+        item: VaultItem | None = items.get(record_id=choice_int)
+        if item:
+            display_item_details(item=item)
 
 
-def get_duplicate_item(item: dict) -> dict:
+def get_duplicate_item(item: VaultItem) -> VaultItem:
     """Duplicate item"""
 
     now: str = get_now()
 
-    new_item: dict = {
-        KEY_NAME_INSERT_TIME: now,
-        KEY_NAME_UPDATE_TIME: now,
+    secrets: dict = get_item_secrets(item=item)
+
+    new_item = VaultItem(
+        insert_time=now,
+        update_time=now,
         #
-        KEY_NAME_NAME: item[KEY_NAME_NAME],
-        KEY_NAME_EMAIL: item[KEY_NAME_EMAIL],
-        KEY_NAME_MOBILE: item[KEY_NAME_MOBILE],
-        KEY_NAME_USERNAME: item[KEY_NAME_USERNAME],
-        KEY_NAME_PASSWORD: item[KEY_NAME_PASSWORD],
-        KEY_NAME_DESCRIPTION: item[KEY_NAME_DESCRIPTION],
-    }
+        name=item.name,
+        email=item.email,
+        mobile=item.mobile,
+        username=item.username,
+        password=secrets[KEY_NAME_PASSWORD],
+        description=secrets[KEY_NAME_DESCRIPTION],
+    )
 
     return new_item
 
 
-def display_item_details(item: dict) -> None:
+def display_item_details(item: VaultItem) -> None:
     """Display item details"""
 
     while True:
         clear_screen_and_display(title="Display Item Details")
 
-        id: int = item.get(KEY_NAME_ID, MESSAGE_NOT_SET)
-        name: str = item.get(KEY_NAME_NAME, MESSAGE_NOT_SET)
-        email: str = item.get(KEY_NAME_EMAIL, MESSAGE_NOT_SET)
-        mobile: str = item.get(KEY_NAME_MOBILE, MESSAGE_NOT_SET)
-        username: str = item.get(KEY_NAME_USERNAME, MESSAGE_NOT_SET)
-        password: str = item.get(KEY_NAME_PASSWORD, MESSAGE_NOT_SET)
-        description: str = item.get(KEY_NAME_DESCRIPTION, MESSAGE_NOT_SET)
-        insert_time: str = item.get(KEY_NAME_INSERT_TIME, MESSAGE_NOT_SET)
-        update_time: str = item.get(KEY_NAME_UPDATE_TIME, MESSAGE_NOT_SET)
+        # NOTE: Secrets are decrypted for this item only
+        secrets: dict = get_item_secrets(item=item)
+
+        id: int = item.record_id
+        name: str = fix_missing_value(value=item.name)
+        email: str = fix_missing_value(value=item.email)
+        mobile: str = fix_missing_value(value=item.mobile)
+        username: str = fix_missing_value(value=item.username)
+        password: str = secrets.get(KEY_NAME_PASSWORD, MESSAGE_NOT_SET)
+        description: str = secrets.get(KEY_NAME_DESCRIPTION, MESSAGE_NOT_SET)
+        insert_time: str = fix_missing_value(value=item.insert_time)
+        update_time: str = fix_missing_value(value=item.update_time)
 
         max_width: int = len(LABEL_DESCRIPTION)
 
@@ -419,6 +759,11 @@ def display_item_details(item: dict) -> None:
         display_label(label=LABEL_DESCRIPTION, width=max_width)
         print(description)
 
+        console.print()
+        display_breached_password_error(password=password)
+        display_weak_password_error(item=item, password=password)
+        display_password_reuse_warning(item=item)
+
         console.print()
 
         menu_items: list[str] = [
@@ -437,105 +782,21 @@ def display_item_details(item: dict) -> None:
             case "1":
                 edit_item(item=item)
             case "2":
-                new_item: dict = get_duplicate_item(item=item)
+                new_item: VaultItem = get_duplicate_item(item=item)
                 items.append(new_item)
-                sort_items_by_name_and_update_ids()
+                encrypt_and_save_data()
                 break
             case "3":
                 pyperclip.copy(text=password)
                 break
             case "DELETE":
-                items.pop(id - 1)
-                sort_items_by_name_and_update_ids()
+                items.remove(record_id=id)
+                encrypt_and_save_data()
                 break
             case _:
                 break
 
 
-def get_total_width() -> int:
-    """Get total width"""
-
-    total_width: int = (
-        8  # Pipe Count: ('|')
-        + COLUMN_WIDTH_ID
-        + COLUMN_WIDTH_NAME
-        + COLUMN_WIDTH_EMAIL
-        + COLUMN_WIDTH_MOBILE
-        + COLUMN_WIDTH_USERNAME
-        + COLUMN_WIDTH_PASSWORD
-        + COLUMN_WIDTH_UPDATE_TIME
-    )
-
-    return total_width
-
-
-def display_table_header() -> None:
-    """Display table header"""
-
-    id: str = LABEL_ID
-    name: str = "Name: URL / Application / Device"
-    email: str = "Email Address"
-    mobile: str = LABEL_MOBILE
-    username: str = LABEL_USERNAME
-    password: str = LABEL_PASSWORD
-    update_time: str = "Update"
-
-    id = id.ljust(COLUMN_WIDTH_ID, " ")
-    name = name.ljust(COLUMN_WIDTH_NAME, " ")
-    email = email.ljust(COLUMN_WIDTH_EMAIL, " ")
-    mobile = mobile.ljust(COLUMN_WIDTH_MOBILE, " ")
-    username = username.ljust(COLUMN_WIDTH_USERNAME, " ")
-    password = password.ljust(COLUMN_WIDTH_PASSWORD, " ")
-    update_time = update_time.ljust(COLUMN_WIDTH_UPDATE_TIME, " ")
-
-    header: str = f"|{id}|{name}|{email}|{mobile}|{username}|{password}|{update_time}|"
-
-    total_width: int = get_total_width()
-
-    console.print("-" * total_width, style=STYLE_LABEL)
-    console.print(header, style=STYLE_LABEL)
-    console.print("-" * total_width, style=STYLE_LABEL)
-
-
-def display_item_in_table_row(item: dict, display_password: bool = False) -> None:
-    """Display item"""
-
-    id: str = item.get(KEY_NAME_ID, MESSAGE_NOT_SET)
-    name: str = item.get(KEY_NAME_NAME, MESSAGE_NOT_SET)
-    email: str = item.get(KEY_NAME_EMAIL, MESSAGE_NOT_SET)
-    mobile: str = item.get(KEY_NAME_MOBILE, MESSAGE_NOT_SET)
-    username: str = item.get(KEY_NAME_USERNAME, MESSAGE_NOT_SET)
-    password: str = item.get(KEY_NAME_PASSWORD, MESSAGE_NOT_SET)
-    update_time: str = item.get(KEY_NAME_UPDATE_TIME, MESSAGE_NOT_SET)
-
-    id = str(id).rjust(COLUMN_WIDTH_ID, " ")
-
-    name = name.ljust(COLUMN_WIDTH_NAME, " ")
-    email = email.ljust(COLUMN_WIDTH_EMAIL, " ")
-    mobile = mobile.ljust(COLUMN_WIDTH_MOBILE, " ")
-    username = username.ljust(COLUMN_WIDTH_USERNAME, " ")
-    update_time = update_time.ljust(COLUMN_WIDTH_UPDATE_TIME, " ")
-
-    update_time = update_time[0:10]
-
-    if not display_password:
-        password = "**********"
-    password = password.ljust(COLUMN_WIDTH_PASSWORD, " ")
-
-    console.print("|", style=STYLE_LABEL, end="")
-    console.print(
-        f"{id}|{name}|{email}|{mobile}|{username}|{password}|{update_time}", end=""
-    )
-    console.print("|", style=STYLE_LABEL)
-
-
-def display_table_footer() -> None:
-    """Display table footer"""
-
-    total_width: int = get_total_width()
-    console.print("-" * total_width, style=STYLE_LABEL)
-
-
 def change_master_password() -> None:
     """Change master password"""
 
@@ -549,7 +810,7 @@ def change_master_password() -> None:
         )
         previous_master_password: str = get_password()
 
-        if master_password == previous_master_password:
+        if vault.session.verify_password(password=previous_master_password):
             set_master_password(first_time=False)
         else:
             display_error_message(message="Previous Master Password is not correct!")
@@ -571,9 +832,14 @@ def display_main_menu() -> None:
             "1. Add New",
             "2. List with Password",
             "3. List without Password",
-            "4. Change Master Password" "",
+            "4. Search",
+            "5. Search in Descriptions",
+            "6. Change Master Password" "",
+            "7. Restore Backup",
+            "8. Check Breached Passwords",
+            "9. Check Similar Passwords",
             "",
-            "5. About",
+            "10. About",
             "",
             "Type '0' | bye | end | exit | quit | 'q' for save and exit...",
         ]
@@ -590,8 +856,18 @@ def display_main_menu() -> None:
             case "3":
                 display_items(display_password=False)
             case "4":
-                change_master_password()
+                search_items()
             case "5":
+                search_items(in_descriptions=True)
+            case "6":
+                change_master_password()
+            case "7":
+                restore_backup()
+            case "8":
+                check_breached_passwords()
+            case "9":
+                check_similar_passwords()
+            case "10":
                 clear_screen()
                 display_about()
                 press_enter_to_continue()
@@ -599,6 +875,99 @@ def display_main_menu() -> None:
                 goodbye()
 
 
+def check_breached_passwords() -> None:
+    """Check passwords of all items against the breached-password corpus"""
+
+    clear_screen_and_display(title="Check Breached Passwords")
+
+    if not BREACHED_PASSWORDS_FILE_PATH.is_file():
+        display_error_message(
+            message=f"Breached passwords file '{BREACHED_PASSWORDS_FILE_PATH}' not found!"
+        )
+        press_enter_to_continue()
+        return
+
+    sorted_items: list[VaultItem] = items.get_sorted()
+    secrets: dict[int, dict] = get_items_secrets(items_list=sorted_items)
+
+    # NOTE: One batch (split across processes, if it is big)
+    is_breached_list: list[bool] = check_passwords(
+        path=BREACHED_PASSWORDS_FILE_PATH,
+        workers=BREACHED_PASSWORDS_WORKERS,
+        passwords=[
+            secrets[item.record_id].get(KEY_NAME_PASSWORD, "")
+            for item in sorted_items
+        ],
+    )
+
+    breached_items: list[VaultItem] = [
+        item
+        for item, is_breached in zip(sorted_items, is_breached_list)
+        if is_breached
+    ]
+
+    if not breached_items:
+        display_success_message(message="No breached password found.")
+        press_enter_to_continue()
+        return
+
+    # NOTE: Breached passwords are displayed in the error color (like weak ones)
+    display_table(
+        sections=[
+            [
+                get_item_table_row(item=item, password_is_weak=True)
+                for item in breached_items
+            ]
+        ],
+    )
+
+    display_error_message(
+        message=f"{len(breached_items)} item(s) use a breached password, change them!"
+    )
+    press_enter_to_continue()
+
+
+def check_similar_passwords() -> None:
+    """Find groups of items with similar (or equal) passwords"""
+
+    clear_screen_and_display(title="Check Similar Passwords")
+
+    secrets: dict[int, dict] = get_items_secrets(items_list=list(items))
+
+    # NOTE: MinHash / LSH, not a comparison of every pair of passwords
+    groups: list[list[int]] = find_similar_groups(
+        passwords={
+            record_id: item_secrets.get(KEY_NAME_PASSWORD, "")
+            for record_id, item_secrets in secrets.items()
+            if item_secrets.get(KEY_NAME_PASSWORD)
+        },
+    )
+
+    if not groups:
+        display_success_message(message="No similar passwords found.")
+        press_enter_to_continue()
+        return
+
+    # NOTE: One table section per group
+    display_table(
+        sections=[
+            [
+                get_item_table_row(
+                    item=items.get(record_id=record_id),
+                    password_is_reused=True,
+                )
+                for record_id in sorted(group)
+            ]
+            for group in groups
+        ],
+    )
+
+    display_warning_message(
+        message=f"{len(groups)} group(s) of items use similar passwords!"
+    )
+    press_enter_to_continue()
+
+
 def is_master_password_set() -> bool:
     """Check if the master password file exists and is non-empty."""
 
@@ -634,7 +1003,7 @@ def set_master_password(first_time: bool) -> None:
         message: str
         is_valid: bool
 
-        is_valid, message = validate_password_strength(
+        is_valid, message = is_password_strong_enough(
             password=new_master_password,
         )
 
@@ -652,72 +1021,247 @@ def set_master_password(first_time: bool) -> None:
             press_enter_to_continue()
             continue
 
-        global master_password
-        master_password = new_master_password
+        # NOTE: The only key derivation for this password
+        session: VaultSession = VaultSession.create(password=new_master_password)
 
-        # NOTE: This line Ensures the password is preserved,
+        # NOTE: These lines Ensure the password is preserved,
         # even if the user exits with Ctrl+C rather than 'bye' or 'end'.
-        encrypt_and_save_data(password=master_password)
+        global vault
+        if first_time:
+            storage_class: type[VaultStorage] = get_storage_class(
+                name=STORAGE_BACKEND,
+            )
+
+            vault = storage_class.create(
+                records={},
+                session=session,
+                path=DATA_FILE_PATH,
+                codec=get_codec(name=COMPRESSION_CODEC),
+            )
+
+            items.load(
+                records={},
+                next_record_id=vault.next_record_id,
+                password_tag_key=vault.password_tag_key,
+            )
+
+            open_backup_store(session=session)
+        else:
+            backup_data_file()
+
+            # NOTE: Only the vault data key is re-wrapped, records are kept
+            vault.change_session(session=session)
+
+            if backup_store:
+                backup_store.change_session(session=session)
 
         display_success_message(message=success_message)
         press_enter_to_continue()
         break
 
 
-def handle_backup_if_changed(password: str, new_json_string: str) -> None:
-    """Check for data changes and create a backup."""
+def open_backup_store(session: VaultSession) -> None:
+    """Open (or create) the backup store and move old backup files into it"""
 
-    new_data_hash: str = hash_data(data=new_json_string)
+    global backup_store
 
-    with open(file=DATA_FILE_PATH, mode="rb") as file:
-        existing_encrypted = pickle.load(file=file)
+    # NOTE: Still open after a restore, the store key follows the session
+    if backup_store:
+        if backup_store.session is not session:
+            backup_store.change_session(session=session)
+        return
 
-    _, existing_json_string = decrypt_encrypted_data(
-        password=password,
-        encrypted_data=existing_encrypted,
-    )
+    try:
+        backup_store = BackupStore.open(
+            session=session,
+            path=BACKUP_DIRECTORY_PATH,
+        )
 
-    existing_hash = hash_data(
-        data=existing_json_string,
-    )
+    except (VaultFormatError, VaultDecryptionError) as error:
+        message: str = f"Backups can not be opened ({error}), full copies are kept instead."
+        display_error_message(message=message)
+        press_enter_to_continue()
+        return
 
-    if existing_hash != new_data_hash:
-        now: str = get_now(
-            format=BACKUP_FILE_FORMAT,
+    import_backup_files()
+
+
+def import_backup_files() -> None:
+    """Move full-copy backup files (data_YYYY_MM_DD_HH_MM_SS.bin) into the backup store"""
+
+    prefix: str = f"{DATA_FILE_PATH.stem}_"
+
+    for path in DATA_FILE_PATH.parent.glob(f"{prefix}*{DATA_FILE_PATH.suffix}"):
+        name: str = path.stem[len(prefix) :]
+
+        try:
+            time.strptime(split_snapshot_name(name=name)[0], BACKUP_FILE_FORMAT)
+        except ValueError:
+            continue
+
+        backup_store.add_snapshot(
+            name=backup_store.get_free_name(name=name),
+            data=path.read_bytes(),
         )
+        path.unlink()
+
+    prune_backups(backup_store=backup_store)
 
-        backup_file_path: Path = DATA_FILE_PATH.with_name(
-            f"{DATA_FILE_PATH.stem}_{now}{DATA_FILE_PATH.suffix}"
+
+def backup_data_file() -> None:
+    """Snapshot the current data file into the backup store."""
+
+    # NOTE: One backup is enough for the changes of this session
+    global is_backed_up
+    is_backed_up = True
+
+    snapshot_data_file(
+        vault=vault,
+        path=DATA_FILE_PATH,
+        backup_store=backup_store,
+    )
+
+
+def restore_backup() -> None:
+    """Replace the data file with a backup"""
+
+    global vault
+
+    try:
+        clear_screen_and_display(title="Restore Backup")
+
+        names: list[str] = backup_store.list_snapshots() if backup_store else []
+
+        if not names:
+            display_error_message(message="Backups not found!")
+            press_enter_to_continue()
+            return
+
+        for index, name in enumerate(names, start=1):
+            console.print(f"{index}. {name}", style=STYLE_MENU_ITEM)
+
+        print()
+        message: str = (
+            "Type the number of the backup and then press [ENTER] or just press [ENTER] to go back:"
         )
+        console.print(message, end=" ", style=STYLE_MESSAGE_WAITING)
+        choice: str = read_input().strip()
+
+        if not choice:
+            return
 
-        DATA_FILE_PATH.rename(target=backup_file_path)
+        try:
+            name = names[int(choice) - 1]
+        except:
+            display_error_message(message="Backup not found!")
+            press_enter_to_continue()
+            return
+
+        # NOTE: The current data is kept as a backup too
+        encrypt_and_save_data()
+        backup_data_file()
+
+        vault.close()
+        vault = None
+
+        backup_store.restore_snapshot(name=name, target_path=DATA_FILE_PATH)
+
+        message = f"Backup '{name}' restored, login with its Master Password."
+        display_success_message(message=message)
+        press_enter_to_continue()
+
+    # NOTE: For cancelling with CTRL+'C'
+    except KeyboardInterrupt:
+        print()
+
+    if not vault:
+        load_and_decrypt_data()
+
+
+def encrypt_and_save_data() -> None:
+    """Encrypt changed items using AES-256-GCM and save them to the vault"""
+
+    # NOTE: Nothing was added, edited, duplicated or deleted
+    if not items.is_dirty:
+        return
+
+    puts: dict[int, Tuple[str, str]]
+    deletes: list[int]
+
+    puts, deletes = items.get_changes()
+
+    # NOTE: Backup the file as it was before the first change of this session
+    if (puts or deletes) and not is_backed_up:
+        backup_data_file()
+
+    vault.save(puts=puts, deletes=deletes)
 
+    items.mark_saved(puts=puts, deletes=deletes)
 
-def encrypt_and_save_data(password: str) -> None:
-    """Encrypt items list using AES-256-GCM (Quantum-resistant symmetric encryption)"""
 
-    # NOTE: Serialize items to JSON string
-    new_json_string: str = json.dumps(obj=items)
+def decrypt_old_data_file(data: bytes, password: str) -> Tuple[bool, str, VaultSession]:
+    """Decrypt an old (pickle or single blob) data file"""
 
-    # NOTE: Backup last file if there is some changes in items
-    if DATA_FILE_PATH.is_file():
-        handle_backup_if_changed(
+    plain_text: str
+    is_decrypted: bool
+    session: VaultSession
+
+    if is_vault_container(data=data):
+        session = VaultSession.from_container(
+            data=data,
             password=password,
-            new_json_string=new_json_string,
         )
 
-    encrypted_data: dict = encrypt_plain_text(
-        password=password,
-        plain_text=new_json_string,
-    )
+        is_decrypted, plain_text = session.decrypt(
+            data=data,
+        )
+    else:
+        encrypted_data: dict = load_legacy_vault(data=data)
 
-    with open(file=DATA_FILE_PATH, mode="wb") as file:
-        pickle.dump(obj=encrypted_data, file=file)
+        session = VaultSession.from_legacy(
+            password=password,
+            encrypted_data=encrypted_data,
+        )
+
+        is_decrypted, plain_text = session.decrypt_legacy(
+            encrypted_data=encrypted_data,
+        )
+
+    return is_decrypted, plain_text, session
+
+
+def convert_data_file(records: dict[int, str]) -> None:
+    """Convert the data file to the configured storage backend"""
+
+    global vault
+
+    secrets: dict[int, dict] = vault.read_secrets(record_ids=list(records))
+
+    split_records: dict[int, Tuple[str, str]] = {
+        record_id: (index_text, json.dumps(obj=secrets[record_id]))
+        for record_id, index_text in records.items()
+    }
+
+    # NOTE: The old file is kept as a backup
+    backup_data_file()
+    vault.close()
+
+    # NOTE: Same data key, so password tags stay valid
+    vault = get_storage_class(name=STORAGE_BACKEND).create(
+        session=vault.session,
+        path=DATA_FILE_PATH,
+        records=split_records,
+        data_key=vault.data_key,
+        next_record_id=vault.next_record_id,
+        codec=get_codec(name=COMPRESSION_CODEC),
+    )
 
 
 def load_and_decrypt_data() -> None:
     """Load data from file and decrypt it"""
 
+    global vault
+
     while True:
         title: str = "Login"
         clear_screen_and_display(title=title)
@@ -726,31 +1270,105 @@ def load_and_decrypt_data() -> None:
         display_label(label=master_password_label, width=len(master_password_label))
         password: str = get_password()
 
-        with open(file=DATA_FILE_PATH, mode="rb") as file:
-            encrypted_data: dict = pickle.load(file=file)
-
-        plain_text: str
-        is_decrypted: bool
+        records: dict[int, str]
 
-        is_decrypted, plain_text = decrypt_encrypted_data(
-            password=password,
-            encrypted_data=encrypted_data,
+        storage_class: type[VaultStorage] | None = detect_storage_class(
+            path=DATA_FILE_PATH,
         )
 
-        if not is_decrypted:
-            display_error_message(message=plain_text)
-            press_enter_to_continue()
-            continue
+        if storage_class:
+            try:
+                # NOTE: The only key derivation for this session
+                vault, records = storage_class.open(
+                    password=password,
+                    path=DATA_FILE_PATH,
+                    codec=get_codec(name=COMPRESSION_CODEC),
+                )
+
+            except VaultDecryptionError as error:
+                display_error_message(message=str(error))
+                press_enter_to_continue()
+                continue
+        else:
+            with open(file=DATA_FILE_PATH, mode="rb") as file:
+                data: bytes = file.read()
+
+            plain_text: str
+            is_decrypted: bool
+            session: VaultSession
+
+            # NOTE: The only key derivation for this session
+            is_decrypted, plain_text, session = decrypt_old_data_file(
+                data=data,
+                password=password,
+            )
+
+            if not is_decrypted:
+                display_error_message(message=plain_text)
+                press_enter_to_continue()
+                continue
+
+            split_records: dict[int, Tuple[str, str]] = {
+                record_id: serialize_item(item=VaultItem.from_dict(data=item))
+                for record_id, item in enumerate(json.loads(s=plain_text), start=1)
+            }
+
+            # NOTE: Migrate old vault files on first unlock,
+            # the old file is kept as a backup.
+            open_backup_store(session=session)
+            backup_data_file()
+
+            vault = get_storage_class(name=STORAGE_BACKEND).create(
+                session=session,
+                path=DATA_FILE_PATH,
+                records=split_records,
+                codec=get_codec(name=COMPRESSION_CODEC),
+            )
 
-        items.clear()
-        items.extend(json.loads(s=plain_text))
+            # NOTE: Secrets are not kept in memory
+            records = {
+                record_id: index_text
+                for record_id, (index_text, _) in split_records.items()
+            }
+
+        open_backup_store(session=vault.session)
+
+        if not isinstance(vault, get_storage_class(name=STORAGE_BACKEND)):
+            convert_data_file(records=records)
+
+        items.load(
+            records=records,
+            next_record_id=vault.next_record_id,
+            password_tag_key=vault.password_tag_key,
+        )
 
-        global master_password
-        master_password = password
+        add_missing_password_fields()
 
         break
 
 
+def add_missing_password_fields() -> None:
+    """Add password tag and score to items saved before they existed"""
+
+    untagged_items: list[VaultItem] = [
+        item
+        for item in items
+        if item.password_tag is None or item.password_score is None
+    ]
+
+    if not untagged_items:
+        return
+
+    # NOTE: One time only, the fields are saved with the items
+    secrets: dict[int, dict] = get_items_secrets(items_list=untagged_items)
+
+    for item in untagged_items:
+        item.set_secrets(secrets=secrets[item.record_id])
+        items.touch(item=item)
+
+    encrypt_and_save_data()
+
+
 def main() -> None:
     """The main of program"""
 
@@ -758,11 +1376,25 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    screen: Screen | None = None
+    data_file_lock: DataFileLock = DataFileLock(path=DATA_FILE_PATH)
+
     try:
         console = Console()
 
-        items: list[dict] = []
-        master_password: str = ""
+        if FULL_SCREEN_MODE and console.is_terminal and not console.legacy_windows:
+            screen = Screen(file=sys.stdout)
+            screen.open()
+
+        items: VaultItems = VaultItems()
+        vault: VaultStorage = None
+        backup_store: BackupStore = None
+        is_backed_up: bool = False
+
+        table_rows: TableRows = TableRows()
+
+        # NOTE: Held for the whole session, CLI commands wait for it
+        data_file_lock.acquire()
 
         if is_master_password_set():
             load_and_decrypt_data()
@@ -772,9 +1404,20 @@ if __name__ == "__main__":
         main()
 
     except KeyboardInterrupt:
+        # NOTE: Changes are already journaled, just finish the group commit
+        if vault:
+            vault.sync()
+
         print()
 
     except Exception as error:
         print(f"\n[-] {error}!")
 
+    # NOTE: 'goodbye' exits, the normal screen is restored in any case
+    finally:
+        data_file_lock.release()
+
+        if screen:
+            screen.close()
+
     print()
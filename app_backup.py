@@ -0,0 +1,479 @@
+"""
+Application Backup
+"""
+
+import os
+import hmac
+import json
+import hashlib
+
+from typing import Tuple
+from pathlib import Path
+from datetime import datetime
+
+from app_vault import KEY_LENGTH
+from app_vault import TAG_LENGTH
+from app_vault import NONCE_LENGTH
+from app_vault import VAULT_FORMAT_VERSION_BACKUP
+from app_vault import MESSAGE_DECRYPTION_FAILED
+from app_vault import VaultSession
+from app_vault import VaultFormatError
+from app_vault import VaultDecryptionError
+from app_vault import fsync_directory
+from app_vault import unpack_vault_header
+
+from dt_cryptography import encrypt_bytes
+from dt_cryptography import decrypt_bytes
+
+
+# NOTE: Backup store layout (in its own directory):
+#
+#   key.bin                 vault header | wrapped store key
+#   chunks/ab/abcd...       sealed chunk (nonce | ciphertext | tag)
+#   snapshots/<time>.bin    sealed manifest (JSON: size and chunk ids)
+#   snapshots/<time>-2.bin  the next snapshot of the same second
+#
+# Snapshots are split into content-defined chunks, so an edit only changes
+# the chunks around it and every unique chunk is stored once. A chunk id is
+# a keyed hash (HMAC-SHA256) of its content, so ids do not leak anything.
+# The chunk id (or the snapshot name) is the associated data of its file.
+KEY_FILE_NAME: str = "key.bin"
+CHUNKS_DIRECTORY_NAME: str = "chunks"
+SNAPSHOTS_DIRECTORY_NAME: str = "snapshots"
+SNAPSHOT_SUFFIX: str = ".bin"
+SNAPSHOT_COUNTER_SEPARATOR: str = "-"
+
+# NOTE: Content-defined chunking (Gear rolling hash): a chunk ends where the
+# top bits of the hash of the last 64 bytes are zero, so boundaries move with
+# the content, not with the offsets. Chunks are 8 KiB on average.
+CHUNK_MIN_SIZE: int = 2 * 1024
+CHUNK_MAX_SIZE: int = 64 * 1024
+CHUNK_MASK: int = ((1 << 13) - 1) << (64 - 13)
+HASH_MASK: int = (1 << 64) - 1
+
+# NOTE: Fixed (never change it!), or old chunks are not reused any more
+GEAR: Tuple[int, ...] = tuple(
+    int.from_bytes(hashlib.sha256(bytes([value])).digest()[:8], "big")
+    for value in range(256)
+)
+
+
+def split_chunks(data: bytes) -> list[memoryview]:
+    """Split data into content-defined chunks (without copying them)"""
+
+    view = memoryview(data)
+    chunks: list[memoryview] = []
+
+    start: int = 0
+    while start < len(data):
+        end: int = min(start + CHUNK_MAX_SIZE, len(data))
+        cut: int = end
+
+        hash_value: int = 0
+        for index in range(start + CHUNK_MIN_SIZE, end):
+            hash_value = ((hash_value << 1) + GEAR[data[index]]) & HASH_MASK
+
+            if not hash_value & CHUNK_MASK:
+                cut = index + 1
+                break
+
+        chunks.append(view[start:cut])
+        start = cut
+
+    return chunks
+
+
+def select_retained_snapshots(
+    times: list[datetime],
+    keep_last: int,
+    keep_daily: int,
+    keep_weekly: int,
+    keep_monthly: int,
+) -> set[datetime]:
+    """
+    Grandfather-father-son retention
+
+    Keeps the 'keep_last' newest snapshots, plus the newest snapshot of each
+    of the last 'keep_daily' days, 'keep_weekly' (ISO) weeks and
+    'keep_monthly' months that have a snapshot.
+
+    Returns:
+        set: Snapshot times to keep
+    """
+
+    result: set[datetime] = set(sorted(times, reverse=True)[:keep_last])
+
+    periods: list[Tuple[int, object]] = [
+        (keep_daily, lambda time: time.date()),
+        (keep_weekly, lambda time: time.isocalendar()[:2]),
+        (keep_monthly, lambda time: (time.year, time.month)),
+    ]
+
+    for count, get_period in periods:
+        seen: set = set()
+
+        for time in sorted(times, reverse=True):
+            if len(seen) >= count:
+                break
+
+            period = get_period(time)
+            if period not in seen:
+                seen.add(period)
+                result.add(time)
+
+    return result
+
+
+def split_snapshot_name(name: str) -> Tuple[str, int]:
+    """
+    Split a snapshot name into its time and its counter
+
+    Returns:
+        tuple: (time, counter), the counter is 1 if the name has none
+    """
+
+    base, separator, counter = name.rpartition(SNAPSHOT_COUNTER_SEPARATOR)
+
+    if not separator or not counter.isdigit():
+        return name, 1
+
+    result: Tuple[str, int] = base, int(counter)
+
+    return result
+
+
+def write_file_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a temporary file, fsync and an atomic 'os.replace'"""
+
+    temp_path: Path = path.with_name(f"{path.name}.tmp")
+
+    with open(file=temp_path, mode="wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(src=temp_path, dst=path)
+
+
+class BackupStore:
+    """
+    Content-addressed, deduplicated and encrypted snapshots of the data file
+
+    The store key is random and wrapped by the session key (like the vault
+    data key), so the store survives vault conversions and a password change
+    only re-wraps it. Disk usage grows with the chunks that changed between
+    snapshots, not with the number of snapshots.
+    """
+
+    def __init__(self, path: Path, session: VaultSession, store_key: bytes) -> None:
+        self.path: Path = path
+        self.session: VaultSession = session
+
+        # NOTE: Separate keys for chunk ids and for encryption
+        self.id_key: bytes = hmac.digest(store_key, b"chunk id", "sha256")
+        self.encryption_key: bytes = hmac.digest(store_key, b"encryption", "sha256")
+
+        self.store_key: bytes = store_key
+
+    @property
+    def chunks_path(self) -> Path:
+        return self.path / CHUNKS_DIRECTORY_NAME
+
+    @property
+    def snapshots_path(self) -> Path:
+        return self.path / SNAPSHOTS_DIRECTORY_NAME
+
+    @classmethod
+    def open(cls, path: Path, session: VaultSession) -> "BackupStore":
+        """
+        Open the store in path (create it, if it does not exist)
+
+        Raises:
+            VaultFormatError: If the key file is not valid
+            VaultDecryptionError: If the store belongs to another password
+        """
+
+        key_path: Path = path / KEY_FILE_NAME
+
+        if not key_path.is_file():
+            path.mkdir(parents=True, exist_ok=True)
+
+            store = cls(path=path, session=session, store_key=os.urandom(KEY_LENGTH))
+            store.write_key()
+
+            return store
+
+        data: bytes = key_path.read_bytes()
+        view = memoryview(data)
+
+        version, _, _, offset = unpack_vault_header(view=view)
+        if version != VAULT_FORMAT_VERSION_BACKUP:
+            raise VaultFormatError(f"Vault format version {version} is not a backup!")
+
+        if len(view) != offset + NONCE_LENGTH + KEY_LENGTH + TAG_LENGTH:
+            raise VaultFormatError("Backup key file has an unknown format!")
+
+        try:
+            store_key: bytes = decrypt_bytes(
+                key=session.key,
+                nonce=view[offset : offset + NONCE_LENGTH],
+                ciphertext=view[offset + NONCE_LENGTH : -TAG_LENGTH],
+                tag=view[-TAG_LENGTH:],
+                associated_data=view[:offset],
+            )
+        except:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        store = cls(path=path, session=session, store_key=store_key)
+
+        return store
+
+    def write_key(self) -> None:
+        """Write the store key, wrapped by the session key"""
+
+        header: bytes = self.session.pack_header(version=VAULT_FORMAT_VERSION_BACKUP)
+
+        nonce, wrapped_key, tag = encrypt_bytes(
+            key=self.session.key,
+            data=self.store_key,
+            associated_data=header,
+        )
+
+        key_path: Path = self.path / KEY_FILE_NAME
+
+        write_file_atomic(path=key_path, data=b"".join((header, nonce, wrapped_key, tag)))
+        fsync_directory(path=key_path)
+
+    def change_session(self, session: VaultSession) -> None:
+        """Re-wrap the store key for a new master password"""
+
+        self.session = session
+        self.write_key()
+
+    def seal(self, data: bytes, associated_data: bytes) -> bytes:
+        """Encrypt data with the store encryption key"""
+
+        nonce, ciphertext, tag = encrypt_bytes(
+            key=self.encryption_key,
+            data=data,
+            associated_data=associated_data,
+        )
+
+        result: bytes = b"".join((nonce, ciphertext, tag))
+
+        return result
+
+    def open_sealed(self, sealed: bytes, associated_data: bytes) -> bytes:
+        """Decrypt data sealed with the store encryption key"""
+
+        view = memoryview(sealed)
+
+        try:
+            result: bytes = decrypt_bytes(
+                key=self.encryption_key,
+                nonce=view[:NONCE_LENGTH],
+                ciphertext=view[NONCE_LENGTH:-TAG_LENGTH],
+                tag=view[-TAG_LENGTH:],
+                associated_data=associated_data,
+            )
+        except:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        return result
+
+    def get_chunk_path(self, chunk_id: str) -> Path:
+        return self.chunks_path / chunk_id[:2] / chunk_id
+
+    def get_snapshot_path(self, name: str) -> Path:
+        return self.snapshots_path / f"{name}{SNAPSHOT_SUFFIX}"
+
+    def list_snapshots(self) -> list[str]:
+        """Get snapshot names (oldest first)"""
+
+        if not self.snapshots_path.is_dir():
+            return []
+
+        result: list[str] = sorted(
+            (path.stem for path in self.snapshots_path.glob(f"*{SNAPSHOT_SUFFIX}")),
+            key=split_snapshot_name,
+        )
+
+        return result
+
+    def get_free_name(self, name: str) -> str:
+        """
+        Get a snapshot name that is not used yet: name, or name with a
+        counter ('<name>-2', '<name>-3', ...) if snapshots were taken in the
+        same second
+        """
+
+        result: str = name
+
+        counter: int = 1
+        while self.get_snapshot_path(name=result).exists():
+            counter += 1
+            result = f"{name}{SNAPSHOT_COUNTER_SEPARATOR}{counter}"
+
+        return result
+
+    def add_snapshot(self, name: str, data: bytes) -> int:
+        """
+        Store data as snapshot name
+
+        Returns:
+            int: Number of bytes of new (not deduplicated) chunks
+
+        Raises:
+            FileExistsError: If the snapshot exists (see 'get_free_name')
+        """
+
+        if self.get_snapshot_path(name=name).exists():
+            raise FileExistsError(f"Snapshot '{name}' already exists!")
+
+        chunk_ids: list[str] = []
+        written_size: int = 0
+        # NOTE: Directory -> a new chunk in it (to fsync the directory)
+        directories: dict[Path, Path] = {}
+
+        for chunk in split_chunks(data=data):
+            chunk_id: str = hmac.digest(self.id_key, chunk, "sha256").hex()
+            chunk_ids.append(chunk_id)
+
+            chunk_path: Path = self.get_chunk_path(chunk_id=chunk_id)
+            if chunk_path.is_file():
+                continue
+
+            chunk_path.parent.mkdir(parents=True, exist_ok=True)
+            write_file_atomic(
+                path=chunk_path,
+                data=self.seal(data=chunk, associated_data=chunk_id.encode()),
+            )
+
+            directories[chunk_path.parent] = chunk_path
+            written_size += len(chunk)
+
+        for chunk_path in directories.values():
+            fsync_directory(path=chunk_path)
+
+        # NOTE: The manifest is written last, so it never refers to missing chunks
+        manifest: str = json.dumps(obj={"size": len(data), "chunks": chunk_ids})
+
+        self.snapshots_path.mkdir(parents=True, exist_ok=True)
+
+        snapshot_path: Path = self.get_snapshot_path(name=name)
+        write_file_atomic(
+            path=snapshot_path,
+            data=self.seal(
+                data=manifest.encode(encoding="utf-8"),
+                associated_data=name.encode(encoding="utf-8"),
+            ),
+        )
+        fsync_directory(path=snapshot_path)
+
+        return written_size
+
+    def read_manifest(self, name: str) -> dict:
+        """Decrypt the manifest of snapshot name"""
+
+        sealed: bytes = self.get_snapshot_path(name=name).read_bytes()
+
+        manifest: bytes = self.open_sealed(
+            sealed=sealed,
+            associated_data=name.encode(encoding="utf-8"),
+        )
+
+        result: dict = json.loads(s=manifest)
+
+        return result
+
+    def restore_snapshot(self, name: str, target_path: Path) -> None:
+        """Write snapshot name (atomically) to target path"""
+
+        manifest: dict = self.read_manifest(name=name)
+
+        chunks: list[bytes] = []
+        for chunk_id in manifest["chunks"]:
+            sealed: bytes = self.get_chunk_path(chunk_id=chunk_id).read_bytes()
+
+            chunks.append(
+                self.open_sealed(sealed=sealed, associated_data=chunk_id.encode())
+            )
+
+        data: bytes = b"".join(chunks)
+        if len(data) != manifest["size"]:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        write_file_atomic(path=target_path, data=data)
+        fsync_directory(path=target_path)
+
+    def apply_retention(
+        self,
+        time_format: str,
+        keep_last: int,
+        keep_daily: int,
+        keep_weekly: int,
+        keep_monthly: int,
+    ) -> list[str]:
+        """
+        Delete snapshots that the retention policy does not keep
+
+        Returns:
+            list: Deleted snapshot names
+        """
+
+        times: dict[datetime, str] = {}
+        for name in self.list_snapshots():
+            base, counter = split_snapshot_name(name=name)
+
+            try:
+                time: datetime = datetime.strptime(base, time_format)
+            except ValueError:
+                # NOTE: Snapshots with other names are never deleted
+                continue
+
+            # NOTE: The counter orders snapshots of the same second
+            times[time.replace(microsecond=counter)] = name
+
+        retained: set[datetime] = select_retained_snapshots(
+            times=list(times),
+            keep_last=keep_last,
+            keep_daily=keep_daily,
+            keep_weekly=keep_weekly,
+            keep_monthly=keep_monthly,
+        )
+
+        result: list[str] = []
+        for time, name in times.items():
+            if time not in retained:
+                self.get_snapshot_path(name=name).unlink()
+                result.append(name)
+
+        return result
+
+    def collect_garbage(self) -> int:
+        """
+        Delete chunks that no snapshot refers to
+
+        Returns:
+            int: Number of deleted chunks
+        """
+
+        used: set[str] = set()
+        for name in self.list_snapshots():
+            used.update(self.read_manifest(name=name)["chunks"])
+
+        result: int = 0
+
+        if not self.chunks_path.is_dir():
+            return result
+
+        for chunk_path in self.chunks_path.glob("*/*"):
+            if chunk_path.name not in used:
+                chunk_path.unlink()
+                result += 1
+
+        return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
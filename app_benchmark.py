@@ -0,0 +1,697 @@
+"""
+Application Benchmark
+
+Usage:
+    python .\\app_benchmark.py [benchmark name] [item counts...]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import heapq
+import random
+import tempfile
+import tracemalloc
+
+from typing import Iterator
+from pathlib import Path
+
+from rich import print
+from rich.table import Table
+from rich.console import Console
+
+from app_constants import *
+from app_item import VaultItem
+from app_vault import VaultLog
+from app_vault import VaultItems
+from app_vault import VaultSession
+from app_vault import serialize_item
+
+from app_vault_sqlite import VaultSqlite
+
+from app_table import TableRows
+from app_table import MASKED_PASSWORD
+from app_table import get_total_width
+
+from dt_compression import get_available_codecs
+
+from dt_breached_passwords import MAX_HASH_SIZE
+from dt_breached_passwords import BreachedPasswords
+from dt_breached_passwords import build_corpus
+from dt_breached_passwords import get_index_path
+from dt_breached_passwords import check_passwords
+from dt_breached_passwords import get_password_hash
+
+from dt_password_similarity import get_ngrams
+from dt_password_similarity import find_similar_groups
+from dt_password_similarity import get_jaccard_similarity
+
+from dt_cryptography import generate_password
+from dt_cryptography import derive_key_from_password
+
+
+DEFAULT_COUNTS: list[int] = [1_000, 10_000, 100_000]
+
+# NOTE: The KDF is not what we measure here
+BENCHMARK_PASSWORD: str = "Benchmark-Password-1234"
+BENCHMARK_KDF_ITERATIONS: int = 1_000
+BENCHMARK_TAG_KEY: bytes = bytes(32)
+
+
+def generate_synthetic_items(count: int, seed: int = 1) -> list[dict]:
+    """Generate 'count' items that look like a real vault"""
+
+    rng = random.Random(seed)
+
+    sites: list[str] = [
+        "google",
+        "github",
+        "microsoft",
+        "telegram",
+        "linkedin",
+        "amazon",
+        "digikala",
+        "snapp",
+        "divar",
+        "bank",
+    ]
+
+    items: list[dict] = []
+    for index in range(count):
+        site: str = rng.choice(sites)
+
+        name: str = f"https://www.{site}{index}.com"
+        now: str = f"2025-{rng.randint(1, 12):02}-{rng.randint(1, 28):02} 12:00:00"
+
+        # NOTE: Most items use the default values, like a real vault
+        use_defaults: bool = rng.random() < 0.8
+
+        item: dict = {
+            KEY_NAME_NAME: name,
+            KEY_NAME_EMAIL: DEFAULT_EMAIL if use_defaults else f"user{index}@mail.com",
+            KEY_NAME_MOBILE: DEFAULT_MOBILE,
+            KEY_NAME_PASSWORD: generate_password(length=GENERATED_PASSWORD_LENGTH),
+            KEY_NAME_USERNAME: DEFAULT_USERNAME if use_defaults else f"user{index}",
+            KEY_NAME_DESCRIPTION: (
+                f"Recovery codes and notes for {site}" if rng.random() < 0.3 else ""
+            ),
+            #
+            KEY_NAME_INSERT_TIME: now,
+            KEY_NAME_UPDATE_TIME: now,
+        }
+
+        items.append(item)
+
+    return items
+
+
+def create_benchmark_session() -> VaultSession:
+    """Create a session with a cheap KDF"""
+
+    salt: bytes = os.urandom(16)
+
+    key: bytes = derive_key_from_password(
+        salt=salt,
+        password=BENCHMARK_PASSWORD,
+        iterations=BENCHMARK_KDF_ITERATIONS,
+    )
+
+    session = VaultSession(key=key, salt=salt, iterations=BENCHMARK_KDF_ITERATIONS)
+
+    return session
+
+
+def benchmark_compression(counts: list[int]) -> None:
+    """Vault file size and save / load time per compression codec"""
+
+    table = Table(title="Compression (whole vault save / login load)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Codec")
+    table.add_column("File Size (KB)", justify="right")
+    table.add_column("Ratio", justify="right")
+    table.add_column("Save (s)", justify="right")
+    table.add_column("Load (s)", justify="right")
+
+    session: VaultSession = create_benchmark_session()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "data.bin"
+
+        for count in counts:
+            records: dict = {
+                record_id: serialize_item(item=VaultItem.from_dict(data=item))
+                for record_id, item in enumerate(
+                    generate_synthetic_items(count=count),
+                    start=1,
+                )
+            }
+
+            base_size: int = 0
+            for name, codec in get_available_codecs().items():
+                start: float = time.perf_counter()
+                VaultLog.create(
+                    path=path,
+                    codec=codec,
+                    records=records,
+                    session=session,
+                )
+                save_time: float = time.perf_counter() - start
+
+                size: int = path.stat().st_size
+                if not base_size:
+                    base_size = size
+
+                start = time.perf_counter()
+                VaultLog.open(path=path, password=BENCHMARK_PASSWORD)
+                load_time: float = time.perf_counter() - start
+
+                table.add_row(
+                    f"{count:,}",
+                    name,
+                    f"{size / 1024:,.0f}",
+                    f"{size / base_size:.2f}",
+                    f"{save_time:.2f}",
+                    f"{load_time:.2f}",
+                )
+
+    Console().print(table)
+
+
+def measure_memory(build) -> int:
+    """Get the memory (in bytes) still held by what 'build' returns"""
+
+    tracemalloc.start()
+
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del value
+
+    return size
+
+
+def benchmark_memory(counts: list[int]) -> None:
+    """Memory footprint of loaded items: plain dicts vs 'VaultItem' records"""
+
+    table = Table(title="Memory (loaded vault items)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Item Type")
+    table.add_column("Memory (MB)", justify="right")
+    table.add_column("Per Item (bytes)", justify="right")
+
+    for count in counts:
+        # NOTE: Items are built from JSON, like at login (strings not shared)
+        texts: list[str] = [
+            json.dumps(obj=item) for item in generate_synthetic_items(count=count)
+        ]
+
+        builders: dict = {
+            "dict": lambda: [json.loads(s=text) for text in texts],
+            "VaultItem": lambda: [
+                VaultItem.from_dict(data=json.loads(s=text)) for text in texts
+            ],
+        }
+
+        for name, build in builders.items():
+            size: int = measure_memory(build=build)
+
+            table.add_row(
+                f"{count:,}",
+                name,
+                f"{size / 1024 / 1024:,.1f}",
+                f"{size / count:,.0f}",
+            )
+
+    Console().print(table)
+
+
+# NOTE: Mutations (half adds, half renames) per measurement
+SORT_MUTATIONS: int = 100
+
+
+def benchmark_sort(counts: list[int]) -> None:
+    """Keeping name order per mutation: full re-sort vs incremental (bisect)"""
+
+    table = Table(title=f"Sorted Order ({SORT_MUTATIONS} adds and renames)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Ordering")
+    table.add_column("Per Mutation (ms)", justify="right")
+    table.add_column("Speedup", justify="right")
+
+    for count in counts:
+        records: dict[int, str] = {
+            record_id: json.dumps(obj=item)
+            for record_id, item in enumerate(
+                generate_synthetic_items(count=count),
+                start=1,
+            )
+        }
+
+        new_items: list[dict] = generate_synthetic_items(count=SORT_MUTATIONS, seed=2)
+
+        # NOTE: As before: one full sort (and ID update) after every mutation
+        items = VaultItems()
+        items.load(
+            records=records,
+            next_record_id=count + 1,
+            password_tag_key=BENCHMARK_TAG_KEY,
+        )
+        item_list: list[VaultItem] = list(items)
+
+        start: float = time.perf_counter()
+        for index, new_item in enumerate(new_items):
+            if index % 2:
+                item_list[index].name = new_item[KEY_NAME_NAME]
+            else:
+                item_list.append(VaultItem.from_dict(data=new_item))
+
+            item_list.sort(key=lambda item: item.name)
+            for record_id, item in enumerate(item_list, start=1):
+                item.record_id = record_id
+        full_time: float = (time.perf_counter() - start) / SORT_MUTATIONS
+
+        items = VaultItems()
+        items.load(
+            records=records,
+            next_record_id=count + 1,
+            password_tag_key=BENCHMARK_TAG_KEY,
+        )
+        item_list = list(items)
+
+        start = time.perf_counter()
+        for index, new_item in enumerate(new_items):
+            if index % 2:
+                item_list[index].name = new_item[KEY_NAME_NAME]
+                items.touch(item=item_list[index])
+            else:
+                items.append(item=VaultItem.from_dict(data=new_item))
+        incremental_time: float = (time.perf_counter() - start) / SORT_MUTATIONS
+
+        table.add_row(f"{count:,}", "full sort", f"{full_time * 1000:,.3f}", "1.0x")
+        table.add_row(
+            f"{count:,}",
+            "incremental",
+            f"{incremental_time * 1000:,.3f}",
+            f"{full_time / incremental_time:,.0f}x",
+        )
+
+    Console().print(table)
+
+
+# NOTE: Password lookups per measurement (half of them are breached)
+BREACH_LOOKUPS: int = 100_000
+
+
+def generate_corpus_lines(count: int, extra_hashes: list[bytes]) -> Iterator[str]:
+    """Generate sorted 'HASH:COUNT' lines: 'count' random hashes and extra ones"""
+
+    rng = random.Random(1)
+
+    # NOTE: Evenly spaced with random gaps: sorted without sorting
+    space: int = 1 << (MAX_HASH_SIZE * 8)
+    step: int = space // count
+
+    hashes: Iterator[bytes] = (
+        (index * step + rng.randrange(step)).to_bytes(MAX_HASH_SIZE, "big")
+        for index in range(count)
+    )
+
+    for digest in heapq.merge(hashes, sorted(extra_hashes)):
+        yield f"{digest.hex().upper()}:1"
+
+
+def benchmark_breach(counts: list[int]) -> None:
+    """Breached-password lookups: binary search vs prefix index vs processes"""
+
+    table = Table(title=f"Breached Passwords ({BREACH_LOOKUPS:,} lookups)")
+
+    table.add_column("Corpus Hashes", justify="right")
+    table.add_column("Corpus (MB)", justify="right")
+    table.add_column("Lookup")
+    table.add_column("Total (ms)", justify="right")
+    table.add_column("Per Lookup (us)", justify="right")
+
+    passwords: list[str] = [f"password-{index}" for index in range(BREACH_LOOKUPS)]
+    breached_hashes: list[bytes] = [
+        get_password_hash(password=password) for password in passwords[::2]
+    ]
+
+    workers: int = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            corpus_path: str = os.path.join(directory, f"corpus_{count}.bin")
+
+            build_corpus(
+                corpus_path=corpus_path,
+                lines=generate_corpus_lines(count=count, extra_hashes=breached_hashes),
+            )
+
+            size: int = os.path.getsize(corpus_path)
+            index_path: str = get_index_path(corpus_path=corpus_path)
+            no_index_path: str = f"{index_path}.off"
+
+            def lookup_in_process() -> list[bool]:
+                with BreachedPasswords(path=corpus_path) as corpus:
+                    return [corpus.is_breached(password=password) for password in passwords]
+
+            lookups: dict = {
+                "binary search": lookup_in_process,
+                "prefix index": lookup_in_process,
+                "prefix index, parallel": lambda: check_passwords(
+                    path=corpus_path,
+                    passwords=passwords,
+                    workers=workers,
+                ),
+            }
+
+            for name, lookup in lookups.items():
+                # NOTE: The first lookup runs without the index file
+                if name == "binary search":
+                    os.replace(index_path, no_index_path)
+                elif os.path.exists(no_index_path):
+                    os.replace(no_index_path, index_path)
+
+                start: float = time.perf_counter()
+                found: list[bool] = lookup()
+                duration: float = time.perf_counter() - start
+
+                if found != [index % 2 == 0 for index in range(BREACH_LOOKUPS)]:
+                    raise ValueError("Breached password lookups are not correct!")
+
+                table.add_row(
+                    f"{count:,}",
+                    f"{size / 1024 / 1024:,.0f}",
+                    name,
+                    f"{duration * 1000:,.0f}",
+                    f"{duration / BREACH_LOOKUPS * 1_000_000:,.2f}",
+                )
+
+    Console().print(table)
+
+
+# NOTE: Pairwise comparison is only measured up to this many passwords
+SIMILARITY_MAX_PAIRWISE: int = 5_000
+
+
+def benchmark_similarity(counts: list[int]) -> None:
+    """Near-duplicate passwords: every pair vs MinHash / LSH"""
+
+    table = Table(title="Similar Passwords (1% near-duplicates)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Method")
+    table.add_column("Pairs / Groups", justify="right")
+    table.add_column("Time (s)", justify="right")
+
+    for count in counts:
+        passwords: dict[int, str] = {
+            record_id: item[KEY_NAME_PASSWORD]
+            for record_id, item in enumerate(
+                generate_synthetic_items(count=count),
+                start=1,
+            )
+        }
+
+        # NOTE: 'Summer2024!' -> 'Summer2025!' in one of every 100 items
+        for record_id in range(1, count + 1, 100):
+            passwords[record_id + 1] = f"{passwords[record_id][:-2]}{record_id % 10}!"
+
+        start: float = time.perf_counter()
+        groups: list[list[int]] = find_similar_groups(passwords=passwords)
+        lsh_time: float = time.perf_counter() - start
+
+        if count <= SIMILARITY_MAX_PAIRWISE:
+            start = time.perf_counter()
+
+            ngrams: list[frozenset[str]] = [
+                get_ngrams(password=password) for password in passwords.values()
+            ]
+            pair_count: int = sum(
+                1
+                for index, first in enumerate(ngrams)
+                for second in ngrams[index + 1 :]
+                if get_jaccard_similarity(first=first, second=second) >= 0.5
+            )
+
+            pairwise_time: float = time.perf_counter() - start
+            table.add_row(f"{count:,}", "every pair", f"{pair_count:,}", f"{pairwise_time:,.2f}")
+
+        table.add_row(f"{count:,}", "MinHash / LSH", f"{len(groups):,}", f"{lsh_time:,.2f}")
+
+    Console().print(table)
+
+
+# NOTE: As typed, with typos and words that match most items
+SEARCH_QUERIES: list[str] = [
+    "g",
+    "goo",
+    "google",
+    "gogle",
+    "githb 77",
+    "digikala 3",
+    "user5@mail",
+    "dariusht",
+]
+
+
+def benchmark_search(counts: list[int]) -> None:
+    """Search index: first build, incremental update and queries"""
+
+    table = Table(title="Search (name, email and username)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Operation")
+    table.add_column("Time (ms)", justify="right")
+
+    for count in counts:
+        records: dict[int, str] = {
+            record_id: json.dumps(obj=item)
+            for record_id, item in enumerate(
+                generate_synthetic_items(count=count),
+                start=1,
+            )
+        }
+
+        items = VaultItems()
+        items.load(
+            records=records,
+            next_record_id=count + 1,
+            password_tag_key=BENCHMARK_TAG_KEY,
+        )
+
+        # NOTE: The first search builds the index
+        start: float = time.perf_counter()
+        items.search(query="google")
+        build_time: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for item in list(items)[:SORT_MUTATIONS]:
+            item.name = f"{item.name}.renamed"
+            items.touch(item=item)
+        update_time: float = (time.perf_counter() - start) / SORT_MUTATIONS
+
+        table.add_row(f"{count:,}", "build (first search)", f"{build_time * 1000:,.1f}")
+        table.add_row(f"{count:,}", "update (per rename)", f"{update_time * 1000:,.3f}")
+
+        for query in SEARCH_QUERIES:
+            start = time.perf_counter()
+            items.search(query=query)
+            query_time: float = time.perf_counter() - start
+
+            table.add_row(f"{count:,}", f"search '{query}'", f"{query_time * 1000:,.2f}")
+
+    Console().print(table)
+
+
+def benchmark_lookup(counts: list[int]) -> None:
+    """Find one item by email: full login decrypt vs the blind index"""
+
+    table = Table(title="Lookup by email (SQLite vault)")
+
+    table.add_column("Items", justify="right")
+    table.add_column("Method")
+    table.add_column("Time (ms)", justify="right")
+    table.add_column("Decrypted", justify="right")
+
+    session: VaultSession = create_benchmark_session()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "data.db"
+
+        for count in counts:
+            records: dict = {
+                record_id: serialize_item(item=VaultItem.from_dict(data=item))
+                for record_id, item in enumerate(
+                    generate_synthetic_items(count=count),
+                    start=1,
+                )
+            }
+
+            VaultSqlite.create(path=path, records=records, session=session).close()
+
+            # NOTE: An email of a non default item, in the middle of the vault
+            email: str = ""
+            for plain_text, _ in list(records.values())[count // 2 :]:
+                email = json.loads(s=plain_text)[KEY_NAME_EMAIL]
+                if email != DEFAULT_EMAIL:
+                    break
+
+            start: float = time.perf_counter()
+            vault, loaded = VaultSqlite.open(path=path, password=BENCHMARK_PASSWORD)
+            matches: list[int] = [
+                record_id
+                for record_id, plain_text in loaded.items()
+                if json.loads(s=plain_text)[KEY_NAME_EMAIL].casefold() == email
+            ]
+            full_time: float = time.perf_counter() - start
+            vault.close()
+
+            start = time.perf_counter()
+            vault, _ = VaultSqlite.open(
+                path=path,
+                password=BENCHMARK_PASSWORD,
+                load_records=False,
+            )
+            found: dict[int, str] = vault.read_records(
+                record_ids=vault.find_records(field_name=KEY_NAME_EMAIL, value=email)
+            )
+            blind_time: float = time.perf_counter() - start
+            vault.close()
+
+            if sorted(found) != matches:
+                raise ValueError("Blind index lookup does not match the full scan")
+
+            table.add_row(
+                f"{count:,}", "full decrypt", f"{full_time * 1000:,.1f}", f"{count:,}"
+            )
+            table.add_row(
+                f"{count:,}",
+                "blind index",
+                f"{blind_time * 1000:,.1f}",
+                f"{len(found):,}",
+            )
+
+    Console().print(table)
+
+
+def print_rows_one_by_one(console: Console, items_list: list[VaultItem]) -> None:
+    """The table as it was printed before 'app_table': a few prints per row"""
+
+    total_width: int = get_total_width()
+
+    console.print("-" * total_width, style=STYLE_LABEL)
+    console.print("|ID|Name|Email|Mobile|Username|Password|Update|", style=STYLE_LABEL)
+    console.print("-" * total_width, style=STYLE_LABEL)
+
+    for item in items_list:
+        id: str = str(item.record_id).rjust(COLUMN_WIDTH_ID, " ")
+        name: str = item.name.ljust(COLUMN_WIDTH_NAME, " ")
+        email: str = item.email.ljust(COLUMN_WIDTH_EMAIL, " ")
+        mobile: str = item.mobile.ljust(COLUMN_WIDTH_MOBILE, " ")
+        username: str = item.username.ljust(COLUMN_WIDTH_USERNAME, " ")
+        update_time: str = item.update_time[0:10]
+        password: str = MASKED_PASSWORD.ljust(COLUMN_WIDTH_PASSWORD, " ")
+
+        console.print("|", style=STYLE_LABEL, end="")
+        console.print(f"{id}|{name}|{email}|{mobile}|{username}|", end="")
+        console.print(password, style=None, end="")
+        console.print(f"|{update_time}", end="")
+        console.print("|", style=STYLE_LABEL)
+
+    console.print("-" * total_width, style=STYLE_LABEL)
+
+
+def benchmark_render(counts: list[int]) -> None:
+    """Item table rendering: a few prints per row vs one cached renderable"""
+
+    table = Table(title="Table rendering (to an in-memory terminal)")
+
+    table.add_column("Rows", justify="right")
+    table.add_column("Method")
+    table.add_column("Time (ms)", justify="right")
+
+    for count in counts:
+        items_list: list[VaultItem] = []
+        for record_id, data in enumerate(generate_synthetic_items(count=count), start=1):
+            item: VaultItem = VaultItem.from_dict(data=data)
+            item.record_id = record_id
+            items_list.append(item)
+
+        console = Console(
+            width=get_total_width(),
+            file=io.StringIO(),
+            force_terminal=True,
+            color_system="truecolor",
+        )
+
+        start: float = time.perf_counter()
+        print_rows_one_by_one(console=console, items_list=items_list)
+        before_time: float = time.perf_counter() - start
+
+        table_rows = TableRows()
+
+        timings: list[float] = []
+        for _ in range(2):
+            start = time.perf_counter()
+            console.print(
+                table_rows.render(
+                    sections=[[table_rows.get_row(item=item) for item in items_list]]
+                ),
+                soft_wrap=True,
+            )
+            timings.append(time.perf_counter() - start)
+
+        first_time, cached_time = timings
+
+        table.add_row(f"{count:,}", "print per row (before)", f"{before_time * 1000:,.1f}")
+        table.add_row(f"{count:,}", "one renderable", f"{first_time * 1000:,.1f}")
+        table.add_row(
+            f"{count:,}", "one renderable (cached rows)", f"{cached_time * 1000:,.1f}"
+        )
+
+    Console().print(table)
+
+
+BENCHMARKS: dict = {
+    "compression": benchmark_compression,
+    "memory": benchmark_memory,
+    "sort": benchmark_sort,
+    "breach": benchmark_breach,
+    "similarity": benchmark_similarity,
+    "search": benchmark_search,
+    "lookup": benchmark_lookup,
+    "render": benchmark_render,
+}
+
+
+def main() -> None:
+    """The main of program"""
+
+    names: list[str] = list(BENCHMARKS)
+    if len(sys.argv) > 1:
+        names = [sys.argv[1]]
+
+    counts: list[int] = [int(count) for count in sys.argv[2:]] or DEFAULT_COUNTS
+
+    for name in names:
+        BENCHMARKS[name](counts=counts)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except KeyboardInterrupt:
+        print()
+
+    except Exception as error:
+        print(f"[-] {error}!")
+
+    print()
@@ -0,0 +1,951 @@
+"""
+Application CLI (Non-Interactive Commands)
+
+One operation per run, for scripts: results are written to stdout as JSON,
+errors to stderr as JSON ({"error": "..."}), and the exit code tells what
+happened (see 'EXIT_*'). There is no screen clearing and no menu.
+
+The master password is read from the 'DT_MASTER_PASSWORD' environment
+variable, from the first line of stdin ('--password-stdin') or from the
+terminal (prompt).
+
+Usage:
+    python .\\app_cli.py --help
+    python .\\app_cli.py get --email user@mail.com --field password
+    python .\\app_cli.py add --name github.com --username dariusht
+    python .\\app_cli.py set 12 --generate
+    python .\\app_cli.py rm 12
+    python .\\app_cli.py list
+    python .\\app_cli.py search "githb"
+    python .\\app_cli.py export --output vault.json
+    python .\\app_cli.py generate --length 32
+    python .\\app_cli.py batch --input operations.jsonl
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from typing import Tuple
+from pathlib import Path
+from getpass import getpass
+
+from app_constants import *
+from app_item import VaultItem
+from app_item import INDEX_FIELD_NAMES
+from app_item import SECRET_FIELD_NAMES
+from app_vault import BLIND_INDEX_FIELD_NAMES
+from app_vault import VaultItems
+from app_vault import VaultStorage
+from app_vault import VaultFormatError
+from app_vault import VaultDecryptionError
+from app_vault import normalize_blind_value
+from app_storage import detect_storage_class
+from app_backup import BackupStore
+from app_common import DataFileLock
+from app_common import get_now
+from app_common import snapshot_data_file
+from app_common import fix_special_field_value
+from app_search import DEFAULT_SEARCH_LIMIT
+
+from dt_compression import get_codec
+
+from dt_cryptography import generate_password
+from dt_cryptography import validate_password_strength
+
+from dt_password_strength import estimate_password_strength
+
+from dt_breached_passwords import BreachedPasswords
+
+
+EXIT_SUCCESS: int = 0
+EXIT_ERROR: int = 1
+# NOTE: 2 is the exit code of 'argparse' for usage errors
+EXIT_USAGE: int = 2
+EXIT_NOT_FOUND: int = 3
+EXIT_DECRYPTION_FAILED: int = 4
+EXIT_INVALID: int = 5
+EXIT_LOCKED: int = 6
+EXIT_INTERRUPTED: int = 130
+
+MASTER_PASSWORD_VARIABLE: str = "DT_MASTER_PASSWORD"
+
+# NOTE: Options of 'add' and 'set', also the keys of a batch operation
+FIELD_OPTION_NAMES: Tuple[str, ...] = (
+    KEY_NAME_NAME,
+    KEY_NAME_EMAIL,
+    KEY_NAME_MOBILE,
+    KEY_NAME_USERNAME,
+    KEY_NAME_PASSWORD,
+    KEY_NAME_DESCRIPTION,
+)
+
+# NOTE: Fields of the JSON output of an item (the item schema, without the
+# keyed password hash), the record id is 'KEY_NAME_ID'
+OUTPUT_FIELD_NAMES: Tuple[str, ...] = tuple(
+    key for key in INDEX_FIELD_NAMES + SECRET_FIELD_NAMES if key != KEY_NAME_PASSWORD_TAG
+)
+
+
+class CliError(Exception):
+    """Command failed, with the exit code of the failure"""
+
+    def __init__(self, message: str, exit_code: int = EXIT_ERROR) -> None:
+        super().__init__(message)
+
+        self.exit_code: int = exit_code
+
+
+def get_master_password(from_stdin: bool) -> str:
+    """Get the master password (environment variable, stdin or prompt)"""
+
+    password: str | None = os.environ.get(MASTER_PASSWORD_VARIABLE)
+
+    if from_stdin:
+        password = sys.stdin.readline().rstrip("\r\n")
+    elif password is None:
+        password = getpass(prompt="Master Password: ")
+
+    # NOTE: Spaces are removed, like in the application
+    result: str = password.replace(" ", "")
+
+    return result
+
+
+def open_vault(
+    path: Path,
+    password: str,
+    load_records: bool = True,
+) -> Tuple[VaultStorage, VaultItems]:
+    """
+    Unlock the vault (one key derivation) and load its items
+
+    Args:
+        path (Path): Data file path
+        password (str): Master password
+        load_records (bool): False: items stay empty if the backend has a
+        blind index (see 'find_items')
+
+    Returns:
+        tuple: (vault, items)
+    """
+
+    if not path.is_file():
+        raise CliError(f"Data file '{path}' does not exist (run 'app.py' first)!")
+
+    storage_class: type[VaultStorage] | None = detect_storage_class(path=path)
+
+    # NOTE: Old data files are migrated by the application, not here
+    if storage_class is None:
+        raise CliError(f"Data file '{path}' has an old format (run 'app.py' once)!")
+
+    try:
+        vault, records = storage_class.open(
+            path=path,
+            password=password,
+            load_records=load_records,
+            codec=get_codec(name=COMPRESSION_CODEC),
+        )
+    except VaultDecryptionError as error:
+        raise CliError(str(error), exit_code=EXIT_DECRYPTION_FAILED)
+    except VaultFormatError as error:
+        raise CliError(str(error))
+
+    items = VaultItems()
+    items.load(
+        records=records,
+        next_record_id=vault.next_record_id,
+        password_tag_key=vault.password_tag_key,
+    )
+
+    return vault, items
+
+
+def read_items_secrets(vault: VaultStorage, items_list: list[VaultItem]) -> None:
+    """Decrypt the secrets of items (one read for all of them)"""
+
+    secrets: dict[int, dict] = vault.read_secrets(
+        record_ids=[item.record_id for item in items_list if not item.has_secrets],
+    )
+
+    for item in items_list:
+        if item.record_id in secrets:
+            item.set_secrets(secrets=secrets[item.record_id])
+
+
+def backup_data_file(vault: VaultStorage, path: Path) -> None:
+    """Snapshot the data file into the backup store (before a change)"""
+
+    # NOTE: Without a usable backup store, keep a full copy (like the application)
+    try:
+        backup_store: BackupStore | None = BackupStore.open(
+            session=vault.session,
+            path=BACKUP_DIRECTORY_PATH,
+        )
+    except (VaultFormatError, VaultDecryptionError):
+        backup_store = None
+
+    snapshot_data_file(path=path, vault=vault, backup_store=backup_store)
+
+
+def save_items(vault: VaultStorage, items: VaultItems, path: Path) -> None:
+    """Back up the data file, then save the changed items (one save)"""
+
+    if not items.is_dirty:
+        return
+
+    puts, deletes = items.get_changes()
+
+    backup_data_file(vault=vault, path=path)
+
+    vault.save(puts=puts, deletes=deletes)
+
+    items.mark_saved(puts=puts, deletes=deletes)
+
+
+def get_item_output(item: VaultItem) -> dict:
+    """Get the JSON output of an item (secrets included if they are in memory)"""
+
+    result: dict = {KEY_NAME_ID: item.record_id}
+    result.update(item.to_dict(field_names=OUTPUT_FIELD_NAMES))
+
+    return result
+
+
+def open_breached_passwords() -> BreachedPasswords | None:
+    """Open the breached-password corpus (None if it does not exist)"""
+
+    if not BREACHED_PASSWORDS_FILE_PATH.is_file():
+        return None
+
+    result = BreachedPasswords(path=BREACHED_PASSWORDS_FILE_PATH)
+
+    return result
+
+
+def get_password_warnings(
+    items: VaultItems,
+    item: VaultItem,
+    corpus: BreachedPasswords | None,
+) -> list[str]:
+    """
+    Get the warnings of the password of a (touched) item
+
+    Args:
+        corpus (BreachedPasswords): Breached-password corpus, opened once
+        per command (see 'open_breached_passwords'), or None
+    """
+
+    warnings: list[str] = []
+
+    if item.password_score is not None and item.password_score < WEAK_PASSWORD_SCORE:
+        _, _, message = estimate_password_strength(password=item.password)
+        warnings.append(f"Password is weak ({message})!")
+
+    if corpus and corpus.is_breached(password=item.password):
+        warnings.append("Password is found in breached passwords!")
+
+    record_ids: set[int] = items.get_password_reuse(item=item)
+    if record_ids:
+        ids: str = ", ".join(str(record_id) for record_id in sorted(record_ids))
+        warnings.append(f"Password is also used by item ID: {ids}!")
+
+    return warnings
+
+
+def get_field_values(options: dict) -> dict:
+    """
+    Get the field values of 'add' / 'set' options (or a batch operation)
+
+    Args:
+        options (dict): Option name -> value ('FIELD_OPTION_NAMES', 'generate'
+        and 'length'), missing or None if it is not set
+
+    Returns:
+        dict: KEY_NAME_* -> value, of the options that are set
+    """
+
+    for key in FIELD_OPTION_NAMES:
+        if options.get(key) is not None and not isinstance(options[key], str):
+            raise CliError(f"Field '{key}' must be a string!", exit_code=EXIT_INVALID)
+
+    length: int | None = options.get("length")
+    if length is not None and (not isinstance(length, int) or isinstance(length, bool)):
+        raise CliError("Field 'length' must be a number!", exit_code=EXIT_INVALID)
+
+    result: dict = {}
+
+    if options.get(KEY_NAME_NAME) is not None:
+        result[KEY_NAME_NAME] = options[KEY_NAME_NAME].strip()
+
+    # NOTE: Like the application: no spaces, email / mobile / username in lowercase
+    for key in (KEY_NAME_EMAIL, KEY_NAME_MOBILE, KEY_NAME_USERNAME):
+        if options.get(key) is not None:
+            result[key] = fix_special_field_value(value=options[key].lower())
+
+    if options.get(KEY_NAME_PASSWORD) is not None:
+        result[KEY_NAME_PASSWORD] = fix_special_field_value(
+            value=options[KEY_NAME_PASSWORD],
+        )
+    elif options.get("generate"):
+        result[KEY_NAME_PASSWORD] = generate_password(
+            length=options.get("length") or GENERATED_PASSWORD_LENGTH,
+        )
+
+    if options.get(KEY_NAME_DESCRIPTION) is not None:
+        result[KEY_NAME_DESCRIPTION] = options[KEY_NAME_DESCRIPTION].strip()
+
+    return result
+
+
+def validate_field_values(values: dict, is_new: bool) -> None:
+    """Check the field values of a new (or changed) item"""
+
+    if is_new and not values.get(KEY_NAME_NAME):
+        raise CliError("Name is required!", exit_code=EXIT_INVALID)
+
+    if not is_new and not values:
+        raise CliError("Nothing to change!", exit_code=EXIT_INVALID)
+
+    if values.get(KEY_NAME_NAME) == "":
+        raise CliError("Name is required!", exit_code=EXIT_INVALID)
+
+
+def validate_given_password(options: dict, values: dict, allow_weak: bool) -> None:
+    """
+    Check the strength of a given password (generated passwords are strong)
+
+    Args:
+        options (dict): Options of 'add' and 'set' (or a batch operation)
+        values (dict): Field values of the options (see 'get_field_values')
+        allow_weak (bool): Accept given passwords that fail
+        'validate_password_strength'
+    """
+
+    if options.get(KEY_NAME_PASSWORD) is None or allow_weak:
+        return
+
+    is_valid, message = validate_password_strength(password=values[KEY_NAME_PASSWORD])
+    if not is_valid:
+        raise CliError(message, exit_code=EXIT_INVALID)
+
+
+def add_item(items: VaultItems, values: dict) -> VaultItem:
+    """Add a new item (missing fields get the default values)"""
+
+    now: str = get_now()
+
+    item = VaultItem(
+        name=values[KEY_NAME_NAME],
+        email=values.get(KEY_NAME_EMAIL) or DEFAULT_EMAIL,
+        mobile=values.get(KEY_NAME_MOBILE) or DEFAULT_MOBILE,
+        username=values.get(KEY_NAME_USERNAME) or DEFAULT_USERNAME,
+        password=values.get(KEY_NAME_PASSWORD)
+        or generate_password(length=GENERATED_PASSWORD_LENGTH),
+        description=values.get(KEY_NAME_DESCRIPTION, ""),
+        #
+        insert_time=now,
+        update_time=now,
+    )
+
+    items.append(item)
+
+    return item
+
+
+def set_item(
+    vault: VaultStorage,
+    items: VaultItems,
+    record_id: int,
+    values: dict,
+) -> VaultItem:
+    """Change fields of an item (its secrets are decrypted first)"""
+
+    item: VaultItem | None = items.get(record_id=record_id)
+    if not item:
+        raise CliError(f"Item ID: {record_id} not found!", exit_code=EXIT_NOT_FOUND)
+
+    read_items_secrets(vault=vault, items_list=[item])
+
+    for key, value in values.items():
+        setattr(item, key, value)
+    item.update_time = get_now()
+
+    items.touch(item=item)
+
+    return item
+
+
+def find_items(args: argparse.Namespace) -> Tuple[VaultStorage, VaultItems, list[VaultItem]]:
+    """
+    Find the items of 'get' by id or by the exact value of a field
+
+    A backend with a blind index decrypts the matching records only,
+    others decrypt the index tier of all records.
+
+    Returns:
+        tuple: (vault, items, found items with their secrets)
+    """
+
+    field_name: str | None = None
+    value: str = ""
+    for key in BLIND_INDEX_FIELD_NAMES:
+        if getattr(args, key) is not None:
+            field_name, value = key, getattr(args, key)
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+
+    vault, items = open_vault(path=args.data, password=password, load_records=False)
+
+    # NOTE: Nothing loaded: only the matching records are read
+    if not items and vault.has_blind_index:
+        record_ids: list[int] = [args.id]
+        if field_name:
+            record_ids = vault.find_records(field_name=field_name, value=value)
+
+        records: dict[int, str] = vault.read_records(record_ids=record_ids)
+
+        items.load(
+            records=records,
+            next_record_id=vault.next_record_id,
+            password_tag_key=vault.password_tag_key,
+        )
+
+    found_items: list[VaultItem] = [items.get(record_id=args.id)]
+    if field_name:
+        normalized: str = normalize_blind_value(field_name=field_name, value=value)
+
+        found_items = [
+            item
+            for item in items.get_sorted()
+            if getattr(item, field_name) is not None
+            and normalize_blind_value(
+                field_name=field_name,
+                value=getattr(item, field_name),
+            )
+            == normalized
+        ]
+
+    found_items = [item for item in found_items if item is not None]
+    if not found_items:
+        raise CliError("Item not found!", exit_code=EXIT_NOT_FOUND)
+
+    read_items_secrets(vault=vault, items_list=found_items)
+
+    return vault, items, found_items
+
+
+def command_get(args: argparse.Namespace) -> list[dict] | list[str]:
+    """Get items (with their secrets) by id or by the exact value of a field"""
+
+    vault, _, found_items = find_items(args=args)
+    vault.close()
+
+    result: list[dict] | list[str]
+    if args.field:
+        result = [
+            str(get_item_output(item=item).get(args.field, ""))
+            for item in found_items
+        ]
+    else:
+        result = [get_item_output(item=item) for item in found_items]
+
+    return result
+
+
+def command_add(args: argparse.Namespace) -> dict:
+    """Add a new item (missing fields get the default values)"""
+
+    values: dict = get_field_values(options=vars(args))
+    validate_field_values(values=values, is_new=True)
+    validate_given_password(options=vars(args), values=values, allow_weak=args.allow_weak)
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    item: VaultItem = add_item(items=items, values=values)
+
+    # NOTE: Before saving, it drops the secrets from memory
+    result: dict = get_item_output(item=item)
+    corpus: BreachedPasswords | None = open_breached_passwords()
+    try:
+        result["warnings"] = get_password_warnings(items=items, item=item, corpus=corpus)
+    finally:
+        if corpus:
+            corpus.close()
+
+    save_items(vault=vault, items=items, path=args.data)
+    vault.close()
+
+    return result
+
+
+def command_set(args: argparse.Namespace) -> dict:
+    """Change fields of an item"""
+
+    values: dict = get_field_values(options=vars(args))
+    validate_field_values(values=values, is_new=False)
+    validate_given_password(options=vars(args), values=values, allow_weak=args.allow_weak)
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    try:
+        item: VaultItem = set_item(
+            vault=vault,
+            items=items,
+            values=values,
+            record_id=args.id,
+        )
+    except CliError:
+        vault.close()
+        raise
+
+    result: dict = get_item_output(item=item)
+    corpus: BreachedPasswords | None = open_breached_passwords()
+    try:
+        result["warnings"] = get_password_warnings(items=items, item=item, corpus=corpus)
+    finally:
+        if corpus:
+            corpus.close()
+
+    save_items(vault=vault, items=items, path=args.data)
+    vault.close()
+
+    return result
+
+
+def command_rm(args: argparse.Namespace) -> dict:
+    """Delete items (all of them or none)"""
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    missing: list[int] = [record_id for record_id in args.ids if record_id not in items]
+    if missing:
+        vault.close()
+        ids: str = ", ".join(str(record_id) for record_id in missing)
+        raise CliError(f"Item ID: {ids} not found!", exit_code=EXIT_NOT_FOUND)
+
+    for record_id in dict.fromkeys(args.ids):
+        items.remove(record_id=record_id)
+
+    save_items(vault=vault, items=items, path=args.data)
+    vault.close()
+
+    result: dict = {"deleted": list(dict.fromkeys(args.ids))}
+
+    return result
+
+
+def command_list(args: argparse.Namespace) -> list[dict]:
+    """List items in display order (without secrets)"""
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+    vault.close()
+
+    result: list[dict] = [get_item_output(item=item) for item in items.get_sorted()]
+
+    return result
+
+
+def command_search(args: argparse.Namespace) -> list[dict]:
+    """Search items by name, email and username, or in descriptions"""
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    found_items: list[VaultItem]
+    if args.descriptions:
+        # NOTE: Descriptions are decrypted once, to build the index
+        secrets: dict[int, dict] = vault.read_secrets(
+            record_ids=[item.record_id for item in items],
+        )
+
+        items.load_description_index(
+            descriptions={
+                record_id: item_secrets.get(KEY_NAME_DESCRIPTION) or ""
+                for record_id, item_secrets in secrets.items()
+            },
+        )
+
+        found_items = items.search_descriptions(query=args.query, limit=args.limit)
+    else:
+        found_items = items.search(query=args.query, limit=args.limit)
+
+    vault.close()
+
+    if not found_items:
+        raise CliError("Items not found!", exit_code=EXIT_NOT_FOUND)
+
+    result: list[dict] = [get_item_output(item=item) for item in found_items]
+
+    return result
+
+
+def command_export(args: argparse.Namespace) -> list[dict] | dict:
+    """Export all items with their secrets (to stdout or a file)"""
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    sorted_items: list[VaultItem] = items.get_sorted()
+    read_items_secrets(vault=vault, items_list=sorted_items)
+    vault.close()
+
+    exported: list[dict] = [get_item_output(item=item) for item in sorted_items]
+
+    if not args.output:
+        return exported
+
+    # NOTE: Plain secrets, readable by the owner only
+    descriptor: int = os.open(
+        args.output,
+        os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+        0o600,
+    )
+
+    # NOTE: The mode is only set for a new file, an existing one keeps its
+    # own (it is emptied by 'O_TRUNC' first, nothing is written before this)
+    if os.name != "nt":
+        os.fchmod(descriptor, 0o600)
+
+    with open(file=descriptor, mode="wt", encoding="utf-8") as file:
+        json.dump(obj=exported, fp=file, ensure_ascii=False, indent=2)
+
+    result: dict = {"exported": len(exported), "output": str(args.output)}
+
+    return result
+
+
+def command_generate(args: argparse.Namespace) -> list[str]:
+    """Generate passwords (the vault is not opened)"""
+
+    result: list[str] = [generate_password(length=args.length) for _ in range(args.count)]
+
+    return result
+
+
+def apply_operation(
+    vault: VaultStorage,
+    items: VaultItems,
+    operation: dict,
+    allow_weak: bool,
+    corpus: BreachedPasswords | None = None,
+) -> dict:
+    """
+    Apply one batch operation to the items (in memory, not saved)
+
+    Args:
+        operation (dict): {"op": "add", <fields>}, {"op": "set", "id": ID,
+        <fields>} or {"op": "rm", "id": ID}, fields like the options of
+        'add' and 'set' ('generate' and 'length' too)
+        allow_weak (bool): Accept given passwords that fail
+        'validate_password_strength'
+        corpus (BreachedPasswords): Breached-password corpus of the batch,
+        or None
+
+    Returns:
+        dict: Result of the operation (the item, or the deleted id)
+    """
+
+    if not isinstance(operation, dict):
+        raise CliError("Operation must be a JSON object!", exit_code=EXIT_INVALID)
+
+    op: str | None = operation.get("op")
+
+    record_id: int | None = operation.get("id")
+    # NOTE: JSON 'true' is a bool, and a bool is an int (item 1) in Python
+    if op in ("set", "rm") and (
+        isinstance(record_id, bool) or not isinstance(record_id, int) or record_id < 1
+    ):
+        raise CliError("Operation needs an item 'id'!", exit_code=EXIT_INVALID)
+
+    if op == "rm":
+        if record_id not in items:
+            raise CliError(f"Item ID: {record_id} not found!", exit_code=EXIT_NOT_FOUND)
+
+        items.remove(record_id=record_id)
+
+        result: dict = {"op": op, KEY_NAME_ID: record_id}
+        return result
+
+    if op not in ("add", "set"):
+        raise CliError(f"Unknown operation '{op}'!", exit_code=EXIT_INVALID)
+
+    values: dict = get_field_values(options=operation)
+    validate_field_values(values=values, is_new=op == "add")
+    validate_given_password(options=operation, values=values, allow_weak=allow_weak)
+
+    item: VaultItem
+    if op == "add":
+        item = add_item(items=items, values=values)
+    else:
+        item = set_item(vault=vault, items=items, values=values, record_id=record_id)
+
+    result = {
+        "op": op,
+        "item": get_item_output(item=item),
+        "warnings": get_password_warnings(items=items, item=item, corpus=corpus),
+    }
+
+    return result
+
+
+def command_batch(args: argparse.Namespace) -> dict:
+    """
+    Apply a stream of operations (JSON Lines) with one unlock and one save
+
+    A result line is written for every operation as soon as it is applied.
+    The operations are one transaction: if one of them fails, nothing is
+    saved (unless '--keep-going', then only the failed ones are skipped).
+
+    Returns:
+        dict: Summary (applied, failed, saved)
+    """
+
+    password: str = get_master_password(from_stdin=args.password_stdin)
+    vault, items = open_vault(path=args.data, password=password)
+
+    applied: int = 0
+    failed: int = 0
+
+    # NOTE: Opened (and mapped) once for all operations
+    corpus: BreachedPasswords | None = None
+
+    file = sys.stdin
+    if args.input:
+        file = open(file=args.input, mode="rt", encoding="utf-8")
+
+    try:
+        corpus = open_breached_passwords()
+
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+
+            output: dict = {"line": line_number}
+
+            try:
+                operation_result: dict = apply_operation(
+                    vault=vault,
+                    items=items,
+                    corpus=corpus,
+                    allow_weak=args.allow_weak,
+                    operation=json.loads(s=line),
+                )
+
+                output.update(ok=True, **operation_result)
+                applied += 1
+
+            # NOTE: Also invalid JSON (json.JSONDecodeError)
+            except (CliError, ValueError) as error:
+                output.update(ok=False, error=str(error))
+                failed += 1
+
+            print(json.dumps(obj=output, ensure_ascii=False), flush=True)
+
+        saved: bool = False
+        if not failed or args.keep_going:
+            saved = items.is_dirty
+            save_items(vault=vault, items=items, path=args.data)
+
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+        if corpus:
+            corpus.close()
+
+        vault.close()
+
+    result: dict = {"applied": applied, "failed": failed, "saved": saved}
+
+    return result
+
+
+def get_positive_int(value: str) -> int:
+    """Parse a command line option that must be a positive integer"""
+
+    try:
+        result: int = int(value)
+    except ValueError:
+        result = 0
+
+    if result < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a positive integer!")
+
+    return result
+
+
+def add_field_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the item field options of 'add' and 'set'"""
+
+    parser.add_argument("--name", help="URL / Application / Device")
+    parser.add_argument("--email")
+    parser.add_argument("--mobile")
+    parser.add_argument("--username")
+    parser.add_argument("--description")
+
+    password_group = parser.add_mutually_exclusive_group()
+    password_group.add_argument("--password")
+    password_group.add_argument(
+        "--generate",
+        action="store_true",
+        help="Generate a new password",
+    )
+
+    parser.add_argument("--length", type=int, default=GENERATED_PASSWORD_LENGTH)
+    parser.add_argument(
+        "--allow-weak",
+        action="store_true",
+        help="Accept a password that fails the strength validation",
+    )
+
+
+def get_parser() -> argparse.ArgumentParser:
+    """Get the command line parser"""
+
+    parser = argparse.ArgumentParser(
+        prog="app_cli.py",
+        description="DT Password Manager, non-interactive commands (JSON output).",
+        epilog=(
+            f"The master password is read from '{MASTER_PASSWORD_VARIABLE}', "
+            "stdin ('--password-stdin') or a prompt. Exit codes: 0 success, "
+            "1 error, 2 usage, 3 not found, 4 wrong password, 5 invalid input, "
+            "6 data file in use."
+        ),
+    )
+
+    parser.add_argument("--data", type=Path, default=DATA_FILE_PATH, help="Data file")
+    parser.add_argument(
+        "--password-stdin",
+        action="store_true",
+        help="Read the master password from the first line of stdin",
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    get_parser = commands.add_parser("get", help="Get items by id or field value")
+    get_parser.set_defaults(function=command_get)
+    lookup_group = get_parser.add_mutually_exclusive_group(required=True)
+    lookup_group.add_argument("id", type=int, nargs="?")
+    for key in BLIND_INDEX_FIELD_NAMES:
+        lookup_group.add_argument(f"--{key}", help="Exact value (normalized)")
+    get_parser.add_argument(
+        "--field",
+        choices=(KEY_NAME_ID, *OUTPUT_FIELD_NAMES),
+        help="Write only this field of every item, one per line",
+    )
+
+    add_parser = commands.add_parser("add", help="Add an item")
+    add_parser.set_defaults(function=command_add)
+    add_field_arguments(parser=add_parser)
+
+    set_parser = commands.add_parser("set", help="Change fields of an item")
+    set_parser.set_defaults(function=command_set)
+    set_parser.add_argument("id", type=int)
+    add_field_arguments(parser=set_parser)
+
+    rm_parser = commands.add_parser("rm", help="Delete items")
+    rm_parser.set_defaults(function=command_rm)
+    rm_parser.add_argument("ids", type=int, nargs="+", metavar="id")
+
+    list_parser = commands.add_parser("list", help="List items (without secrets)")
+    list_parser.set_defaults(function=command_list)
+
+    search_parser = commands.add_parser("search", help="Search items")
+    search_parser.set_defaults(function=command_search)
+    search_parser.add_argument("query")
+    search_parser.add_argument("--descriptions", action="store_true")
+    search_parser.add_argument(
+        "--limit",
+        type=get_positive_int,
+        default=DEFAULT_SEARCH_LIMIT,
+    )
+
+    export_parser = commands.add_parser("export", help="Export items with secrets")
+    export_parser.set_defaults(function=command_export)
+    export_parser.add_argument("--output", type=Path, help="JSON file (mode 0600)")
+
+    generate_parser = commands.add_parser("generate", help="Generate passwords")
+    generate_parser.set_defaults(function=command_generate)
+    generate_parser.add_argument("--length", type=int, default=GENERATED_PASSWORD_LENGTH)
+    generate_parser.add_argument("--count", type=int, default=1)
+
+    batch_parser = commands.add_parser(
+        "batch",
+        help="Apply operations (JSON Lines) with one unlock and one save",
+        description=(
+            'One operation per line: {"op": "add", "name": ...}, '
+            '{"op": "set", "id": ID, ...} or {"op": "rm", "id": ID}. Fields '
+            "are the options of 'add' and 'set' (and 'generate', 'length')."
+        ),
+    )
+    batch_parser.set_defaults(function=command_batch)
+    batch_parser.add_argument("--input", type=Path, help="JSON Lines file (or stdin)")
+    batch_parser.add_argument(
+        "--keep-going",
+        action="store_true",
+        help="Save the operations that did not fail (else nothing is saved)",
+    )
+    batch_parser.add_argument(
+        "--allow-weak",
+        action="store_true",
+        help="Accept passwords that fail the strength validation",
+    )
+
+    return parser
+
+
+def main() -> int:
+    """The main of program"""
+
+    args: argparse.Namespace = get_parser().parse_args()
+
+    try:
+        # NOTE: One command is one unlock-to-save cycle, under the lock
+        # (the application holds it while it runs)
+        if args.command == "generate":
+            result = args.function(args=args)
+        else:
+            with DataFileLock(path=args.data):
+                result = args.function(args=args)
+
+    except TimeoutError as error:
+        print(json.dumps(obj={"error": str(error)}), file=sys.stderr)
+        return EXIT_LOCKED
+
+    except CliError as error:
+        print(json.dumps(obj={"error": str(error)}), file=sys.stderr)
+        return error.exit_code
+
+    except ValueError as error:
+        print(json.dumps(obj={"error": str(error)}), file=sys.stderr)
+        return EXIT_INVALID
+
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+
+    except Exception as error:
+        print(json.dumps(obj={"error": str(error)}), file=sys.stderr)
+        return EXIT_ERROR
+
+    if args.command == "get" and args.field:
+        print("\n".join(result))
+    elif args.command == "batch":
+        print(json.dumps(obj=result))
+    else:
+        print(json.dumps(obj=result, ensure_ascii=False, indent=2))
+
+    # NOTE: A batch with failed operations fails (even if the rest is saved)
+    if args.command == "batch" and result["failed"]:
+        return EXIT_INVALID
+
+    return EXIT_SUCCESS
+
+
+if __name__ == "__main__":
+    sys.exit(main())
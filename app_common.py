@@ -0,0 +1,198 @@
+"""
+Application Common
+
+Helpers of both the application ('app') and the CLI ('app_cli'): field
+values, times, the lock of the data file and the backup that is taken
+before a data file changes.
+"""
+
+import os
+import time
+import shutil
+
+from typing import BinaryIO
+from pathlib import Path
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+from app_constants import *
+from app_vault import VaultStorage
+from app_backup import BackupStore
+
+
+# NOTE: How long to wait for another process (the application or a CLI
+# command) to release the data file
+DATA_FILE_LOCK_TIMEOUT: float = 10.0
+DATA_FILE_LOCK_INTERVAL: float = 0.1
+
+
+def get_now(format: str = DATE_TIME_FORMAT) -> str:
+    """Get now"""
+
+    now: str = time.strftime(format)
+
+    return now
+
+
+def fix_special_field_value(value: str) -> str:
+    """Fix special field value"""
+
+    value = value.replace(" ", "")
+
+    return value
+
+
+class DataFileLock:
+    """
+    Exclusive advisory lock of a data file, held from unlock to the last
+    save, so two processes never append to (or rewrite) the same file
+
+    The lock is taken on '<data file>.lock', not on the data file itself,
+    because compaction and migration replace the data file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.data_path: Path = path
+        self.path: Path = path.with_name(f"{path.name}.lock")
+        self.file: BinaryIO | None = None
+
+    def try_lock(self) -> bool:
+        """Take the lock if it is free (without waiting)"""
+
+        try:
+            if os.name == "nt":
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+
+        return True
+
+    def acquire(self, timeout: float = DATA_FILE_LOCK_TIMEOUT) -> None:
+        """
+        Take the lock, wait for another process to release it
+
+        Raises:
+            TimeoutError: If the lock is not released in time
+        """
+
+        if self.file:
+            return
+
+        self.file = open(file=self.path, mode="a+b")
+
+        deadline: float = time.monotonic() + timeout
+        while not self.try_lock():
+            if time.monotonic() >= deadline:
+                self.file.close()
+                self.file = None
+
+                message: str = f"Data file '{self.data_path}' is in use by another process!"
+                raise TimeoutError(message)
+
+            time.sleep(DATA_FILE_LOCK_INTERVAL)
+
+    def release(self) -> None:
+        """Release the lock (closing the file releases it)"""
+
+        if not self.file:
+            return
+
+        if os.name == "nt":
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+
+        self.file.close()
+        self.file = None
+
+    def __enter__(self) -> "DataFileLock":
+        self.acquire()
+
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.release()
+
+
+def get_backup_file_path(path: Path, name: str) -> Path:
+    """
+    Get the path of a full-copy backup file (data_YYYY_MM_DD_HH_MM_SS.bin)
+    that does not exist yet, a counter is added for copies of the same second
+    """
+
+    result: Path = path.with_name(f"{path.stem}_{name}{path.suffix}")
+
+    counter: int = 1
+    while result.exists():
+        counter += 1
+        result = path.with_name(f"{path.stem}_{name}-{counter}{path.suffix}")
+
+    return result
+
+
+def prune_backups(backup_store: BackupStore) -> None:
+    """Apply the retention policy and delete chunks no backup uses"""
+
+    deleted_names: list[str] = backup_store.apply_retention(
+        time_format=BACKUP_FILE_FORMAT,
+        keep_last=BACKUP_KEEP_LAST,
+        keep_daily=BACKUP_KEEP_DAILY,
+        keep_weekly=BACKUP_KEEP_WEEKLY,
+        keep_monthly=BACKUP_KEEP_MONTHLY,
+    )
+
+    if deleted_names:
+        backup_store.collect_garbage()
+
+
+def snapshot_data_file(
+    path: Path,
+    vault: VaultStorage | None,
+    backup_store: BackupStore | None,
+) -> None:
+    """
+    Snapshot the data file into the backup store (and apply the retention
+    policy), or keep a full copy beside it without a backup store
+
+    Args:
+        path (Path): Data file path
+        vault (VaultStorage): The open vault of the data file, or None
+        backup_store (BackupStore): Backup store, or None
+    """
+
+    now: str = get_now(format=BACKUP_FILE_FORMAT)
+
+    if not backup_store:
+        backup_file_path: Path = get_backup_file_path(path=path, name=now)
+
+        if vault:
+            vault.backup(target_path=backup_file_path)
+        else:
+            shutil.copy2(src=path, dst=backup_file_path)
+
+        return
+
+    data: bytes
+
+    # NOTE: An open vault makes a consistent snapshot (e.g. SQLite WAL)
+    if vault:
+        temp_path: Path = path.with_name(f"{path.name}.backup")
+
+        vault.backup(target_path=temp_path)
+        data = temp_path.read_bytes()
+        temp_path.unlink()
+    else:
+        data = path.read_bytes()
+
+    backup_store.add_snapshot(name=backup_store.get_free_name(name=now), data=data)
+
+    prune_backups(backup_store=backup_store)
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
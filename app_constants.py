@@ -12,12 +12,43 @@ DEFAULT_USERNAME: str = "dariusht"
 GENERATED_PASSWORD_LENGTH: int = 24
 
 DATA_FILE_PATH: Path = Path("./data.bin")
+
+# NOTE: 'none', 'zlib', 'lzma', 'bz2' or 'zstd' (if 'zstandard' is installed)
+COMPRESSION_CODEC: str = "zlib"
+
+# NOTE: 'log' (append-only file) or 'sqlite' (one encrypted row per item),
+# an existing data file is converted on unlock
+STORAGE_BACKEND: str = "log"
+
+# NOTE: Deduplicated, encrypted backups of the data file and how many of
+# them are kept (newest ones, then the newest one per day, week and month)
+BACKUP_DIRECTORY_PATH: Path = Path("./backups")
+BACKUP_KEEP_LAST: int = 10
+BACKUP_KEEP_DAILY: int = 7
+BACKUP_KEEP_WEEKLY: int = 4
+BACKUP_KEEP_MONTHLY: int = 12
+
+# NOTE: Item passwords with a strength score (0 - 4) below this are weak
+WEAK_PASSWORD_SCORE: int = 3
+
+# NOTE: The master password also needs this strength score (0 - 4)
+MASTER_PASSWORD_SCORE: int = 4
+
+# NOTE: Offline breached-password corpus (see 'build_breached_passwords.py'),
+# passwords are not checked if the file does not exist
+BREACHED_PASSWORDS_FILE_PATH: Path = Path("./breached_passwords.bin")
+# NOTE: Worker processes for checking all items (None: CPU count)
+BREACHED_PASSWORDS_WORKERS: int | None = None
+
+# NOTE: Run on the alternate screen of the terminal and repaint only the
+# changed lines (see 'app_screen'), False: print and scroll as usual
+FULL_SCREEN_MODE: bool = True
 # End: You can change these values
 
 DATE_TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
 BACKUP_FILE_FORMAT: str = "%Y_%m_%d_%H_%M_%S"
 
-COLUMN_WIDTH_ID: int = 3
+COLUMN_WIDTH_ID: int = 5
 COLUMN_WIDTH_NAME: int = 40
 COLUMN_WIDTH_EMAIL: int = 32
 COLUMN_WIDTH_MOBILE: int = 11
@@ -25,6 +56,10 @@ COLUMN_WIDTH_PASSWORD: int = 32
 COLUMN_WIDTH_USERNAME: int = 20
 COLUMN_WIDTH_UPDATE_TIME: int = 10
 
+# NOTE: Screen lines of a list page that are not item rows (table header,
+# footer, page line and prompt)
+TABLE_PAGE_CHROME_LINES: int = 7
+
 KEY_NAME_ID: str = "id"
 LABEL_ID: str = KEY_NAME_ID.upper()
 
@@ -52,9 +87,16 @@ LABEL_INSERT_TIME: str = KEY_NAME_INSERT_TIME.replace("_", " ").title()
 KEY_NAME_UPDATE_TIME: str = "update_time"
 LABEL_UPDATE_TIME: str = KEY_NAME_UPDATE_TIME.replace("_", " ").title()
 
+# NOTE: Keyed hash of the password (for reuse detection, never displayed)
+KEY_NAME_PASSWORD_TAG: str = "password_tag"
+
+# NOTE: Cached strength score (0 - 4) of the password (never displayed)
+KEY_NAME_PASSWORD_SCORE: str = "password_score"
+
 MESSAGE_NOT_SET: str = "[NOT SET]"
 
 STYLE_MESSAGE_ERROR = Style(color="red", blink=False, bold=True)
+STYLE_MESSAGE_WARNING = Style(color="yellow", blink=False, bold=True)
 STYLE_MESSAGE_WAITING = Style(color="cyan", blink=False, bold=True)
 STYLE_MESSAGE_SUCCESS = Style(color="green", blink=False, bold=True)
 
@@ -0,0 +1,156 @@
+"""
+Application Item
+"""
+
+from typing import Tuple
+
+from app_constants import KEY_NAME_NAME
+from app_constants import KEY_NAME_EMAIL
+from app_constants import KEY_NAME_MOBILE
+from app_constants import KEY_NAME_USERNAME
+from app_constants import KEY_NAME_PASSWORD
+from app_constants import KEY_NAME_DESCRIPTION
+from app_constants import KEY_NAME_INSERT_TIME
+from app_constants import KEY_NAME_UPDATE_TIME
+from app_constants import KEY_NAME_PASSWORD_TAG
+from app_constants import KEY_NAME_PASSWORD_SCORE
+
+
+# NOTE: Stored fields (JSON keys of the vault schema, in schema order)
+INDEX_FIELD_NAMES: Tuple[str, ...] = (
+    KEY_NAME_NAME,
+    KEY_NAME_EMAIL,
+    KEY_NAME_MOBILE,
+    KEY_NAME_USERNAME,
+    KEY_NAME_INSERT_TIME,
+    KEY_NAME_UPDATE_TIME,
+    KEY_NAME_PASSWORD_TAG,
+    KEY_NAME_PASSWORD_SCORE,
+)
+
+# NOTE: Fields that are only decrypted when they are needed
+SECRET_FIELD_NAMES: Tuple[str, ...] = (KEY_NAME_PASSWORD, KEY_NAME_DESCRIPTION)
+
+
+class VaultItem:
+    """
+    One vault item
+
+    A compact record: fields live in '__slots__' (no per-item dictionary)
+    and are named like the JSON keys of the vault schema ('KEY_NAME_*'), so
+    'getattr(item, KEY_NAME_EMAIL)' works too. A field that is not set is
+    None, secrets (password, description) are None while they are not
+    decrypted.
+
+    'record_id' is the stable (never reused) identity of the item in the
+    vault file, it is shown as the item ID and never serialized in JSON.
+    'sort_key' is the cached display order key (see 'get_sort_key') and
+    'version' is the generation of the items at its last change, so cached
+    views of the item (like its list row) know when they are stale.
+    'password_tag' is a keyed hash of the password and 'password_score' is
+    its strength score, both are kept in the index tier, so password reuse
+    and weak passwords are found without decrypting any secret.
+    """
+
+    __slots__ = (
+        "record_id",
+        "sort_key",
+        "version",
+        "name",
+        "email",
+        "mobile",
+        "username",
+        "password",
+        "description",
+        "insert_time",
+        "update_time",
+        "password_tag",
+        "password_score",
+    )
+
+    def __init__(
+        self,
+        name: str | None = None,
+        email: str | None = None,
+        mobile: str | None = None,
+        username: str | None = None,
+        password: str | None = None,
+        description: str | None = None,
+        insert_time: str | None = None,
+        update_time: str | None = None,
+        password_tag: str | None = None,
+        password_score: int | None = None,
+    ) -> None:
+        self.record_id: int = 0
+        self.sort_key: Tuple[str, int] | None = None
+        self.version: int = 0
+
+        self.name: str | None = name
+        self.email: str | None = email
+        self.mobile: str | None = mobile
+        self.username: str | None = username
+        self.password: str | None = password
+        self.description: str | None = description
+        self.insert_time: str | None = insert_time
+        self.update_time: str | None = update_time
+        self.password_tag: str | None = password_tag
+        self.password_score: int | None = password_score
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VaultItem":
+        """Create an item from (a tier of) the JSON schema, unknown keys are ignored"""
+
+        item = cls()
+
+        for key in INDEX_FIELD_NAMES + SECRET_FIELD_NAMES:
+            if key in data:
+                setattr(item, key, data[key])
+
+        return item
+
+    def to_dict(self, field_names: Tuple[str, ...]) -> dict:
+        """Get the set fields of field names as a JSON schema dictionary"""
+
+        result: dict = {}
+
+        for key in field_names:
+            value: str | int | None = getattr(self, key)
+            if value is not None:
+                result[key] = value
+
+        return result
+
+    @property
+    def has_secrets(self) -> bool:
+        """Check if the secrets of the item are in memory"""
+
+        result: bool = self.password is not None and self.description is not None
+
+        return result
+
+    def get_secrets(self) -> dict:
+        """Get the secrets tier of the item"""
+
+        result: dict = self.to_dict(field_names=SECRET_FIELD_NAMES)
+
+        return result
+
+    def set_secrets(self, secrets: dict) -> None:
+        """Set (decrypted) secrets, or drop them from memory with an empty dict"""
+
+        self.password = secrets.get(KEY_NAME_PASSWORD)
+        self.description = secrets.get(KEY_NAME_DESCRIPTION)
+
+    def get_sort_key(self) -> Tuple[str, int]:
+        """Get display order key: casefolded name, then record id (unique)"""
+
+        result = (self.name or "").casefold(), self.record_id
+
+        return result
+
+    def __repr__(self) -> str:
+        return f"VaultItem(record_id={self.record_id}, name={self.name!r})"
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
@@ -0,0 +1,178 @@
+"""
+Application Screen (Full-Screen Mode)
+
+The application runs on the alternate screen buffer of the terminal, like
+a full-screen program. Everything that is printed (by rich or 'print') is
+written to one frame buffer instead of the terminal, and the frame is only
+painted when the application waits for input: lines that did not change
+since the last paint are not written again, the others are rewritten in
+place (ANSI cursor moves), so a redraw costs the changed lines only and no
+'cls' / 'clear' subprocess.
+
+NOTE: rich 'Live' repaints a renderable while the program runs, it can not
+host 'input()' prompts, so the frame is diffed here, line by line.
+"""
+
+import io
+import re
+import os
+import sys
+
+from typing import TextIO
+
+from rich.cells import cell_len
+
+
+ENTER_ALTERNATE_SCREEN: str = "\x1b[?1049h"
+LEAVE_ALTERNATE_SCREEN: str = "\x1b[?1049l"
+
+# NOTE: Home, and erase to the end of the line / screen
+CURSOR_HOME: str = "\x1b[H"
+ERASE_LINE_END: str = "\x1b[K"
+ERASE_SCREEN_END: str = "\x1b[J"
+
+# NOTE: SGR (colors), other CSI sequences and OSC 8 (links) take no cells
+_ESCAPE_SEQUENCE: re.Pattern = re.compile(
+    r"\x1b\[[0-9;?]*[A-Za-z]|\x1b\][^\x1b\x07]*(?:\x07|\x1b\\)"
+)
+
+
+def get_line_rows(line: str, width: int) -> int:
+    """Get the number of screen rows of a (wrapped) line"""
+
+    cells: int = cell_len(_ESCAPE_SEQUENCE.sub("", line))
+
+    result: int = max(-(-cells // max(width, 1)), 1)
+
+    return result
+
+
+class Screen:
+    """
+    Full-screen frame buffer, a file-like object for 'sys.stdout'
+
+    'clear' starts a new frame, 'write' adds to it, 'refresh' paints it (a
+    prompt is the end of the last line, the cursor is left after it) and
+    'echo' adds what the terminal echoed of the typed input. A frame taller
+    than the terminal is painted from scratch (and scrolls).
+    """
+
+    def __init__(self, file: TextIO) -> None:
+        self.file: TextIO = file
+        self.buffer: io.StringIO = io.StringIO()
+
+        # NOTE: Painted (row, line) pairs, None while the screen is unknown
+        self.painted: list[tuple[int, str]] | None = None
+        self.painted_size: os.terminal_size | None = None
+
+        # NOTE: Length of the buffer at the last paint (or echo)
+        self.painted_length: int = 0
+
+    # NOTE: File-like interface (for rich and 'print')
+    @property
+    def encoding(self) -> str:
+        return self.file.encoding
+
+    @property
+    def errors(self) -> str | None:
+        return self.file.errors
+
+    def isatty(self) -> bool:
+        return self.file.isatty()
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def write(self, text: str) -> int:
+        result: int = self.buffer.write(text)
+
+        return result
+
+    def flush(self) -> None:
+        """Nothing to flush, frames are painted by 'refresh'"""
+
+    def open(self) -> None:
+        """Switch to the alternate screen and redirect 'sys.stdout' here"""
+
+        self.file.write(f"{ENTER_ALTERNATE_SCREEN}{CURSOR_HOME}{ERASE_SCREEN_END}")
+        self.file.flush()
+
+        self.painted = []
+        sys.stdout = self
+
+    def close(self) -> None:
+        """
+        Switch back to the normal screen and restore 'sys.stdout', what was
+        printed after the last paint (like the last message) is kept on it
+        """
+
+        sys.stdout = self.file
+
+        self.file.write(LEAVE_ALTERNATE_SCREEN)
+        self.file.write(self.buffer.getvalue()[self.painted_length :])
+        self.file.flush()
+
+    def clear(self) -> None:
+        """Start a new frame (painted by the next 'refresh')"""
+
+        self.buffer = io.StringIO()
+        self.painted_length = 0
+
+    def echo(self, text: str) -> None:
+        """Add text that the terminal has already shown (typed input)"""
+
+        self.buffer.write(text)
+        self.painted_length = self.buffer.tell()
+
+        # NOTE: The line of the prompt changed on the screen too
+        if self.painted:
+            self.painted.pop()
+
+    def refresh(self) -> None:
+        """Paint the frame, only the lines that changed"""
+
+        size: os.terminal_size = os.get_terminal_size(self.file.fileno())
+
+        text: str = self.buffer.getvalue()
+        self.painted_length = len(text)
+
+        lines: list[str] = text.split("\n")
+
+        rows: list[tuple[int, str]] = []
+        row: int = 0
+        for line in lines:
+            rows.append((row, line))
+            row += get_line_rows(line=line, width=size.columns)
+
+        output: list[str] = []
+
+        # NOTE: A resized terminal or a frame that scrolls is painted whole
+        if size != self.painted_size or self.painted is None or row > size.lines:
+            output.append(f"{CURSOR_HOME}{ERASE_SCREEN_END}{text}")
+
+            self.painted = rows if row <= size.lines else None
+            self.painted_size = size
+
+            self.file.write("".join(output))
+            self.file.flush()
+            return
+
+        painted: set[tuple[int, str]] = set(self.painted)
+
+        # NOTE: The last line (the prompt) is always written last, so the
+        # cursor is left after it
+        for row, line in rows[:-1]:
+            if (row, line) not in painted:
+                output.append(f"\x1b[{row + 1};1H{line}{ERASE_LINE_END}")
+
+        last_row, last_line = rows[-1]
+        output.append(f"\x1b[{last_row + 1};1H{last_line}{ERASE_SCREEN_END}")
+
+        self.painted = rows
+
+        self.file.write("".join(output))
+        self.file.flush()
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
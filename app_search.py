@@ -0,0 +1,505 @@
+"""
+Application Search
+"""
+
+import re
+import math
+import heapq
+import bisect
+
+from typing import Tuple
+from typing import Iterable
+from collections import Counter
+
+from app_constants import KEY_NAME_NAME
+from app_constants import KEY_NAME_EMAIL
+from app_constants import KEY_NAME_USERNAME
+
+from app_item import VaultItem
+
+
+# NOTE: Index tier fields that are searched (secrets are never indexed)
+SEARCH_FIELD_NAMES: Tuple[str, ...] = (KEY_NAME_NAME, KEY_NAME_EMAIL, KEY_NAME_USERNAME)
+
+DEFAULT_SEARCH_LIMIT: int = 20
+
+# NOTE: A prefix that matches more terms than this (like 'c') only ranks
+# the first (shortest, so closest) ones
+MAX_PREFIX_TERMS: int = 1_000
+
+# NOTE: Minimum trigram similarity of a typo-tolerant (fuzzy) match
+MIN_FUZZY_SIMILARITY: float = 0.35
+MIN_FUZZY_LENGTH: int = 3
+
+SCORE_EXACT: float = 3.0
+SCORE_PREFIX: float = 2.0
+
+# NOTE: BM25 parameters (term frequency saturation, length normalization)
+BM25_K1: float = 1.2
+BM25_B: float = 0.75
+
+_PHRASE_PATTERN: re.Pattern = re.compile(r'"([^"]*)"')
+
+# NOTE: Runs of letters or of digits: 'www.google2.com' -> www, google, 2, com
+_TERM_PATTERN: re.Pattern = re.compile(r"[^\W\d_]+|\d+")
+
+
+def get_terms(text: str) -> list[str]:
+    """Get the (casefolded) words of a text (letters and digits apart)"""
+
+    result: list[str] = _TERM_PATTERN.findall(text.casefold())
+
+    return result
+
+
+def get_trigrams(term: str) -> frozenset[str]:
+    """Get trigrams of a term, padded so its start and end count too"""
+
+    padded: str = f"  {term} "
+
+    result: frozenset[str] = frozenset(
+        padded[index : index + 3] for index in range(len(padded) - 2)
+    )
+
+    return result
+
+
+def get_best_record_ids(scores: dict[int, float], limit: int) -> list[int]:
+    """Get record ids of the best 'limit' scores (best first, ties by record id)"""
+
+    if not scores or limit <= 0:
+        return []
+
+    # NOTE: A common word matches most items with a few distinct scores:
+    # find the lowest score that is in, then order only what is above it
+    min_score: float = heapq.nlargest(limit, scores.values())[-1]
+
+    result: list[int] = sorted(
+        (record_id for record_id, score in scores.items() if score > min_score),
+        key=lambda record_id: (-scores[record_id], record_id),
+    )
+
+    result += heapq.nsmallest(
+        limit - len(result),
+        [record_id for record_id, score in scores.items() if score == min_score],
+    )
+
+    return result
+
+
+class SearchIndex:
+    """
+    Search index over the name, email and username of items
+
+    Every field is split into terms (words). Three structures are kept
+    incrementally, an add, edit or delete only touches the terms of that
+    item:
+
+    - term -> record ids (exact matches)
+    - the distinct terms in a sorted list (prefix matches, as you type:
+      a binary search and a scan of the matching range)
+    - trigram -> terms (typo-tolerant matches: terms that share enough
+      trigrams with the query word)
+
+    A query is split into words too, every word has to match (exactly, as a
+    prefix or fuzzy) and results are ranked by the sum of their scores.
+    """
+
+    def __init__(self) -> None:
+        self.term_items: dict[str, set[int]] = {}
+        self.item_terms: dict[int, frozenset[str]] = {}
+
+        self.sorted_terms: list[str] = []
+        self.trigram_terms: dict[str, set[str]] = {}
+        self.term_trigrams: dict[str, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.item_terms)
+
+    def clear(self) -> None:
+        """Remove all items"""
+
+        self.term_items.clear()
+        self.item_terms.clear()
+        self.sorted_terms.clear()
+        self.trigram_terms.clear()
+        self.term_trigrams.clear()
+
+    def load(self, items: Iterable[VaultItem]) -> None:
+        """Index all items at once (one sort of the terms, not an insert each)"""
+
+        self.clear()
+
+        for item in items:
+            terms: frozenset[str] = self.get_item_terms(item=item)
+            self.item_terms[item.record_id] = terms
+
+            for term in terms:
+                self.term_items.setdefault(term, set()).add(item.record_id)
+
+        self.sorted_terms = sorted(self.term_items)
+
+        for term in self.sorted_terms:
+            self._add_term_trigrams(term=term)
+
+    def _add_term_trigrams(self, term: str) -> None:
+        """Add a term to the trigram index (numbers are not typo-tolerant)"""
+
+        if term.isdigit():
+            return
+
+        trigrams: frozenset[str] = get_trigrams(term=term)
+        self.term_trigrams[term] = trigrams
+
+        for trigram in trigrams:
+            self.trigram_terms.setdefault(trigram, set()).add(term)
+
+    def _add_term(self, term: str) -> None:
+        """Add a new distinct term to the prefix and trigram indexes"""
+
+        bisect.insort(self.sorted_terms, term)
+
+        self._add_term_trigrams(term=term)
+
+    def _remove_term(self, term: str) -> None:
+        """Remove a distinct term (no item uses it) from the indexes"""
+
+        index: int = bisect.bisect_left(self.sorted_terms, term)
+        del self.sorted_terms[index]
+
+        for trigram in self.term_trigrams.pop(term, frozenset()):
+            terms: set[str] = self.trigram_terms[trigram]
+            terms.discard(term)
+
+            if not terms:
+                del self.trigram_terms[trigram]
+
+    def get_item_terms(self, item: VaultItem) -> frozenset[str]:
+        """Get the searchable terms of item"""
+
+        # NOTE: One pass over the fields (terms never span the space)
+        text: str = " ".join(getattr(item, key) or "" for key in SEARCH_FIELD_NAMES)
+
+        result: frozenset[str] = frozenset(get_terms(text=text))
+
+        return result
+
+    def add(self, item: VaultItem) -> None:
+        """Index item (or index it again, after an edit)"""
+
+        terms: frozenset[str] = self.get_item_terms(item=item)
+
+        previous_terms: frozenset[str] = self.item_terms.get(item.record_id, frozenset())
+        if terms == previous_terms:
+            return
+
+        self.remove(record_id=item.record_id)
+        self.item_terms[item.record_id] = terms
+
+        for term in terms:
+            record_ids: set[int] | None = self.term_items.get(term)
+
+            if record_ids is None:
+                self.term_items[term] = {item.record_id}
+                self._add_term(term=term)
+            else:
+                record_ids.add(item.record_id)
+
+    def remove(self, record_id: int) -> None:
+        """Remove item from the index"""
+
+        for term in self.item_terms.pop(record_id, frozenset()):
+            record_ids: set[int] = self.term_items[term]
+            record_ids.discard(record_id)
+
+            if not record_ids:
+                del self.term_items[term]
+                self._remove_term(term=term)
+
+    def get_prefix_terms(self, prefix: str) -> list[str]:
+        """Get terms that start with prefix (in order, at most 'MAX_PREFIX_TERMS')"""
+
+        result: list[str] = []
+
+        index: int = bisect.bisect_left(self.sorted_terms, prefix)
+        for term in self.sorted_terms[index : index + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            result.append(term)
+
+        return result
+
+    def get_fuzzy_terms(self, word: str) -> list[Tuple[str, float]]:
+        """Get terms similar to word, with their trigram (Jaccard) similarity"""
+
+        trigrams: frozenset[str] = get_trigrams(term=word)
+
+        # NOTE: Shared trigram count of every term with at least one
+        counts: Counter[str] = Counter()
+        for trigram in trigrams:
+            terms: set[str] | None = self.trigram_terms.get(trigram)
+            if terms:
+                counts.update(terms)
+
+        # NOTE: Similarity is at most count / len(trigrams), so most terms
+        # are skipped with one comparison
+        min_count: float = MIN_FUZZY_SIMILARITY * len(trigrams)
+
+        result: list[Tuple[str, float]] = []
+        for term, count in counts.items():
+            if count < min_count:
+                continue
+
+            similarity: float = count / (
+                len(trigrams) + len(self.term_trigrams[term]) - count
+            )
+
+            if similarity >= MIN_FUZZY_SIMILARITY:
+                result.append((term, similarity))
+
+        return result
+
+    def _add_term_scores(
+        self,
+        scores: dict[int, float],
+        term_scores: list[Tuple[str, float]],
+    ) -> None:
+        """Add items of terms to scores, an item keeps its best score"""
+
+        # NOTE: Best score first, so an item keeps the first one. Set and
+        # dictionary operations only, a common term may hold most items.
+        term_scores.sort(key=lambda term_score: term_score[1], reverse=True)
+
+        for term, score in term_scores:
+            record_ids: set[int] = self.term_items[term].difference(scores)
+            scores.update(dict.fromkeys(record_ids, score))
+
+    def get_word_scores(self, word: str, min_count: int) -> dict[int, float]:
+        """
+        Get the best score of every item that matches one query word
+
+        Exact and prefix matches come first, fuzzy matches (scores below 1)
+        are only searched if they are less than 'min_count' items.
+        """
+
+        result: dict[int, float] = {}
+
+        # NOTE: A prefix scores higher the more of its term it covers
+        self._add_term_scores(
+            scores=result,
+            term_scores=[
+                (term, SCORE_EXACT if term == word else SCORE_PREFIX + len(word) / len(term))
+                for term in self.get_prefix_terms(prefix=word)
+            ],
+        )
+
+        if len(result) < min_count and len(word) >= MIN_FUZZY_LENGTH:
+            self._add_term_scores(
+                scores=result,
+                term_scores=self.get_fuzzy_terms(word=word),
+            )
+
+        return result
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[int]:
+        """
+        Search items
+
+        Args:
+            query (str): Words (of a name, email or username), as typed
+            limit (int): Maximum count of results
+
+        Returns:
+            list: Record ids, best match first
+        """
+
+        scores: dict[int, float] | None = None
+
+        # NOTE: Every word has to match, rarest (fewest matches) first
+        word_scores: list[dict[int, float]] = sorted(
+            (
+                self.get_word_scores(word=word, min_count=limit)
+                for word in set(get_terms(text=query))
+            ),
+            key=len,
+        )
+
+        for matches in word_scores:
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    record_id: scores[record_id] + matches[record_id]
+                    for record_id in scores.keys() & matches.keys()
+                }
+
+            if not scores:
+                break
+
+        if not scores:
+            return []
+
+        result: list[int] = get_best_record_ids(scores=scores, limit=limit)
+
+        return result
+
+
+class DescriptionIndex:
+    """
+    Full-text index over the descriptions of items, ranked by BM25
+
+    Descriptions are secrets: the index only lives in memory (it is never
+    saved) and holds term positions, not the text. It is built from the
+    decrypted descriptions once, then kept up to date by edits, so a query
+    decrypts nothing.
+
+    A query is words (any of them, ranked by BM25) and "quoted phrases"
+    (every phrase has to match, as consecutive words).
+    """
+
+    def __init__(self) -> None:
+        # NOTE: term -> record id -> positions of the term in the description
+        self.postings: dict[str, dict[int, list[int]]] = {}
+
+        self.item_terms: dict[int, frozenset[str]] = {}
+        self.lengths: dict[int, int] = {}
+        self.total_length: int = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def load(self, descriptions: dict[int, str]) -> None:
+        """Index all descriptions, record id -> description"""
+
+        self.postings.clear()
+        self.item_terms.clear()
+        self.lengths.clear()
+        self.total_length = 0
+
+        for record_id, description in descriptions.items():
+            self.add(record_id=record_id, description=description)
+
+    def add(self, record_id: int, description: str) -> None:
+        """Index the description of an item (or index it again, after an edit)"""
+
+        self.remove(record_id=record_id)
+
+        terms: list[str] = get_terms(text=description)
+
+        for position, term in enumerate(terms):
+            self.postings.setdefault(term, {}).setdefault(record_id, []).append(position)
+
+        self.item_terms[record_id] = frozenset(terms)
+        self.lengths[record_id] = len(terms)
+        self.total_length += len(terms)
+
+    def remove(self, record_id: int) -> None:
+        """Remove the description of an item"""
+
+        for term in self.item_terms.pop(record_id, frozenset()):
+            term_postings: dict[int, list[int]] = self.postings[term]
+            del term_postings[record_id]
+
+            if not term_postings:
+                del self.postings[term]
+
+        self.total_length -= self.lengths.pop(record_id, 0)
+
+    def has_phrase(self, record_id: int, terms: list[str]) -> bool:
+        """Check if a description holds terms as consecutive words"""
+
+        following: list[set[int]] = [
+            set(self.postings[term][record_id]) for term in terms[1:]
+        ]
+
+        result: bool = any(
+            all(
+                position + offset in positions
+                for offset, positions in enumerate(following, start=1)
+            )
+            for position in self.postings[terms[0]][record_id]
+        )
+
+        return result
+
+    def get_phrase_matches(self, terms: list[str]) -> set[int]:
+        """Get record ids of descriptions that hold a phrase"""
+
+        if any(term not in self.postings for term in terms):
+            return set()
+
+        # NOTE: Items with every word first (rarest word first), then order
+        record_ids: set[int] = set.intersection(
+            *sorted((set(self.postings[term]) for term in terms), key=len)
+        )
+
+        result: set[int] = {
+            record_id
+            for record_id in record_ids
+            if self.has_phrase(record_id=record_id, terms=terms)
+        }
+
+        return result
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[int]:
+        """
+        Search descriptions
+
+        Args:
+            query (str): Words and "quoted phrases"
+            limit (int): Maximum count of results
+
+        Returns:
+            list: Record ids, best match first
+        """
+
+        phrases: list[list[str]] = [
+            terms
+            for terms in (get_terms(text=phrase) for phrase in _PHRASE_PATTERN.findall(query))
+            if terms
+        ]
+        words: list[str] = get_terms(text=_PHRASE_PATTERN.sub(" ", query))
+
+        query_terms: set[str] = {term for terms in phrases for term in terms}
+        query_terms.update(words)
+
+        # NOTE: Phrases filter, every query term ranks
+        candidates: set[int] | None = None
+        for terms in phrases:
+            matches: set[int] = self.get_phrase_matches(terms=terms)
+            candidates = matches if candidates is None else candidates & matches
+
+        count: int = len(self.lengths)
+        if not count or candidates == set():
+            return []
+
+        average_length: float = self.total_length / count or 1.0
+
+        scores: dict[int, float] = {}
+        for term in query_terms:
+            term_postings: dict[int, list[int]] | None = self.postings.get(term)
+            if not term_postings:
+                continue
+
+            frequency: int = len(term_postings)
+            idf: float = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+
+            for record_id, positions in term_postings.items():
+                if candidates is not None and record_id not in candidates:
+                    continue
+
+                term_count: int = len(positions)
+                norm: float = BM25_K1 * (
+                    1 - BM25_B + BM25_B * self.lengths[record_id] / average_length
+                )
+
+                weight: float = idf * term_count * (BM25_K1 + 1) / (term_count + norm)
+                scores[record_id] = scores.get(record_id, 0.0) + weight
+
+        result: list[int] = get_best_record_ids(scores=scores, limit=limit)
+
+        return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
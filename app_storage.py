@@ -0,0 +1,69 @@
+"""
+Application Storage
+"""
+
+from pathlib import Path
+
+from app_vault import VAULT_FORMAT_VERSION_LOG
+from app_vault import VaultLog
+from app_vault import VaultStorage
+from app_vault import is_vault_container
+from app_vault import get_vault_format_version
+
+from app_vault_sqlite import VaultSqlite
+from app_vault_sqlite import is_sqlite_database
+
+
+DETECT_HEADER_SIZE: int = 512
+
+STORAGE_BACKENDS: dict[str, type[VaultStorage]] = {
+    "log": VaultLog,
+    "sqlite": VaultSqlite,
+}
+
+
+def get_storage_class(name: str) -> type[VaultStorage]:
+    """
+    Get storage backend class by name
+
+    Args:
+        name (str): Storage backend name ('log' or 'sqlite')
+
+    Returns:
+        type: Storage backend class
+    """
+
+    if name not in STORAGE_BACKENDS:
+        message: str = f"Storage backend '{name}' is not available!"
+        raise ValueError(message)
+
+    return STORAGE_BACKENDS[name]
+
+
+def detect_storage_class(path: Path) -> type[VaultStorage] | None:
+    """
+    Detect the storage backend of a data file
+
+    Returns:
+        type: Storage backend class, or None for old (pickle or single blob)
+        data files, which are migrated on unlock
+    """
+
+    # NOTE: Both headers (and the salt) fit in the first bytes
+    with open(file=path, mode="rb") as file:
+        data: bytes = file.read(DETECT_HEADER_SIZE)
+
+    if is_sqlite_database(data=data):
+        return VaultSqlite
+
+    if (
+        is_vault_container(data=data)
+        and get_vault_format_version(data=data) == VAULT_FORMAT_VERSION_LOG
+    ):
+        return VaultLog
+
+    return None
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
@@ -0,0 +1,183 @@
+"""
+Application Table (Item List Rendering)
+
+A table (or the visible page of it) is built as one styled 'Text' from
+cached rows and written with one 'console.print' call: no markup parsing
+and one terminal write per table, instead of a few prints per row.
+"""
+
+import functools
+
+from typing import Tuple
+
+from rich.text import Text
+from rich.style import Style
+
+from app_constants import *
+from app_item import VaultItem
+from app_vault import VaultItems
+
+
+MASKED_PASSWORD: str = "**********"
+
+
+def fix_missing_value(value: str | int | None) -> str | int:
+    """Fix missing (not set) field value for display"""
+
+    if value is None:
+        return MESSAGE_NOT_SET
+
+    return value
+
+
+def get_total_width() -> int:
+    """Get total width"""
+
+    total_width: int = (
+        8  # Pipe Count: ('|')
+        + COLUMN_WIDTH_ID
+        + COLUMN_WIDTH_NAME
+        + COLUMN_WIDTH_EMAIL
+        + COLUMN_WIDTH_MOBILE
+        + COLUMN_WIDTH_USERNAME
+        + COLUMN_WIDTH_PASSWORD
+        + COLUMN_WIDTH_UPDATE_TIME
+    )
+
+    return total_width
+
+
+@functools.cache
+def get_table_footer() -> Text:
+    """Get table footer (built once)"""
+
+    result = Text("-" * get_total_width(), style=STYLE_LABEL)
+
+    return result
+
+
+@functools.cache
+def get_table_header() -> Text:
+    """Get table header (built once)"""
+
+    id: str = LABEL_ID
+    name: str = "Name: URL / Application / Device"
+    email: str = "Email Address"
+    mobile: str = LABEL_MOBILE
+    username: str = LABEL_USERNAME
+    password: str = LABEL_PASSWORD
+    update_time: str = "Update"
+
+    id = id.ljust(COLUMN_WIDTH_ID, " ")
+    name = name.ljust(COLUMN_WIDTH_NAME, " ")
+    email = email.ljust(COLUMN_WIDTH_EMAIL, " ")
+    mobile = mobile.ljust(COLUMN_WIDTH_MOBILE, " ")
+    username = username.ljust(COLUMN_WIDTH_USERNAME, " ")
+    password = password.ljust(COLUMN_WIDTH_PASSWORD, " ")
+    update_time = update_time.ljust(COLUMN_WIDTH_UPDATE_TIME, " ")
+
+    header: str = f"|{id}|{name}|{email}|{mobile}|{username}|{password}|{update_time}|"
+
+    result: Text = Text("\n").join(
+        (get_table_footer(), Text(header, style=STYLE_LABEL), get_table_footer())
+    )
+
+    return result
+
+
+class TableRows:
+    """
+    Formatted item rows
+
+    A row is cached per record id with its key: the item version (see
+    'VaultItem.version') and the style of its password cell. A redraw only
+    formats rows of changed items, the others are reused as they are. Rows
+    with a visible password are never cached, so no password stays in
+    memory after it is displayed. Rows of deleted items are dropped by
+    'prune'.
+    """
+
+    def __init__(self) -> None:
+        self.rows: dict[int, Tuple[tuple, Text]] = {}
+
+    def get_row(
+        self,
+        item: VaultItem,
+        password: str = MASKED_PASSWORD,
+        password_style: Style | None = None,
+    ) -> Text:
+        """Get the (cached) row of an item"""
+
+        is_masked: bool = password == MASKED_PASSWORD
+        key: tuple = item.version, password_style
+
+        cached: Tuple[tuple, Text] | None = self.rows.get(item.record_id)
+        if is_masked and cached and cached[0] == key:
+            return cached[1]
+
+        id: int = item.record_id
+        name: str = fix_missing_value(value=item.name)
+        email: str = fix_missing_value(value=item.email)
+        mobile: str = fix_missing_value(value=item.mobile)
+        username: str = fix_missing_value(value=item.username)
+        update_time: str = fix_missing_value(value=item.update_time)
+
+        id = str(id).rjust(COLUMN_WIDTH_ID, " ")
+
+        name = name.ljust(COLUMN_WIDTH_NAME, " ")
+        email = email.ljust(COLUMN_WIDTH_EMAIL, " ")
+        mobile = mobile.ljust(COLUMN_WIDTH_MOBILE, " ")
+        username = username.ljust(COLUMN_WIDTH_USERNAME, " ")
+        update_time = update_time.ljust(COLUMN_WIDTH_UPDATE_TIME, " ")
+
+        update_time = update_time[0:10]
+
+        password = password.ljust(COLUMN_WIDTH_PASSWORD, " ")
+
+        result: Text = Text.assemble(
+            ("|", STYLE_LABEL),
+            f"{id}|{name}|{email}|{mobile}|{username}|",
+            (password, password_style or ""),
+            f"|{update_time}",
+            ("|", STYLE_LABEL),
+        )
+
+        if is_masked:
+            self.rows[item.record_id] = key, result
+
+        return result
+
+    def prune(self, items: VaultItems) -> None:
+        """Drop the cached rows of items that are not in items any more"""
+
+        record_ids: list[int] = [
+            record_id for record_id in self.rows if record_id not in items
+        ]
+
+        for record_id in record_ids:
+            del self.rows[record_id]
+
+    def render(self, sections: list[list[Text]]) -> Text:
+        """
+        Build a table of rows
+
+        Args:
+            sections (list): Rows of every section (a footer line follows
+            every section)
+
+        Returns:
+            Text: Header, sections and footers, one renderable
+        """
+
+        lines: list[Text] = [get_table_header()]
+        for rows in sections:
+            lines.extend(rows)
+            lines.append(get_table_footer())
+
+        result: Text = Text("\n").join(lines)
+
+        return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
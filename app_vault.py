@@ -0,0 +1,1784 @@
+"""
+Application Vault
+"""
+
+import io
+import os
+import abc
+import hmac
+import json
+import base64
+import pickle
+import time
+import shutil
+import bisect
+import struct
+import threading
+
+from typing import Tuple
+from pathlib import Path
+
+from app_constants import KEY_NAME_NAME
+from app_constants import KEY_NAME_EMAIL
+from app_constants import KEY_NAME_MOBILE
+from app_constants import KEY_NAME_USERNAME
+
+from app_item import VaultItem
+from app_item import INDEX_FIELD_NAMES
+from app_item import SECRET_FIELD_NAMES
+
+from app_search import SearchIndex
+from app_search import DescriptionIndex
+from app_search import DEFAULT_SEARCH_LIMIT
+
+from dt_cryptography import KDF_ITERATIONS
+from dt_cryptography import hash_data
+from dt_cryptography import encrypt_bytes
+from dt_cryptography import decrypt_bytes
+from dt_cryptography import decrypt_with_key
+from dt_cryptography import derive_key_from_password
+
+from dt_password_strength import estimate_password_strength
+
+from dt_compression import CODEC_NONE
+from dt_compression import compress
+from dt_compression import decompress
+
+
+# NOTE: Every vault file starts with the same fixed header
+# (all integers are big-endian):
+#
+#   magic (4s) | version (B) | kdf id (B) | kdf iterations (I)
+#   | salt length (B) | nonce length (B) | salt
+#
+# Version 1 (single blob, read only for migration):
+#
+#   header | nonce | ciphertext | tag
+#
+# Version 2 (append-only log of records, see 'VaultLog'):
+#
+#   header | next record id (Q) | wrapped data key (nonce | key | tag)
+#   | record | record | ...
+#
+# Version 3 (SQLite database, see 'VaultSqlite' in 'app_vault_sqlite') keeps
+# the header in the database, next to the wrapped data key.
+#
+# Version 4 is the key file of a backup store (see 'BackupStore' in
+# 'app_backup'): header | wrapped store key (nonce | key | tag)
+#
+# Headers are always authenticated as AES-GCM associated data,
+# so the KDF parameters can not be tampered.
+VAULT_MAGIC: bytes = b"DTPM"
+VAULT_HEADER = struct.Struct(">4sBBIBB")
+
+VAULT_FORMAT_VERSION_BLOB: int = 1
+VAULT_FORMAT_VERSION_LOG: int = 2
+VAULT_FORMAT_VERSION_SQLITE: int = 3
+VAULT_FORMAT_VERSION_BACKUP: int = 4
+
+VAULT_FORMAT_VERSIONS: Tuple[int, ...] = (
+    VAULT_FORMAT_VERSION_BLOB,
+    VAULT_FORMAT_VERSION_LOG,
+    VAULT_FORMAT_VERSION_SQLITE,
+    VAULT_FORMAT_VERSION_BACKUP,
+)
+
+KDF_ID_PBKDF2_SHA256: int = 1
+
+KEY_LENGTH: int = 32
+TAG_LENGTH: int = 16
+NONCE_LENGTH: int = 12
+
+# NOTE: Log record: kind (B) | record id (Q) | payload length (I) | payload
+#
+# 'PUT' and 'DELETE' (tombstone, empty text) payloads are one sealed part:
+#
+#   nonce | ciphertext | tag
+#
+# 'PUT_SPLIT' payloads are two sealed parts, the index tier (decrypted at
+# login) and the secrets tier (decrypted on demand):
+#
+#   index part length (I) | index part | secrets part
+#
+# 'PUT_COMPRESSED' payloads are the same, with the compression codec id
+# (see 'dt_compression') of both parts in front:
+#
+#   codec (B) | index part length (I) | index part | secrets part
+#
+# The record header (plus the codec and the part number) is the associated
+# data. Parts are compressed before they are encrypted.
+LOG_HEADER = struct.Struct(">Q")
+RECORD_HEADER = struct.Struct(">BQI")
+PART_LENGTH = struct.Struct(">I")
+RECORD_CODEC = struct.Struct(">B")
+
+RECORD_KIND_PUT: int = 1
+RECORD_KIND_DELETE: int = 2
+RECORD_KIND_PUT_SPLIT: int = 3
+RECORD_KIND_PUT_COMPRESSED: int = 4
+
+RECORD_KINDS: Tuple[int, ...] = (
+    RECORD_KIND_PUT,
+    RECORD_KIND_DELETE,
+    RECORD_KIND_PUT_SPLIT,
+    RECORD_KIND_PUT_COMPRESSED,
+)
+SPLIT_RECORD_KINDS: Tuple[int, ...] = (RECORD_KIND_PUT_SPLIT, RECORD_KIND_PUT_COMPRESSED)
+
+PART_INDEX: bytes = b"\x01"
+PART_SECRETS: bytes = b"\x02"
+
+# NOTE: Compact the log when more than half of its records are dead
+COMPACTION_DEAD_RECORD_RATIO: float = 0.5
+COMPACTION_MIN_DEAD_RECORDS: int = 32
+
+# NOTE: Appended records are fsynced in groups: right away when the last
+# fsync is older than this (a single interactive edit), otherwise when this
+# many records are waiting (a burst of edits), on 'sync', or by a timer this
+# long after the append at the latest (a deferred fsync is never lost).
+GROUP_COMMIT_RECORDS: int = 64
+GROUP_COMMIT_SECONDS: float = 0.5
+
+# NOTE: Blind index: a keyed hash (token) of every normalized value of these
+# fields is stored beside the encrypted record, so an exact-match lookup
+# finds its record without decrypting any other. Tokens only show which
+# records share a value, never the value (the key is in the vault).
+BLIND_INDEX_FIELD_NAMES: Tuple[str, ...] = (
+    KEY_NAME_NAME,
+    KEY_NAME_EMAIL,
+    KEY_NAME_MOBILE,
+    KEY_NAME_USERNAME,
+)
+BLIND_TOKEN_LENGTH: int = 16
+
+_URL_PREFIXES: Tuple[str, ...] = ("https://", "http://", "www.")
+
+MESSAGE_DECRYPTION_FAILED: str = (
+    "Decryption failed! Wrong password or data corrupted/tampered."
+)
+
+
+class VaultFormatError(ValueError):
+    """Vault file is not a valid (or supported) vault container"""
+
+
+class VaultDecryptionError(ValueError):
+    """Vault file can not be decrypted (wrong password or tampered)"""
+
+
+def is_vault_container(data: bytes) -> bool:
+    """Check if data starts with the vault container magic bytes"""
+
+    result: bool = data[: len(VAULT_MAGIC)] == VAULT_MAGIC
+
+    return result
+
+
+def unpack_vault_header(view: memoryview) -> Tuple[int, int, memoryview, int]:
+    """
+    Parse the fixed vault header
+
+    Returns:
+        tuple: (version, iterations, salt, offset after salt)
+    """
+
+    if len(view) < VAULT_HEADER.size:
+        raise VaultFormatError("Vault file is too short!")
+
+    magic, version, kdf_id, iterations, salt_length, nonce_length = (
+        VAULT_HEADER.unpack_from(view)
+    )
+
+    if magic != VAULT_MAGIC:
+        raise VaultFormatError("Vault file has an unknown format!")
+
+    if version not in VAULT_FORMAT_VERSIONS:
+        raise VaultFormatError(f"Vault format version {version} is not supported!")
+
+    if kdf_id != KDF_ID_PBKDF2_SHA256:
+        raise VaultFormatError(f"Vault KDF id {kdf_id} is not supported!")
+
+    if nonce_length != NONCE_LENGTH:
+        raise VaultFormatError("Vault file has an unknown nonce length!")
+
+    salt_end: int = VAULT_HEADER.size + salt_length
+
+    if salt_end > len(view):
+        raise VaultFormatError("Vault file is truncated!")
+
+    result = version, iterations, view[VAULT_HEADER.size : salt_end], salt_end
+
+    return result
+
+
+def get_vault_format_version(data: bytes) -> int:
+    """Get format version of a vault container"""
+
+    version, _, _, _ = unpack_vault_header(view=memoryview(data))
+
+    return version
+
+
+def unpack_vault_container(data: bytes) -> Tuple[memoryview, ...]:
+    """
+    Split a version 1 vault container into its parts without copying them
+
+    Returns:
+        tuple: (header, salt, nonce, ciphertext, tag) as 'memoryview' slices
+        plus the KDF iteration count, where 'header' (fixed part and salt) is
+        the associated data of the ciphertext
+    """
+
+    view = memoryview(data)
+
+    version, iterations, salt, nonce_start = unpack_vault_header(view=view)
+
+    if version != VAULT_FORMAT_VERSION_BLOB:
+        raise VaultFormatError(f"Vault format version {version} is not a blob!")
+
+    ciphertext_start: int = nonce_start + NONCE_LENGTH
+    tag_start: int = len(view) - TAG_LENGTH
+
+    if ciphertext_start > tag_start:
+        raise VaultFormatError("Vault file is truncated!")
+
+    result = (
+        view[:nonce_start],
+        salt,
+        view[nonce_start:ciphertext_start],
+        view[ciphertext_start:tag_start],
+        view[tag_start:],
+        iterations,
+    )
+
+    return result
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """Unpickler for old vault files: plain built-in values only"""
+
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"'{module}.{name}' is not allowed!")
+
+
+def load_legacy_vault(data: bytes) -> dict:
+    """Load an old (pickled dictionary of base64 strings) vault file"""
+
+    encrypted_data = _LegacyUnpickler(io.BytesIO(data)).load()
+
+    if not isinstance(encrypted_data, dict):
+        raise VaultFormatError("Vault file has an unknown format!")
+
+    return encrypted_data
+
+
+class VaultSession:
+    """
+    Unlocked vault: the derived key and the KDF parameters it came from
+
+    The (expensive) PBKDF2 derivation runs once, when the session is created.
+    The session key only wraps the vault data key, which encrypts records.
+    """
+
+    def __init__(self, key: bytes, salt: bytes, iterations: int) -> None:
+        self.key: bytes = key
+        self.salt: bytes = salt
+        self.iterations: int = iterations
+
+    @classmethod
+    def create(cls, password: str) -> "VaultSession":
+        """Create a new session (new random salt) for password"""
+
+        salt: bytes = os.urandom(16)
+
+        key: bytes = derive_key_from_password(
+            salt=salt,
+            password=password,
+            iterations=KDF_ITERATIONS,
+        )
+
+        session = cls(key=key, salt=salt, iterations=KDF_ITERATIONS)
+
+        return session
+
+    @classmethod
+    def from_container(cls, password: str, data: bytes) -> "VaultSession":
+        """Create a session from the KDF parameters in a vault container"""
+
+        _, iterations, salt, _ = unpack_vault_header(view=memoryview(data))
+
+        key: bytes = derive_key_from_password(
+            salt=bytes(salt),
+            password=password,
+            iterations=iterations,
+        )
+
+        session = cls(key=key, salt=bytes(salt), iterations=iterations)
+
+        return session
+
+    @classmethod
+    def from_legacy(cls, password: str, encrypted_data: dict) -> "VaultSession":
+        """Create a session from the KDF parameters in an old vault file"""
+
+        salt: bytes = base64.b64decode(s=encrypted_data["salt"])
+
+        # NOTE: Files written before 'iterations' was stored use the default
+        iterations: int = encrypted_data.get("iterations", KDF_ITERATIONS)
+
+        key: bytes = derive_key_from_password(
+            salt=salt,
+            password=password,
+            iterations=iterations,
+        )
+
+        session = cls(key=key, salt=salt, iterations=iterations)
+
+        return session
+
+    def verify_password(self, password: str) -> bool:
+        """Check if password derives the same key as this session"""
+
+        key: bytes = derive_key_from_password(
+            salt=self.salt,
+            password=password,
+            iterations=self.iterations,
+        )
+
+        result: bool = hmac.compare_digest(key, self.key)
+
+        return result
+
+    def pack_header(self, version: int) -> bytes:
+        """Pack the fixed vault header (and salt) for this session"""
+
+        header: bytes = (
+            VAULT_HEADER.pack(
+                VAULT_MAGIC,
+                version,
+                KDF_ID_PBKDF2_SHA256,
+                self.iterations,
+                len(self.salt),
+                NONCE_LENGTH,
+            )
+            + self.salt
+        )
+
+        return header
+
+    def decrypt(self, data: bytes) -> Tuple[bool, str]:
+        """Decrypt a version 1 vault container with the session key"""
+
+        try:
+            header, _, nonce, ciphertext, tag, _ = unpack_vault_container(data=data)
+
+            plain_text: bytes = decrypt_bytes(
+                key=self.key,
+                tag=tag,
+                nonce=nonce,
+                ciphertext=ciphertext,
+                associated_data=header,
+            )
+
+            result = True, plain_text.decode(encoding="utf-8")
+
+            return result
+        except:
+            return False, MESSAGE_DECRYPTION_FAILED
+
+    def decrypt_legacy(self, encrypted_data: dict) -> Tuple[bool, str]:
+        """Decrypt an old vault file with the session key"""
+
+        result = decrypt_with_key(
+            key=self.key,
+            encrypted_data=encrypted_data,
+        )
+
+        return result
+
+
+def fsync_directory(path: Path) -> None:
+    """Make a rename in the directory of path durable (where supported)"""
+
+    if os.name == "nt":
+        return
+
+    descriptor: int = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def normalize_blind_value(field_name: str, value: str) -> str:
+    """
+    Normalize a field value for the blind index (lookups normalize the same)
+
+    Args:
+        field_name (str): 'KEY_NAME_*' of a 'BLIND_INDEX_FIELD_NAMES' field
+        value (str): Value, as stored or as typed
+
+    Returns:
+        str: Casefolded value without spaces around it, mobile numbers as
+        digits (no leading zeros) and names without 'https://' or 'www.'
+    """
+
+    result: str = " ".join(value.casefold().split())
+
+    if field_name == KEY_NAME_MOBILE:
+        result = "".join(char for char in result if char.isdigit()).lstrip("0")
+
+    elif field_name == KEY_NAME_NAME:
+        for prefix in _URL_PREFIXES:
+            result = result.removeprefix(prefix)
+        result = result.rstrip("/")
+
+    return result
+
+
+def serialize_item(item: VaultItem) -> Tuple[str, str]:
+    """
+    Serialize one item for its record (without derived fields)
+
+    Returns:
+        tuple: (index tier JSON, secrets tier JSON)
+    """
+
+    index: dict = item.to_dict(field_names=INDEX_FIELD_NAMES)
+    secrets: dict = item.to_dict(field_names=SECRET_FIELD_NAMES)
+
+    result = json.dumps(obj=index), json.dumps(obj=secrets)
+
+    return result
+
+
+class VaultStorage(abc.ABC):
+    """
+    Storage backend of an unlocked vault
+
+    A backend keeps items as records (record id -> index tier and secrets
+    tier, see 'serialize_item'), encrypted under a random vault data key
+    that is wrapped by the session key. 'open' decrypts the index tier of
+    every record, secrets are only decrypted by 'read_secrets', and 'save'
+    writes changed records only.
+
+    A backend that stores blind index tokens beside its records (see
+    'BLIND_INDEX_FIELD_NAMES') finds and decrypts single records without
+    decrypting the rest ('find_records' and 'read_records'), the others
+    decrypt the index tier of every record to find one.
+    """
+
+    has_blind_index: bool = False
+
+    def __init__(self, path: Path, session: VaultSession, data_key: bytes) -> None:
+        self.path: Path = path
+        self.session: VaultSession = session
+        self.data_key: bytes = data_key
+
+        # NOTE: Key of password tags (see 'VaultItems.get_password_tag')
+        self.password_tag_key: bytes = hmac.digest(data_key, b"password tag", "sha256")
+
+        # NOTE: Key of blind index tokens (see 'get_blind_token')
+        self.blind_index_key: bytes = hmac.digest(data_key, b"blind index", "sha256")
+
+        # NOTE: Codec for new records, every record keeps its own codec id
+        self.codec: int = CODEC_NONE
+
+        self.next_record_id: int = 1
+
+    @classmethod
+    @abc.abstractmethod
+    def create(
+        cls,
+        path: Path,
+        session: VaultSession,
+        records: dict[int, Tuple[str, str]],
+        next_record_id: int = 1,
+        codec: int = CODEC_NONE,
+        data_key: bytes | None = None,
+    ) -> "VaultStorage":
+        """
+        Create a new vault with (index, secrets) records
+
+        A new data key is generated, unless the data key of the vault that
+        records come from is given (so keyed hashes in records stay valid).
+        """
+
+        raise NotImplementedError
+
+    @classmethod
+    @abc.abstractmethod
+    def open(
+        cls,
+        path: Path,
+        password: str,
+        codec: int = CODEC_NONE,
+        load_records: bool = True,
+    ) -> Tuple["VaultStorage", dict[int, str]]:
+        """
+        Unlock a vault and decrypt the index tier of its records
+
+        A backend with a blind index ('has_blind_index') skips decrypting
+        records if 'load_records' is False (records is empty then, use
+        'find_records' and 'read_records'), the others always load them.
+
+        Returns:
+            tuple: (vault, live records as record id -> index JSON)
+
+        Raises:
+            VaultFormatError: If the file is not a valid vault
+            VaultDecryptionError: If password is wrong or data is tampered
+        """
+
+        raise NotImplementedError
+
+    def seal(self, data: bytes, associated_data: bytes) -> bytes:
+        """Encrypt one part as a sealed part (nonce | ciphertext | tag)"""
+
+        nonce, ciphertext, tag = encrypt_bytes(
+            key=self.data_key,
+            data=data,
+            associated_data=associated_data,
+        )
+
+        result: bytes = b"".join((nonce, ciphertext, tag))
+
+        return result
+
+    def open_sealed(self, sealed: memoryview, associated_data: bytes) -> bytes:
+        """Decrypt one sealed part (nonce | ciphertext | tag) of a record"""
+
+        try:
+            result: bytes = decrypt_bytes(
+                key=self.data_key,
+                nonce=sealed[:NONCE_LENGTH],
+                ciphertext=sealed[NONCE_LENGTH:-TAG_LENGTH],
+                tag=sealed[-TAG_LENGTH:],
+                associated_data=associated_data,
+            )
+        except:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        return result
+
+    def get_blind_token(self, field_name: str, value: str) -> bytes:
+        """Get the blind index token of a (normalized) field value"""
+
+        normalized: str = normalize_blind_value(field_name=field_name, value=value)
+
+        result: bytes = hmac.digest(
+            self.blind_index_key,
+            f"{field_name}\x00{normalized}".encode(encoding="utf-8"),
+            "sha256",
+        )[:BLIND_TOKEN_LENGTH]
+
+        return result
+
+    def get_blind_tokens(self, index: dict) -> set[bytes]:
+        """Get the blind index tokens of the index tier of a record"""
+
+        result: set[bytes] = {
+            self.get_blind_token(field_name=field_name, value=index[field_name])
+            for field_name in BLIND_INDEX_FIELD_NAMES
+            if index.get(field_name)
+        }
+
+        return result
+
+    @abc.abstractmethod
+    def find_records(self, field_name: str, value: str) -> list[int]:
+        """
+        Find records by the exact (normalized) value of a field, by its blind
+        index token, without decrypting any record
+
+        Returns:
+            list: Record ids (sorted)
+        """
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def read_records(self, record_ids: list[int] | None = None) -> dict[int, str]:
+        """
+        Decrypt the index tier of some records (or all)
+
+        Returns:
+            dict: record id -> index JSON (of the records that exist)
+        """
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def read_secrets(self, record_ids: list[int]) -> dict[int, dict]:
+        """
+        Decrypt the secrets tier of records
+
+        Returns:
+            dict: record id -> secret fields (password, description)
+        """
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def save(self, puts: dict[int, Tuple[str, str]], deletes: list[int]) -> None:
+        """Write changed (index, secrets) records and remove deleted ones"""
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def change_session(self, session: VaultSession) -> None:
+        """Re-wrap the data key for a new master password"""
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def backup(self, target_path: Path) -> None:
+        """Copy a consistent snapshot of the vault to target path"""
+
+        raise NotImplementedError
+
+    def sync(self) -> None:
+        """Make saved records durable"""
+
+    def close(self) -> None:
+        """Finish pending work (and make everything durable)"""
+
+        self.sync()
+
+
+class VaultLog(VaultStorage):
+    """
+    Append-only, log-structured vault file
+
+    Each item is encrypted on its own under a random vault data key (which is
+    wrapped by the session key) and appended as a record. An update appends a
+    replacement record and a delete appends a tombstone, so saving costs one
+    AES-GCM pass per changed item, whatever the vault size. Dead records are
+    dropped by compaction, which copies live records as they are (no
+    decryption) and runs in a background thread.
+
+    The log is its own write-ahead journal: every mutation is appended right
+    away and appends are fsynced in groups, a torn last record is dropped
+    when the log is replayed at unlock (see 'is_torn_record'), and
+    whole-file rewrites (checkpoints) go through a temporary file, fsync and
+    an atomic 'os.replace'. A damaged record anywhere else is an error, and
+    bytes past the last replayed record are never dropped before the file
+    is backed up (see 'back_up_tail').
+    """
+
+    def __init__(self, path: Path, session: VaultSession, data_key: bytes) -> None:
+        super().__init__(path=path, session=session, data_key=data_key)
+
+        # NOTE: Live record id -> (start, end) offsets in the file
+        self.offsets: dict[int, Tuple[int, int]] = {}
+        self.dead_records: int = 0
+        self.end_offset: int = 0
+
+        self.unsynced_records: int = 0
+        self.synced_at: float = 0.0
+        self.sync_timer: threading.Timer | None = None
+
+        self.lock = threading.Lock()
+        self.compaction_thread: threading.Thread | None = None
+
+    @property
+    def dead_record_ratio(self) -> float:
+        """Ratio of dead (replaced or deleted) records in the file"""
+
+        total: int = len(self.offsets) + self.dead_records
+        if total == 0:
+            return 0.0
+
+        result: float = self.dead_records / total
+
+        return result
+
+    def pack_header(self) -> bytes:
+        """Pack the log header (and the wrapped data key)"""
+
+        header: bytes = self.session.pack_header(
+            version=VAULT_FORMAT_VERSION_LOG,
+        ) + LOG_HEADER.pack(self.next_record_id)
+
+        nonce, wrapped_key, tag = encrypt_bytes(
+            key=self.session.key,
+            data=self.data_key,
+            associated_data=header,
+        )
+
+        result: bytes = b"".join((header, nonce, wrapped_key, tag))
+
+        return result
+
+    def pack_record(
+        self,
+        kind: int,
+        record_id: int,
+        plain_text: str = "",
+        secrets_text: str = "",
+    ) -> bytes:
+        """Encrypt and pack one log record"""
+
+        data: bytes = plain_text.encode(encoding="utf-8")
+
+        if kind not in SPLIT_RECORD_KINDS:
+            sealed_length: int = NONCE_LENGTH + len(data) + TAG_LENGTH
+            header: bytes = RECORD_HEADER.pack(kind, record_id, sealed_length)
+
+            nonce, ciphertext, tag = encrypt_bytes(
+                key=self.data_key,
+                data=data,
+                associated_data=header,
+            )
+
+            result: bytes = b"".join((header, nonce, ciphertext, tag))
+
+            return result
+
+        secrets: bytes = secrets_text.encode(encoding="utf-8")
+
+        prefix: bytes = b""
+        if kind == RECORD_KIND_PUT_COMPRESSED:
+            prefix = RECORD_CODEC.pack(self.codec)
+            data = compress(data=data, codec=self.codec)
+            secrets = compress(data=secrets, codec=self.codec)
+
+        sealed_length = NONCE_LENGTH + len(data) + TAG_LENGTH
+
+        payload_length: int = (
+            len(prefix)
+            + PART_LENGTH.size
+            + sealed_length
+            + NONCE_LENGTH
+            + len(secrets)
+            + TAG_LENGTH
+        )
+        header = RECORD_HEADER.pack(kind, record_id, payload_length) + prefix
+
+        index_nonce, index_ciphertext, index_tag = encrypt_bytes(
+            key=self.data_key,
+            data=data,
+            associated_data=header + PART_INDEX,
+        )
+
+        secrets_nonce, secrets_ciphertext, secrets_tag = encrypt_bytes(
+            key=self.data_key,
+            data=secrets,
+            associated_data=header + PART_SECRETS,
+        )
+
+        result = b"".join(
+            (
+                header,
+                PART_LENGTH.pack(sealed_length),
+                index_nonce,
+                index_ciphertext,
+                index_tag,
+                secrets_nonce,
+                secrets_ciphertext,
+                secrets_tag,
+            )
+        )
+
+        return result
+
+    @staticmethod
+    def unpack_record(view: memoryview, offset: int) -> Tuple[int, int, int, int]:
+        """
+        Parse one record header
+
+        Returns:
+            tuple: (kind, record id, payload start, record end),
+            record end is -1 for a torn record (it runs past the end of view)
+
+        Raises:
+            VaultFormatError: If the record header is damaged
+        """
+
+        kind, record_id, payload_length = RECORD_HEADER.unpack_from(view, offset)
+
+        if kind not in RECORD_KINDS or payload_length < NONCE_LENGTH + TAG_LENGTH:
+            raise VaultFormatError(f"Vault record at offset {offset} is damaged!")
+
+        payload_start: int = offset + RECORD_HEADER.size
+        record_end: int = payload_start + payload_length
+
+        if record_end > len(view):
+            record_end = -1
+
+        return kind, record_id, payload_start, record_end
+
+    @staticmethod
+    def is_torn_record(view: memoryview, offset: int) -> bool:
+        """
+        Check if a damaged (or undecryptable) record is the torn last record
+        of an interrupted append: after a power loss the tail of the file can
+        be partly written or zero-filled
+
+        Returns:
+            bool: True if the record (as its header tells) reaches the end
+            of view, or everything after its header is zero
+        """
+
+        if offset + RECORD_HEADER.size > len(view):
+            return True
+
+        _, _, payload_length = RECORD_HEADER.unpack_from(view, offset)
+        payload_start: int = offset + RECORD_HEADER.size
+
+        if payload_start + payload_length >= len(view):
+            return True
+
+        result: bool = not any(view[payload_start:])
+
+        return result
+
+    @staticmethod
+    def unpack_split_record(
+        view: memoryview,
+        kind: int,
+        offset: int,
+        payload_start: int,
+    ) -> Tuple[int, bytes, int, int]:
+        """
+        Parse the parts of a split (index / secrets) record
+
+        Returns:
+            tuple: (codec, associated data, index part start, index part end)
+        """
+
+        codec: int = CODEC_NONE
+        parts_start: int = payload_start
+
+        if kind == RECORD_KIND_PUT_COMPRESSED:
+            (codec,) = RECORD_CODEC.unpack_from(view, payload_start)
+            parts_start += RECORD_CODEC.size
+
+        (index_length,) = PART_LENGTH.unpack_from(view, parts_start)
+        index_start: int = parts_start + PART_LENGTH.size
+
+        result = (
+            codec,
+            bytes(view[offset:parts_start]),
+            index_start,
+            index_start + index_length,
+        )
+
+        return result
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        session: VaultSession,
+        records: dict[int, Tuple[str, str]],
+        next_record_id: int = 1,
+        codec: int = CODEC_NONE,
+        data_key: bytes | None = None,
+    ) -> "VaultLog":
+        """Create a new log file with (index, secrets) records"""
+
+        vault = cls(
+            path=path,
+            session=session,
+            data_key=data_key or os.urandom(KEY_LENGTH),
+        )
+        vault.codec = codec
+        vault.next_record_id = max([next_record_id, *(id + 1 for id in records)])
+
+        chunks: list[bytes] = [vault.pack_header()]
+        for record_id, (plain_text, secrets_text) in records.items():
+            chunks.append(
+                vault.pack_record(
+                    kind=RECORD_KIND_PUT_COMPRESSED,
+                    record_id=record_id,
+                    plain_text=plain_text,
+                    secrets_text=secrets_text,
+                )
+            )
+
+        vault.write_file(chunks=chunks)
+
+        return vault
+
+    @classmethod
+    def open(
+        cls,
+        path: Path,
+        password: str,
+        codec: int = CODEC_NONE,
+        load_records: bool = True,
+    ) -> Tuple["VaultLog", dict[int, str]]:
+        """
+        Unlock a log file and replay its records
+
+        Only the index tier of records is decrypted, secrets are left in the
+        file until 'read_secrets' is called. A log has no blind index, it is
+        always replayed ('load_records' is ignored).
+
+        Returns:
+            tuple: (vault, live records as record id -> index JSON)
+
+        Raises:
+            VaultFormatError: If the file is not a valid log
+            VaultDecryptionError: If password is wrong or data is tampered
+        """
+
+        with open(file=path, mode="rb") as file:
+            data: bytes = file.read()
+
+        view = memoryview(data)
+
+        version, _, _, offset = unpack_vault_header(view=view)
+        if version != VAULT_FORMAT_VERSION_LOG:
+            raise VaultFormatError(f"Vault format version {version} is not a log!")
+
+        wrapped_start: int = offset + LOG_HEADER.size
+        wrapped_end: int = wrapped_start + NONCE_LENGTH + KEY_LENGTH + TAG_LENGTH
+        if wrapped_end > len(view):
+            raise VaultFormatError("Vault file is truncated!")
+
+        (next_record_id,) = LOG_HEADER.unpack_from(view, offset)
+
+        session: VaultSession = VaultSession.from_container(
+            password=password,
+            data=data,
+        )
+
+        try:
+            data_key: bytes = decrypt_bytes(
+                key=session.key,
+                nonce=view[wrapped_start : wrapped_start + NONCE_LENGTH],
+                ciphertext=view[wrapped_start + NONCE_LENGTH : wrapped_end - TAG_LENGTH],
+                tag=view[wrapped_end - TAG_LENGTH : wrapped_end],
+                associated_data=view[:wrapped_start],
+            )
+        except:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        vault = cls(path=path, session=session, data_key=data_key)
+        vault.codec = codec
+        vault.next_record_id = next_record_id
+
+        records: dict[int, str] = {}
+
+        offset = wrapped_end
+        while offset < len(view):
+            try:
+                kind, record_id, record_end, plain_text = vault.open_record(
+                    view=view,
+                    offset=offset,
+                )
+
+            # NOTE: A torn (partly written) last record is dropped, the file
+            # is backed up first, a damaged record before the end is an error
+            except (VaultFormatError, VaultDecryptionError):
+                if not vault.is_torn_record(view=view, offset=offset):
+                    raise
+
+                break
+
+            if record_end < 0:
+                break
+
+            vault.replay_record(
+                kind=kind,
+                record_id=record_id,
+                offsets=(offset, record_end),
+            )
+
+            if kind == RECORD_KIND_DELETE:
+                records.pop(record_id, None)
+            else:
+                records[record_id] = plain_text.decode(encoding="utf-8")
+
+            offset = record_end
+
+        vault.end_offset = offset
+
+        if offset < len(view):
+            vault.drop_tail(file_size=len(view))
+
+        return vault, records
+
+    def open_record(
+        self,
+        view: memoryview,
+        offset: int,
+    ) -> Tuple[int, int, int, bytes]:
+        """
+        Parse and decrypt one record of the file at unlock (both parts of
+        the last record, an append is written front to back)
+
+        Returns:
+            tuple: (kind, record id, record end, index tier), record end is
+            -1 for a torn record (it runs past the end of view)
+
+        Raises:
+            VaultFormatError: If the record is damaged
+            VaultDecryptionError: If the record does not decrypt
+        """
+
+        if offset + RECORD_HEADER.size > len(view):
+            raise VaultFormatError(f"Vault record at offset {offset} is damaged!")
+
+        kind, record_id, payload_start, record_end = self.unpack_record(
+            view=view,
+            offset=offset,
+        )
+
+        if record_end < 0:
+            return kind, record_id, record_end, b""
+
+        plain_text: bytes = self.open_record_index(
+            view=view,
+            kind=kind,
+            offset=offset,
+            payload_start=payload_start,
+            record_end=record_end,
+        )
+
+        if record_end == len(view) and kind in SPLIT_RECORD_KINDS:
+            self.open_record_secrets(
+                view=view,
+                kind=kind,
+                offset=offset,
+                payload_start=payload_start,
+                record_end=record_end,
+            )
+
+        result = kind, record_id, record_end, plain_text
+
+        return result
+
+    def open_record_index(
+        self,
+        view: memoryview,
+        kind: int,
+        offset: int,
+        payload_start: int,
+        record_end: int,
+    ) -> bytes:
+        """Decrypt the index tier (or the only part) of a record"""
+
+        if kind not in SPLIT_RECORD_KINDS:
+            result: bytes = self.open_sealed(
+                sealed=view[payload_start:record_end],
+                associated_data=bytes(view[offset:payload_start]),
+            )
+
+            return result
+
+        codec, header, index_start, index_end = self.unpack_split_record(
+            view=view,
+            kind=kind,
+            offset=offset,
+            payload_start=payload_start,
+        )
+
+        if index_end - index_start < NONCE_LENGTH + TAG_LENGTH or (
+            index_end + NONCE_LENGTH + TAG_LENGTH > record_end
+        ):
+            raise VaultFormatError(f"Vault record at offset {offset} is damaged!")
+
+        data: bytes = self.open_sealed(
+            sealed=view[index_start:index_end],
+            associated_data=header + PART_INDEX,
+        )
+
+        result = decompress(data=data, codec=codec)
+
+        return result
+
+    def open_record_secrets(
+        self,
+        view: memoryview,
+        kind: int,
+        offset: int,
+        payload_start: int,
+        record_end: int,
+    ) -> bytes:
+        """Decrypt the secrets tier of a split record"""
+
+        codec, header, _, index_end = self.unpack_split_record(
+            view=view,
+            kind=kind,
+            offset=offset,
+            payload_start=payload_start,
+        )
+
+        data: bytes = self.open_sealed(
+            sealed=view[index_end:record_end],
+            associated_data=header + PART_SECRETS,
+        )
+
+        result: bytes = decompress(data=data, codec=codec)
+
+        return result
+
+    def read_secrets(self, record_ids: list[int]) -> dict[int, dict]:
+        """
+        Decrypt the secrets tier of records (one file read per record)
+
+        Returns:
+            dict: record id -> secret fields (password, description)
+        """
+
+        result: dict[int, dict] = {}
+
+        with self.lock:
+            with open(file=self.path, mode="rb") as file:
+                for record_id in record_ids:
+                    start, end = self.offsets[record_id]
+
+                    file.seek(start)
+                    view = memoryview(file.read(end - start))
+
+                    kind, _, payload_start, _ = self.unpack_record(view=view, offset=0)
+
+                    # NOTE: Whole-item records were decrypted at login
+                    if kind not in SPLIT_RECORD_KINDS:
+                        result[record_id] = {}
+                        continue
+
+                    secrets_text: bytes = self.open_record_secrets(
+                        view=view,
+                        kind=kind,
+                        offset=0,
+                        payload_start=payload_start,
+                        record_end=len(view),
+                    )
+
+                    result[record_id] = json.loads(s=secrets_text)
+
+        return result
+
+    def find_records(self, field_name: str, value: str) -> list[int]:
+        """
+        Find records by the exact (normalized) value of a field, a log has
+        no blind index, so the index tier of every record is decrypted
+
+        Returns:
+            list: Record ids (sorted)
+        """
+
+        normalized: str = normalize_blind_value(field_name=field_name, value=value)
+
+        result: list[int] = []
+        for record_id, plain_text in sorted(self.read_records().items()):
+            record_value: str | None = json.loads(s=plain_text).get(field_name)
+
+            if record_value and (
+                normalize_blind_value(field_name=field_name, value=record_value)
+                == normalized
+            ):
+                result.append(record_id)
+
+        return result
+
+    def read_records(self, record_ids: list[int] | None = None) -> dict[int, str]:
+        """
+        Decrypt the index tier of some records (or all)
+
+        Returns:
+            dict: record id -> index JSON (of the records that exist)
+        """
+
+        result: dict[int, str] = {}
+
+        with self.lock:
+            with open(file=self.path, mode="rb") as file:
+                view = memoryview(file.read())
+
+            if record_ids is None:
+                record_ids = list(self.offsets)
+
+            for record_id in record_ids:
+                if record_id not in self.offsets:
+                    continue
+
+                start, end = self.offsets[record_id]
+
+                kind, _, payload_start, _ = self.unpack_record(view=view, offset=start)
+
+                plain_text: bytes = self.open_record_index(
+                    view=view,
+                    kind=kind,
+                    offset=start,
+                    payload_start=payload_start,
+                    record_end=end,
+                )
+
+                result[record_id] = plain_text.decode(encoding="utf-8")
+
+        return result
+
+    def replay_record(self, kind: int, record_id: int, offsets: Tuple[int, int]) -> None:
+        """Update live / dead bookkeeping for one record"""
+
+        if record_id in self.offsets:
+            self.dead_records += 1
+
+        if kind == RECORD_KIND_DELETE:
+            self.offsets.pop(record_id, None)
+            self.dead_records += 1
+        else:
+            self.offsets[record_id] = offsets
+
+        self.next_record_id = max(self.next_record_id, record_id + 1)
+
+    def write_file(self, chunks: list[bytes]) -> None:
+        """Write a whole new file (via a temporary file) and index its records"""
+
+        temp_path: Path = self.path.with_name(f"{self.path.name}.tmp")
+
+        with open(file=temp_path, mode="wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(src=temp_path, dst=self.path)
+        fsync_directory(path=self.path)
+
+        # NOTE: Everything appended before is in the new (synced) file
+        self.unsynced_records = 0
+
+        self.offsets.clear()
+        self.dead_records = 0
+
+        offset: int = len(chunks[0])
+        for chunk in chunks[1:]:
+            _, record_id, _ = RECORD_HEADER.unpack_from(chunk)
+            self.offsets[record_id] = (offset, offset + len(chunk))
+            offset += len(chunk)
+
+        self.end_offset = offset
+
+    def back_up_tail(self, file_size: int) -> Path | None:
+        """
+        Back up the file if it has bytes past the last replayed record (a
+        torn record), before they are dropped
+
+        Args:
+            file_size (int): Size of the file
+
+        Returns:
+            Path: Backup file path (None if there is nothing to drop)
+
+        Raises:
+            VaultFormatError: If the file is shorter than its records
+        """
+
+        if file_size < self.end_offset:
+            raise VaultFormatError("Vault file is shorter than its records!")
+
+        if file_size == self.end_offset:
+            return None
+
+        result: Path = self.path.with_name(f"{self.path.name}.{time.time_ns()}.torn")
+
+        shutil.copy2(src=self.path, dst=result)
+
+        with open(file=result, mode="rb") as file:
+            os.fsync(file.fileno())
+
+        fsync_directory(path=result)
+
+        return result
+
+    def drop_tail(self, file_size: int) -> None:
+        """Back up the file, then truncate it to the last replayed record"""
+
+        with self.lock:
+            if not self.back_up_tail(file_size=file_size):
+                return
+
+            with open(file=self.path, mode="r+b") as file:
+                file.truncate(self.end_offset)
+                file.flush()
+                os.fsync(file.fileno())
+
+    def save(self, puts: dict[int, Tuple[str, str]], deletes: list[int]) -> None:
+        """Append replacement records for puts and tombstones for deletes"""
+
+        records: list[Tuple[int, int, bytes]] = []
+
+        for record_id, (plain_text, secrets_text) in puts.items():
+            record: bytes = self.pack_record(
+                kind=RECORD_KIND_PUT_COMPRESSED,
+                record_id=record_id,
+                plain_text=plain_text,
+                secrets_text=secrets_text,
+            )
+            records.append((RECORD_KIND_PUT_COMPRESSED, record_id, record))
+
+        for record_id in deletes:
+            record = self.pack_record(
+                kind=RECORD_KIND_DELETE,
+                record_id=record_id,
+            )
+            records.append((RECORD_KIND_DELETE, record_id, record))
+
+        if not records:
+            return
+
+        with self.lock:
+            with open(file=self.path, mode="r+b") as file:
+                # NOTE: Drop a torn record left by an interrupted append (the
+                # whole file is backed up first)
+                if self.back_up_tail(file_size=file.seek(0, os.SEEK_END)):
+                    file.truncate(self.end_offset)
+
+                file.seek(self.end_offset)
+                file.write(b"".join(record for _, _, record in records))
+                file.flush()
+
+                self.unsynced_records += len(records)
+
+                # NOTE: Group commit
+                if (
+                    self.unsynced_records >= GROUP_COMMIT_RECORDS
+                    or time.monotonic() - self.synced_at >= GROUP_COMMIT_SECONDS
+                ):
+                    os.fsync(file.fileno())
+
+                    self.unsynced_records = 0
+                    self.synced_at = time.monotonic()
+
+                # NOTE: Deadline of the deferred fsync
+                elif not (self.sync_timer and self.sync_timer.is_alive()):
+                    self.sync_timer = threading.Timer(
+                        interval=GROUP_COMMIT_SECONDS,
+                        function=self.sync,
+                    )
+                    self.sync_timer.daemon = True
+                    self.sync_timer.start()
+
+            for kind, record_id, record in records:
+                start: int = self.end_offset
+                self.end_offset += len(record)
+
+                self.replay_record(
+                    kind=kind,
+                    record_id=record_id,
+                    offsets=(start, self.end_offset),
+                )
+
+        if (
+            self.dead_records >= COMPACTION_MIN_DEAD_RECORDS
+            and self.dead_record_ratio > COMPACTION_DEAD_RECORD_RATIO
+        ):
+            self.compact_in_background()
+
+    def sync(self) -> None:
+        """Fsync records that are still waiting for their group commit"""
+
+        with self.lock:
+            if not self.unsynced_records:
+                return
+
+            with open(file=self.path, mode="r+b") as file:
+                os.fsync(file.fileno())
+
+            self.unsynced_records = 0
+            self.synced_at = time.monotonic()
+
+    def compact(self) -> None:
+        """Rewrite the file with live records only (copied, not re-encrypted)"""
+
+        with self.lock:
+            with open(file=self.path, mode="rb") as file:
+                data: bytes = file.read()
+
+            self.back_up_tail(file_size=len(data))
+
+            view = memoryview(data)
+
+            chunks: list[bytes] = [self.pack_header()]
+            for start, end in sorted(self.offsets.values()):
+                chunks.append(view[start:end])
+
+            self.write_file(chunks=chunks)
+
+    def compact_in_background(self) -> None:
+        """Start compaction in a background thread (if not running)"""
+
+        if self.compaction_thread and self.compaction_thread.is_alive():
+            return
+
+        self.compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self.compaction_thread.start()
+
+    def wait_for_compaction(self) -> None:
+        """Wait for a running background compaction"""
+
+        if self.compaction_thread:
+            self.compaction_thread.join()
+
+    def change_session(self, session: VaultSession) -> None:
+        """Re-wrap the data key for a new master password"""
+
+        self.wait_for_compaction()
+
+        self.session = session
+        self.compact()
+
+    def backup(self, target_path: Path) -> None:
+        """Copy the log file (no append or compaction runs meanwhile)"""
+
+        self.sync()
+
+        with self.lock:
+            shutil.copy2(src=self.path, dst=target_path)
+
+    def close(self) -> None:
+        """Fsync pending records and wait for a running compaction"""
+
+        if self.sync_timer:
+            self.sync_timer.cancel()
+
+        self.sync()
+        self.wait_for_compaction()
+
+
+class VaultItems:
+    """
+    Vault items by their stable id, tracking their own mutations
+
+    Every item has a stable, never reused record id (stored in the vault
+    file) and items are kept in a dictionary by that id, so a lookup, an
+    add or a delete is O(1) and touches no other item. The display order
+    (by casefolded name) is a separate list that is kept sorted
+    incrementally: an add, rename or delete is a binary search over the
+    cached sort keys (O(log n) comparisons), not a sort of the whole vault.
+
+    Adds, edits and duplicates mark the item as changed and deletes remember
+    its record id, so a save only writes the records that changed. The
+    digest of every record persisted in this session is remembered too, so
+    an item that was edited back to its old values is not written again.
+
+    Loaded items only hold their index tier. A changed item must hold its
+    secrets (password, description) too, until it is saved.
+
+    Password reuse is indexed too: a keyed hash of every password (the
+    'password_tag' of the item, computed when the item is changed) maps to
+    the ids of the items that use it, so a reuse check is O(1). The strength
+    score of a password is cached in the item and only estimated again when
+    its tag (so its password) changes.
+
+    The search index (name, email and username) is built on the first
+    search and then kept up to date by every add, edit and delete. So is the
+    description index, but it is built from decrypted descriptions (see
+    'load_description_index') and only lives in memory.
+    """
+
+    def __init__(self) -> None:
+        self.generation: int = 0
+        self.next_record_id: int = 1
+
+        self.records: dict[int, VaultItem] = {}
+
+        # NOTE: Password tag -> record ids, and record id -> its indexed tag
+        self.password_tag_key: bytes = b""
+        self.password_reuse: dict[str, set[int]] = {}
+        self.password_tags: dict[int, str] = {}
+
+        self.changed: dict[int, VaultItem] = {}
+        self.deleted: set[int] = set()
+        self.saved_digests: dict[int, str | None] = {}
+
+        # NOTE: Display order, 'sort_keys[i]' is the key of 'sorted_items[i]'
+        self.sort_keys: list[Tuple[str, int]] = []
+        self.sorted_items: list[VaultItem] = []
+
+        self.search_index: SearchIndex | None = None
+        self.description_index: DescriptionIndex | None = None
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records.values())
+
+    def __contains__(self, record_id: int) -> bool:
+        return record_id in self.records
+
+    @property
+    def is_dirty(self) -> bool:
+        """Check if items changed after the last load or save"""
+
+        result: bool = bool(self.changed or self.deleted)
+
+        return result
+
+    def get(self, record_id: int) -> VaultItem | None:
+        """Get item by its record id"""
+
+        result: VaultItem | None = self.records.get(record_id)
+
+        return result
+
+    def get_sorted(self) -> list[VaultItem]:
+        """Get items in display order (do not change the returned list)"""
+
+        return self.sorted_items
+
+    def get_sorted_index(self, name: str) -> int:
+        """
+        Get the display order index of the first item whose name starts with
+        'name' (also after 'https://www.' and alike), else of the first item
+        whose name is not before 'name'
+        """
+
+        name = name.casefold()
+
+        for scheme in ("", "https://", "http://"):
+            for subdomain in ("", "www."):
+                prefix: str = f"{scheme}{subdomain}{name}"
+
+                index: int = bisect.bisect_left(self.sort_keys, (prefix, 0))
+                if index == len(self.sort_keys):
+                    continue
+
+                sort_name, _ = self.sort_keys[index]
+                if sort_name.startswith(prefix):
+                    return index
+
+        result: int = bisect.bisect_left(self.sort_keys, (name, 0))
+
+        return result
+
+    def insert_sorted(self, item: VaultItem) -> None:
+        """Insert item in display order (and cache its sort key)"""
+
+        item.sort_key = item.get_sort_key()
+
+        index: int = bisect.bisect_left(self.sort_keys, item.sort_key)
+
+        self.sort_keys.insert(index, item.sort_key)
+        self.sorted_items.insert(index, item)
+
+    def remove_sorted(self, item: VaultItem) -> None:
+        """Remove item from display order (by its cached sort key)"""
+
+        index: int = bisect.bisect_left(self.sort_keys, item.sort_key)
+
+        del self.sort_keys[index]
+        del self.sorted_items[index]
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list[VaultItem]:
+        """Search items by name, email and username (best match first)"""
+
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.search_index.load(items=self.records.values())
+
+        record_ids: list[int] = self.search_index.search(query=query, limit=limit)
+
+        result: list[VaultItem] = [self.records[record_id] for record_id in record_ids]
+
+        return result
+
+    def load_description_index(self, descriptions: dict[int, str]) -> None:
+        """Build the description index, record id -> decrypted description"""
+
+        self.description_index = DescriptionIndex()
+        self.description_index.load(descriptions=descriptions)
+
+    def search_descriptions(
+        self,
+        query: str,
+        limit: int = DEFAULT_SEARCH_LIMIT,
+    ) -> list[VaultItem]:
+        """Search descriptions (load the description index first)"""
+
+        record_ids: list[int] = self.description_index.search(query=query, limit=limit)
+
+        result: list[VaultItem] = [self.records[record_id] for record_id in record_ids]
+
+        return result
+
+    def get_password_tag(self, password: str) -> str:
+        """Get the keyed hash of a password (equal passwords, equal tags)"""
+
+        result: str = hmac.digest(
+            self.password_tag_key,
+            password.encode(encoding="utf-8"),
+            "sha256",
+        ).hex()
+
+        return result
+
+    def index_password_tag(self, item: VaultItem) -> None:
+        """Move item to its current password tag in the reuse index"""
+
+        previous_tag: str | None = self.password_tags.pop(item.record_id, None)
+        if previous_tag:
+            record_ids: set[int] = self.password_reuse[previous_tag]
+            record_ids.discard(item.record_id)
+
+            if not record_ids:
+                del self.password_reuse[previous_tag]
+
+        if item.password_tag and item.record_id in self.records:
+            self.password_tags[item.record_id] = item.password_tag
+            self.password_reuse.setdefault(item.password_tag, set()).add(item.record_id)
+
+    def get_password_reuse(self, item: VaultItem) -> set[int]:
+        """Get ids of the other items that use the password of item"""
+
+        record_ids: set[int] = self.password_reuse.get(item.password_tag, set())
+
+        result: set[int] = record_ids - {item.record_id}
+
+        return result
+
+    def touch(self, item: VaultItem) -> None:
+        """Record a mutation (use it after editing an item in place)"""
+
+        # NOTE: A changed item holds its password
+        if item.password is not None:
+            password_tag: str = self.get_password_tag(password=item.password)
+
+            if password_tag != item.password_tag or item.password_score is None:
+                item.password_score, _, _ = estimate_password_strength(
+                    password=item.password,
+                )
+
+            item.password_tag = password_tag
+
+        self.index_password_tag(item=item)
+
+        # NOTE: Only a rename moves the item in display order
+        if item.sort_key != item.get_sort_key():
+            self.remove_sorted(item=item)
+            self.insert_sorted(item=item)
+
+        if self.search_index is not None:
+            self.search_index.add(item=item)
+
+        # NOTE: A changed item holds its description
+        if self.description_index is not None and item.description is not None:
+            self.description_index.add(
+                record_id=item.record_id,
+                description=item.description,
+            )
+
+        self.generation += 1
+        item.version = self.generation
+        self.changed[item.record_id] = item
+
+    def get_changes(self) -> Tuple[dict[int, Tuple[str, str]], list[int]]:
+        """
+        Get records to save
+
+        Returns:
+            tuple: (changed records as record id -> (index, secrets) JSON,
+            deleted ids)
+        """
+
+        puts: dict[int, Tuple[str, str]] = {}
+        for record_id, item in self.changed.items():
+            plain_text, secrets_text = serialize_item(item=item)
+            digest: str = hash_data(data=plain_text + secrets_text)
+
+            if self.saved_digests.get(record_id) != digest:
+                puts[record_id] = plain_text, secrets_text
+
+        deletes: list[int] = sorted(self.deleted)
+
+        return puts, deletes
+
+    def mark_saved(self, puts: dict[int, Tuple[str, str]], deletes: list[int]) -> None:
+        """Remember saved records and drop secrets of saved items from memory"""
+
+        for record_id, (plain_text, secrets_text) in puts.items():
+            self.saved_digests[record_id] = hash_data(data=plain_text + secrets_text)
+
+        for record_id in deletes:
+            self.saved_digests.pop(record_id, None)
+
+        for item in self.changed.values():
+            item.set_secrets(secrets={})
+
+        self.changed.clear()
+        self.deleted.clear()
+
+    def load(
+        self,
+        records: dict[int, str],
+        next_record_id: int,
+        password_tag_key: bytes,
+    ) -> None:
+        """Replace all items with persisted (index tier) records"""
+
+        self.records.clear()
+        self.saved_digests.clear()
+
+        self.password_tag_key = password_tag_key
+        self.password_reuse.clear()
+        self.password_tags.clear()
+
+        # NOTE: Loaded items are new versions of their record ids
+        self.generation += 1
+
+        for record_id, plain_text in records.items():
+            item = VaultItem.from_dict(data=json.loads(s=plain_text))
+            item.record_id = record_id
+            item.version = self.generation
+
+            self.records[record_id] = item
+            item.sort_key = item.get_sort_key()
+
+            self.index_password_tag(item=item)
+
+            # NOTE: Secrets digest is unknown until they are decrypted
+            self.saved_digests[record_id] = None
+
+        # NOTE: The only full sort, when the vault is loaded
+        self.sorted_items = sorted(self.records.values(), key=lambda item: item.sort_key)
+        self.sort_keys = [item.sort_key for item in self.sorted_items]
+
+        self.search_index = None
+        self.description_index = None
+
+        self.next_record_id = next_record_id
+
+        self.changed.clear()
+        self.deleted.clear()
+
+    def append(self, item: VaultItem) -> None:
+        """Add a new item with a new record id"""
+
+        item.record_id = self.next_record_id
+        self.next_record_id += 1
+
+        self.records[item.record_id] = item
+        self.insert_sorted(item=item)
+        self.touch(item=item)
+
+    def remove(self, record_id: int) -> VaultItem:
+        """Delete item by its record id"""
+
+        item: VaultItem = self.records.pop(record_id)
+        self.remove_sorted(item=item)
+        self.index_password_tag(item=item)
+
+        if self.search_index is not None:
+            self.search_index.remove(record_id=record_id)
+
+        if self.description_index is not None:
+            self.description_index.remove(record_id=record_id)
+
+        self.generation += 1
+        self.changed.pop(record_id, None)
+        if record_id in self.saved_digests:
+            self.deleted.add(record_id)
+
+        return item
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
@@ -0,0 +1,580 @@
+"""
+Application Vault (SQLite Storage)
+"""
+
+import os
+import json
+import struct
+import sqlite3
+
+from typing import Tuple
+from pathlib import Path
+
+from app_constants import KEY_NAME_INSERT_TIME
+from app_constants import KEY_NAME_UPDATE_TIME
+
+from app_vault import KEY_LENGTH
+from app_vault import TAG_LENGTH
+from app_vault import NONCE_LENGTH
+from app_vault import PART_INDEX
+from app_vault import PART_SECRETS
+from app_vault import VAULT_FORMAT_VERSION_SQLITE
+from app_vault import MESSAGE_DECRYPTION_FAILED
+from app_vault import VaultStorage
+from app_vault import VaultSession
+from app_vault import VaultFormatError
+from app_vault import VaultDecryptionError
+from app_vault import fsync_directory
+from app_vault import unpack_vault_header
+
+from dt_cryptography import encrypt_bytes
+from dt_cryptography import decrypt_bytes
+
+from dt_compression import CODEC_NONE
+from dt_compression import compress
+from dt_compression import decompress
+
+
+# NOTE: One row per item. Sensitive fields are AES-GCM sealed columns
+# (nonce | ciphertext | tag), the index tier and the secrets tier of
+# 'serialize_item'. Only the (non secret) times are plain, indexed columns.
+#
+# The associated data of a sealed column is:
+#
+#   record id (Q) | codec (B) | insert time | 0x00 | update time | part
+#
+# so a column can not be moved to another row (or part) and the plain
+# columns of a row can not be tampered.
+#
+# The 'vault' table holds the vault header (version 3), the wrapped data key
+# (associated data: the header) and the next record id.
+#
+# The 'tokens' table is the blind index: one keyed hash token per indexed
+# field value of a row (see 'BLIND_INDEX_FIELD_NAMES'), written in the same
+# transaction as the row. A token can not be verified or reversed without
+# the data key, it only points to the rows to decrypt.
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS vault (
+    name TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    record_id INTEGER PRIMARY KEY,
+    codec INTEGER NOT NULL,
+    insert_time TEXT NOT NULL,
+    update_time TEXT NOT NULL,
+    index_data BLOB NOT NULL,
+    secrets_data BLOB NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS items_insert_time ON items (insert_time);
+CREATE INDEX IF NOT EXISTS items_update_time ON items (update_time);
+"""
+
+# NOTE: Separate statements, so a database from before the blind index gets
+# the table and its tokens in one transaction ('executescript' commits)
+TOKENS_SCHEMA: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS tokens (
+        token BLOB NOT NULL,
+        record_id INTEGER NOT NULL,
+        PRIMARY KEY (token, record_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS tokens_record_id ON tokens (record_id)",
+)
+
+ROW_HEADER = struct.Struct(">QB")
+
+SQLITE_MAGIC: bytes = b"SQLite format 3\x00"
+
+# NOTE: SQLite limits the number of '?' parameters of one statement
+MAX_QUERY_PARAMETERS: int = 500
+
+
+def is_sqlite_database(data: bytes) -> bool:
+    """Check if data starts with the SQLite database magic bytes"""
+
+    result: bool = data[: len(SQLITE_MAGIC)] == SQLITE_MAGIC
+
+    return result
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Open a vault database (WAL mode, full fsync on commit)"""
+
+    connection = sqlite3.connect(database=path)
+
+    # NOTE: Readers do not block the writer (and the other way around)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+
+    return connection
+
+
+class VaultSqlite(VaultStorage):
+    """
+    SQLite vault database, one row per item
+
+    Saving an item writes its own row in one transaction and reading its
+    secrets selects its own row, the rest of the vault is not touched.
+    Insert and update times are indexed columns, so listing or filtering by
+    them does not need any decryption, and so is the blind index of the
+    name, email, mobile and username of every row ('find_records').
+    """
+
+    has_blind_index: bool = True
+
+    def __init__(
+        self,
+        path: Path,
+        session: VaultSession,
+        data_key: bytes,
+        connection: sqlite3.Connection,
+    ) -> None:
+        super().__init__(path=path, session=session, data_key=data_key)
+
+        self.connection: sqlite3.Connection = connection
+
+    @staticmethod
+    def pack_associated_data(
+        record_id: int,
+        codec: int,
+        insert_time: str,
+        update_time: str,
+        part: bytes,
+    ) -> bytes:
+        """Pack the associated data of one sealed column"""
+
+        result: bytes = b"".join(
+            (
+                ROW_HEADER.pack(record_id, codec),
+                insert_time.encode(encoding="utf-8"),
+                b"\x00",
+                update_time.encode(encoding="utf-8"),
+                part,
+            )
+        )
+
+        return result
+
+    def pack_row(
+        self,
+        record_id: int,
+        plain_text: str,
+        secrets_text: str,
+    ) -> Tuple[int, int, str, str, bytes, bytes]:
+        """Encrypt one (index, secrets) record as an 'items' row"""
+
+        index: dict = json.loads(s=plain_text)
+
+        insert_time: str = index.get(KEY_NAME_INSERT_TIME, "")
+        update_time: str = index.get(KEY_NAME_UPDATE_TIME, "")
+
+        sealed: list[bytes] = []
+        for part, text in ((PART_INDEX, plain_text), (PART_SECRETS, secrets_text)):
+            data: bytes = compress(
+                data=text.encode(encoding="utf-8"),
+                codec=self.codec,
+            )
+
+            sealed.append(
+                self.seal(
+                    data=data,
+                    associated_data=self.pack_associated_data(
+                        part=part,
+                        codec=self.codec,
+                        record_id=record_id,
+                        insert_time=insert_time,
+                        update_time=update_time,
+                    ),
+                )
+            )
+
+        result = record_id, self.codec, insert_time, update_time, *sealed
+
+        return result
+
+    def pack_tokens(self, record_id: int, plain_text: str) -> list[Tuple[bytes, int]]:
+        """Get the 'tokens' rows of one record"""
+
+        tokens: set[bytes] = self.get_blind_tokens(index=json.loads(s=plain_text))
+
+        result: list[Tuple[bytes, int]] = [(token, record_id) for token in tokens]
+
+        return result
+
+    def write_tokens(self, records: dict[int, str]) -> None:
+        """Replace the tokens of records, record id -> index JSON (in a transaction)"""
+
+        self.connection.executemany(
+            "DELETE FROM tokens WHERE record_id = ?",
+            [(record_id,) for record_id in records],
+        )
+
+        for record_id, plain_text in records.items():
+            self.connection.executemany(
+                "INSERT INTO tokens VALUES (?, ?)",
+                self.pack_tokens(record_id=record_id, plain_text=plain_text),
+            )
+
+    def open_column(self, row: tuple, part: bytes) -> bytes:
+        """Decrypt the index or secrets column of a selected row"""
+
+        record_id, codec, insert_time, update_time, sealed = row
+
+        data: bytes = self.open_sealed(
+            sealed=memoryview(sealed),
+            associated_data=self.pack_associated_data(
+                part=part,
+                codec=codec,
+                record_id=record_id,
+                insert_time=insert_time,
+                update_time=update_time,
+            ),
+        )
+
+        result: bytes = decompress(data=data, codec=codec)
+
+        return result
+
+    def write_key(self) -> None:
+        """Write the header and the wrapped data key (in a transaction)"""
+
+        header: bytes = self.session.pack_header(
+            version=VAULT_FORMAT_VERSION_SQLITE,
+        )
+
+        nonce, wrapped_key, tag = encrypt_bytes(
+            key=self.session.key,
+            data=self.data_key,
+            associated_data=header,
+        )
+
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO vault (name, value) VALUES (?, ?)",
+            [
+                ("header", header),
+                ("wrapped_key", b"".join((nonce, wrapped_key, tag))),
+                ("next_record_id", self.next_record_id),
+            ],
+        )
+
+    @classmethod
+    def create(
+        cls,
+        path: Path,
+        session: VaultSession,
+        records: dict[int, Tuple[str, str]],
+        next_record_id: int = 1,
+        codec: int = CODEC_NONE,
+        data_key: bytes | None = None,
+    ) -> "VaultSqlite":
+        """Create a new database with (index, secrets) records"""
+
+        temp_path: Path = path.with_name(f"{path.name}.tmp")
+        temp_path.unlink(missing_ok=True)
+
+        # NOTE: Rollback journal (no WAL files) while it is a temporary file
+        connection = sqlite3.connect(database=temp_path)
+        connection.execute("PRAGMA synchronous=FULL")
+
+        vault = cls(
+            path=path,
+            session=session,
+            connection=connection,
+            data_key=data_key or os.urandom(KEY_LENGTH),
+        )
+        vault.codec = codec
+        vault.next_record_id = max([next_record_id, *(id + 1 for id in records)])
+
+        connection.executescript(SCHEMA)
+
+        with connection:
+            connection.execute("BEGIN")
+
+            for statement in TOKENS_SCHEMA:
+                connection.execute(statement)
+
+            vault.write_key()
+
+            connection.executemany(
+                "INSERT INTO items VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    vault.pack_row(
+                        record_id=record_id,
+                        plain_text=plain_text,
+                        secrets_text=secrets_text,
+                    )
+                    for record_id, (plain_text, secrets_text) in records.items()
+                ),
+            )
+
+            vault.write_tokens(
+                records={
+                    record_id: plain_text
+                    for record_id, (plain_text, _) in records.items()
+                },
+            )
+
+        connection.close()
+
+        # NOTE: A stale WAL of a replaced database must never be applied
+        for suffix in ("-wal", "-shm"):
+            path.with_name(f"{path.name}{suffix}").unlink(missing_ok=True)
+
+        os.replace(src=temp_path, dst=path)
+        fsync_directory(path=path)
+
+        vault.connection = connect(path=path)
+
+        return vault
+
+    @classmethod
+    def open(
+        cls,
+        path: Path,
+        password: str,
+        codec: int = CODEC_NONE,
+        load_records: bool = True,
+    ) -> Tuple["VaultSqlite", dict[int, str]]:
+        """
+        Unlock a database and decrypt the index column of its rows (unless
+        'load_records' is False, see 'find_records')
+
+        Returns:
+            tuple: (vault, live records as record id -> index JSON)
+
+        Raises:
+            VaultFormatError: If the file is not a valid vault database
+            VaultDecryptionError: If password is wrong or data is tampered
+        """
+
+        connection = connect(path=path)
+
+        try:
+            values: dict = dict(connection.execute("SELECT name, value FROM vault"))
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise VaultFormatError("Vault file has an unknown format!")
+
+        header: bytes = values.get("header", b"")
+
+        version, _, _, _ = unpack_vault_header(view=memoryview(header))
+        if version != VAULT_FORMAT_VERSION_SQLITE:
+            connection.close()
+            raise VaultFormatError(f"Vault format version {version} is not SQLite!")
+
+        wrapped_key: bytes = values.get("wrapped_key", b"")
+        if len(wrapped_key) != NONCE_LENGTH + KEY_LENGTH + TAG_LENGTH:
+            connection.close()
+            raise VaultFormatError("Vault file has an unknown format!")
+
+        session: VaultSession = VaultSession.from_container(
+            data=header,
+            password=password,
+        )
+
+        try:
+            data_key: bytes = decrypt_bytes(
+                key=session.key,
+                nonce=wrapped_key[:NONCE_LENGTH],
+                ciphertext=wrapped_key[NONCE_LENGTH:-TAG_LENGTH],
+                tag=wrapped_key[-TAG_LENGTH:],
+                associated_data=header,
+            )
+        except:
+            connection.close()
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        vault = cls(
+            path=path,
+            session=session,
+            data_key=data_key,
+            connection=connection,
+        )
+        vault.codec = codec
+        vault.next_record_id = values.get("next_record_id", 1)
+
+        has_tokens: bool = bool(
+            connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tokens'"
+            ).fetchone()
+        )
+
+        records: dict[int, str] = {}
+
+        # NOTE: Databases from before the blind index get it once
+        if load_records or not has_tokens:
+            records = vault.read_records()
+
+        if not has_tokens:
+            with connection:
+                connection.execute("BEGIN")
+
+                for statement in TOKENS_SCHEMA:
+                    connection.execute(statement)
+
+                vault.write_tokens(records=records)
+
+            if not load_records:
+                records = {}
+
+        return vault, records
+
+    def find_records(self, field_name: str, value: str) -> list[int]:
+        """
+        Find rows by the exact (normalized) value of a field, by its token
+
+        Returns:
+            list: Record ids (sorted)
+        """
+
+        token: bytes = self.get_blind_token(field_name=field_name, value=value)
+
+        result: list[int] = [
+            record_id
+            for (record_id,) in self.connection.execute(
+                "SELECT record_id FROM tokens WHERE token = ? ORDER BY record_id",
+                (token,),
+            )
+        ]
+
+        return result
+
+    def read_records(self, record_ids: list[int] | None = None) -> dict[int, str]:
+        """
+        Decrypt the index column of rows (selected by primary key, or all)
+
+        Returns:
+            dict: record id -> index JSON (of the rows that exist)
+        """
+
+        query: str = (
+            "SELECT record_id, codec, insert_time, update_time, index_data FROM items"
+        )
+
+        # NOTE: One query for all rows, else one per chunk of record ids
+        queries: list[Tuple[str, list[int]]] = [(query, [])]
+        if record_ids is not None:
+            queries = []
+            for start in range(0, len(record_ids), MAX_QUERY_PARAMETERS):
+                chunk: list[int] = record_ids[start : start + MAX_QUERY_PARAMETERS]
+                parameters: str = ", ".join("?" * len(chunk))
+
+                queries.append((f"{query} WHERE record_id IN ({parameters})", chunk))
+
+        result: dict[int, str] = {}
+
+        for statement, chunk in queries:
+            for row in self.connection.execute(statement, chunk):
+                plain_text: bytes = self.open_column(row=row, part=PART_INDEX)
+
+                result[row[0]] = plain_text.decode(encoding="utf-8")
+
+        return result
+
+    def read_secrets(self, record_ids: list[int]) -> dict[int, dict]:
+        """
+        Decrypt the secrets column of rows (selected by primary key)
+
+        Returns:
+            dict: record id -> secret fields (password, description)
+        """
+
+        result: dict[int, dict] = {}
+
+        for start in range(0, len(record_ids), MAX_QUERY_PARAMETERS):
+            chunk: list[int] = record_ids[start : start + MAX_QUERY_PARAMETERS]
+            parameters: str = ", ".join("?" * len(chunk))
+
+            for row in self.connection.execute(
+                "SELECT record_id, codec, insert_time, update_time, secrets_data "
+                f"FROM items WHERE record_id IN ({parameters})",
+                chunk,
+            ):
+                secrets_text: bytes = self.open_column(row=row, part=PART_SECRETS)
+
+                result[row[0]] = json.loads(s=secrets_text)
+
+        missing: set[int] = set(record_ids) - set(result)
+        if missing:
+            raise VaultDecryptionError(MESSAGE_DECRYPTION_FAILED)
+
+        return result
+
+    def save(self, puts: dict[int, Tuple[str, str]], deletes: list[int]) -> None:
+        """Upsert changed rows and delete removed rows (one transaction)"""
+
+        if not puts and not deletes:
+            return
+
+        rows: list[tuple] = [
+            self.pack_row(
+                record_id=record_id,
+                plain_text=plain_text,
+                secrets_text=secrets_text,
+            )
+            for record_id, (plain_text, secrets_text) in puts.items()
+        ]
+
+        self.next_record_id = max(
+            [self.next_record_id, *(record_id + 1 for record_id in puts)]
+        )
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+            self.connection.executemany(
+                "DELETE FROM items WHERE record_id = ?",
+                [(record_id,) for record_id in deletes],
+            )
+
+            self.write_tokens(
+                records={
+                    record_id: plain_text
+                    for record_id, (plain_text, _) in puts.items()
+                },
+            )
+
+            self.connection.executemany(
+                "DELETE FROM tokens WHERE record_id = ?",
+                [(record_id,) for record_id in deletes],
+            )
+
+            self.connection.execute(
+                "UPDATE vault SET value = ? WHERE name = 'next_record_id'",
+                (self.next_record_id,),
+            )
+
+    def change_session(self, session: VaultSession) -> None:
+        """Re-wrap the data key for a new master password (rows stay as they are)"""
+
+        self.session = session
+
+        with self.connection:
+            self.write_key()
+
+    def backup(self, target_path: Path) -> None:
+        """Copy a consistent snapshot of the database (including the WAL)"""
+
+        target = sqlite3.connect(database=target_path)
+
+        try:
+            self.connection.backup(target)
+        finally:
+            target.close()
+
+    def close(self) -> None:
+        """Checkpoint the WAL into the database and close it"""
+
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.connection.close()
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
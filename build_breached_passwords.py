@@ -0,0 +1,60 @@
+"""
+Build Breached Passwords
+
+Converts a breached-password list of SHA-1 hashes, ordered by hash (like
+the 'Have I Been Pwned' download: 'HASH:COUNT' lines), into the corpus
+file (and prefix index) that DT Password Manager checks passwords against.
+
+Usage:
+    python .\\build_breached_passwords.py [source text file] [hash size]
+"""
+
+import sys
+import time
+
+from app_constants import BREACHED_PASSWORDS_FILE_PATH
+
+from dt_breached_passwords import MAX_HASH_SIZE
+from dt_breached_passwords import build_corpus
+
+
+def main() -> None:
+    """The main of program"""
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    source_path: str = sys.argv[1]
+
+    # NOTE: Truncated hashes (e.g. 8 bytes) make a smaller file, with rare
+    # false positives
+    hash_size: int = MAX_HASH_SIZE
+    if len(sys.argv) > 2:
+        hash_size = int(sys.argv[2])
+
+    start: float = time.perf_counter()
+
+    with open(file=source_path, mode="rt", encoding="ascii") as file:
+        hash_count: int = build_corpus(
+            lines=file,
+            hash_size=hash_size,
+            corpus_path=str(BREACHED_PASSWORDS_FILE_PATH),
+        )
+
+    duration: float = time.perf_counter() - start
+
+    print(
+        f"[+] {hash_count:,} hashes written to "
+        f"'{BREACHED_PASSWORDS_FILE_PATH}' in {duration:,.1f} seconds."
+    )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+
+    except Exception as error:
+        print(f"[-] {error}")
+
+    print()
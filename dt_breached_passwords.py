@@ -0,0 +1,435 @@
+"""
+DT Breached Passwords
+
+Offline check of passwords against a breached-password corpus (like the
+'Have I Been Pwned' SHA-1 list), without loading the corpus into memory.
+
+Corpus file: a small header, then the sorted SHA-1 hashes of the breached
+passwords, every one truncated to the same size (20 bytes, or less for a
+smaller file with rare false positives). The file is memory-mapped and
+binary-searched, so only the few pages that a lookup touches are read.
+
+Prefix index file ('<corpus>.idx', optional): for every 16-bit hash prefix,
+the position of its first hash in the corpus, so a lookup seeks right into
+its (small) bucket instead of searching the whole file.
+"""
+
+import os
+import mmap
+import struct
+import hashlib
+
+from typing import Tuple
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+__version__ = "1.0.0"
+
+CORPUS_MAGIC: bytes = b"DTBP"
+CORPUS_VERSION: int = 1
+
+# NOTE: Magic, version, hash size, reserved
+CORPUS_HEADER: struct.Struct = struct.Struct(">4sBBH")
+
+INDEX_MAGIC: bytes = b"DTBI"
+INDEX_VERSION: int = 1
+INDEX_FILE_SUFFIX: str = ".idx"
+
+# NOTE: Magic, version, prefix bits, reserved, hash count of the corpus
+INDEX_HEADER: struct.Struct = struct.Struct(">4sBBHQ")
+INDEX_ENTRY: struct.Struct = struct.Struct(">Q")
+
+PREFIX_BITS: int = 16
+PREFIX_SIZE: int = PREFIX_BITS // 8
+BUCKET_COUNT: int = 1 << PREFIX_BITS
+
+MIN_HASH_SIZE: int = 4
+MAX_HASH_SIZE: int = hashlib.sha1().digest_size
+
+# NOTE: Below this many passwords, starting worker processes costs more
+# than the lookups themselves
+MIN_PARALLEL_PASSWORDS: int = 50_000
+
+WRITE_BUFFER_SIZE: int = 1 << 20
+
+
+def get_password_hash(password: str) -> bytes:
+    """
+    Get the (full) SHA-1 hash of a password, as used by breached-password lists
+
+    Args:
+        password (str): Password
+
+    Returns:
+        bytes: 20 bytes SHA-1 digest
+    """
+
+    result: bytes = hashlib.sha1(password.encode("utf-8")).digest()
+
+    return result
+
+
+def get_index_path(corpus_path: str) -> str:
+    """Get the prefix index file path of a corpus file"""
+
+    result: str = f"{corpus_path}{INDEX_FILE_SUFFIX}"
+
+    return result
+
+
+def _parse_hash_lines(lines: Iterable[str]) -> Iterator[bytes]:
+    """Yield hashes of text lines like 'HASH' or 'HASH:COUNT' (HIBP format)"""
+
+    for line in lines:
+        text: str = line.split(":", 1)[0].strip()
+        if not text:
+            continue
+
+        digest: bytes = bytes.fromhex(text)
+        if len(digest) != MAX_HASH_SIZE:
+            message: str = f"'{text}' is not a SHA-1 hash!"
+            raise ValueError(message)
+
+        yield digest
+
+
+def _write_index(file: BinaryIO, offsets: list[int], hash_count: int) -> None:
+    """Write a prefix index (bucket start positions, then the hash count)"""
+
+    file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, PREFIX_BITS, 0, hash_count))
+
+    for offset in offsets:
+        file.write(INDEX_ENTRY.pack(offset))
+
+    file.write(INDEX_ENTRY.pack(hash_count))
+
+
+def build_corpus(
+    lines: Iterable[str],
+    corpus_path: str,
+    hash_size: int = MAX_HASH_SIZE,
+) -> int:
+    """
+    Build a corpus file and its prefix index from sorted SHA-1 hash lines
+
+    Args:
+        lines (Iterable[str]): Sorted 'HASH' or 'HASH:COUNT' text lines
+        (the 'Have I Been Pwned' download, ordered by hash)
+        corpus_path (str): Corpus file path (the index is written next to it)
+        hash_size (int): Stored bytes of every hash (4 to 20)
+
+    Returns:
+        int: Count of (distinct) hashes in the corpus
+    """
+
+    if not MIN_HASH_SIZE <= hash_size <= MAX_HASH_SIZE:
+        message: str = (
+            f"Hash size must be from {MIN_HASH_SIZE} to {MAX_HASH_SIZE} bytes!"
+        )
+        raise ValueError(message)
+
+    # NOTE: Start position of every bucket, missing buckets are filled in
+    # with the start of the next one at the end
+    offsets: list[int] = [-1] * BUCKET_COUNT
+    hash_count: int = 0
+    previous: bytes = b""
+
+    buffer = bytearray()
+
+    with open(file=corpus_path, mode="wb") as file:
+        file.write(CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, hash_size, 0))
+
+        for digest in _parse_hash_lines(lines=lines):
+            digest = digest[:hash_size]
+
+            # NOTE: Truncated hashes may collide, one copy is enough
+            if digest <= previous:
+                if digest == previous:
+                    continue
+
+                message = "Hashes are not sorted (sort the source by hash)!"
+                raise ValueError(message)
+
+            bucket: int = int.from_bytes(digest[:PREFIX_SIZE], "big")
+            if offsets[bucket] < 0:
+                offsets[bucket] = hash_count
+
+            buffer += digest
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                file.write(buffer)
+                buffer.clear()
+
+            hash_count += 1
+            previous = digest
+
+        file.write(buffer)
+
+    next_offset: int = hash_count
+    for bucket in range(BUCKET_COUNT - 1, -1, -1):
+        if offsets[bucket] < 0:
+            offsets[bucket] = next_offset
+        next_offset = offsets[bucket]
+
+    with open(file=get_index_path(corpus_path=corpus_path), mode="wb") as file:
+        _write_index(file=file, offsets=offsets, hash_count=hash_count)
+
+    return hash_count
+
+
+class BreachedPasswords:
+    """
+    A memory-mapped breached-password corpus
+
+    Lookups binary-search the mapped file, inside the bucket of the hash
+    prefix when the prefix index file exists (a couple of page reads per
+    lookup, even for a corpus of billions of hashes).
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path: str = str(path)
+
+        self._file: BinaryIO = open(file=self.path, mode="rb")
+        self._data: mmap.mmap | None = None
+        self._index_file: BinaryIO | None = None
+        self._index: mmap.mmap | None = None
+
+        try:
+            header: bytes = self._file.read(CORPUS_HEADER.size)
+            if len(header) != CORPUS_HEADER.size:
+                raise ValueError("Breached passwords file is too short!")
+
+            magic, version, hash_size, _ = CORPUS_HEADER.unpack(header)
+            if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+                raise ValueError("Breached passwords file has an unknown format!")
+
+            if not MIN_HASH_SIZE <= hash_size <= MAX_HASH_SIZE:
+                raise ValueError("Breached passwords file has an unknown hash size!")
+
+            self.hash_size: int = hash_size
+
+            size: int = os.fstat(self._file.fileno()).st_size - CORPUS_HEADER.size
+            if size % hash_size:
+                raise ValueError("Breached passwords file is truncated!")
+
+            self.hash_count: int = size // hash_size
+
+            if self.hash_count:
+                self._data = mmap.mmap(
+                    self._file.fileno(),
+                    length=0,
+                    access=mmap.ACCESS_READ,
+                )
+
+            self._open_index()
+
+        except:
+            self.close()
+            raise
+
+    def _open_index(self) -> None:
+        """Map the prefix index file, if it exists and belongs to this corpus"""
+
+        index_path: str = get_index_path(corpus_path=self.path)
+        if not os.path.isfile(index_path):
+            return
+
+        self._index_file = open(file=index_path, mode="rb")
+
+        size: int = os.fstat(self._index_file.fileno()).st_size
+        if size != INDEX_HEADER.size + (BUCKET_COUNT + 1) * INDEX_ENTRY.size:
+            raise ValueError("Breached passwords index file is not valid!")
+
+        self._index = mmap.mmap(
+            self._index_file.fileno(),
+            length=0,
+            access=mmap.ACCESS_READ,
+        )
+
+        magic, version, prefix_bits, _, hash_count = INDEX_HEADER.unpack_from(
+            self._index, 0
+        )
+
+        if (
+            magic != INDEX_MAGIC
+            or version != INDEX_VERSION
+            or prefix_bits != PREFIX_BITS
+            or hash_count != self.hash_count
+        ):
+            raise ValueError(
+                "Breached passwords index file does not match the corpus (rebuild it)!"
+            )
+
+    @property
+    def has_index(self) -> bool:
+        """Check if lookups use the prefix index"""
+
+        result: bool = self._index is not None
+
+        return result
+
+    def _get_bounds(self, key: bytes) -> Tuple[int, int]:
+        """Get the range of hash positions that may hold key"""
+
+        if self._index is None:
+            return 0, self.hash_count
+
+        bucket: int = int.from_bytes(key[:PREFIX_SIZE], "big")
+        position: int = INDEX_HEADER.size + bucket * INDEX_ENTRY.size
+
+        result = struct.unpack_from(">QQ", self._index, position)
+
+        return result
+
+    def contains_hash(self, digest: bytes) -> bool:
+        """
+        Check if a (SHA-1) password hash is in the corpus
+
+        Args:
+            digest (bytes): SHA-1 digest (truncated to the corpus hash size)
+
+        Returns:
+            bool: True, if the hash is found
+        """
+
+        if self._data is None:
+            return False
+
+        key: bytes = digest[: self.hash_size]
+        data: mmap.mmap = self._data
+        size: int = self.hash_size
+
+        low, high = self._get_bounds(key=key)
+
+        while low < high:
+            middle: int = (low + high) // 2
+            start: int = CORPUS_HEADER.size + middle * size
+            value: bytes = data[start : start + size]
+
+            if value < key:
+                low = middle + 1
+            elif value > key:
+                high = middle
+            else:
+                return True
+
+        return False
+
+    def contains_hashes(self, digests: Iterable[bytes]) -> list[bool]:
+        """Check SHA-1 password hashes, in order (see 'contains_hash')"""
+
+        result: list[bool] = [self.contains_hash(digest=digest) for digest in digests]
+
+        return result
+
+    def is_breached(self, password: str) -> bool:
+        """Check if a password is in the corpus"""
+
+        result: bool = self.contains_hash(digest=get_password_hash(password=password))
+
+        return result
+
+    def close(self) -> None:
+        """Unmap and close the corpus (and index) files"""
+
+        for resource in (self._index, self._index_file, self._data, self._file):
+            if resource is not None:
+                resource.close()
+
+        self._index = None
+        self._index_file = None
+        self._data = None
+
+    def __enter__(self) -> "BreachedPasswords":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+# NOTE: The corpus of a worker process (opened once per process)
+_worker_corpus: BreachedPasswords | None = None
+
+
+def _open_worker_corpus(path: str) -> None:
+    """Initialize a worker process"""
+
+    global _worker_corpus
+
+    _worker_corpus = BreachedPasswords(path=path)
+
+
+def _check_worker_hashes(digests: list[bytes]) -> list[bool]:
+    """Check a slice of hashes in a worker process"""
+
+    result: list[bool] = _worker_corpus.contains_hashes(digests=digests)
+
+    return result
+
+
+def check_passwords(
+    path: str,
+    passwords: Iterable[str],
+    workers: int | None = None,
+) -> list[bool]:
+    """
+    Check many passwords against a corpus file
+
+    Only hashes are looked up (and sent to worker processes). Big batches
+    are split across processes, every one with its own mapping of the
+    corpus (the pages are shared by the operating system).
+
+    Args:
+        path (str): Corpus file path
+        passwords (Iterable[str]): Passwords
+        workers (int | None): Worker processes (None: CPU count, 1: in process)
+
+    Returns:
+        list[bool]: True for every breached password, in order
+    """
+
+    digests: list[bytes] = [get_password_hash(password=password) for password in passwords]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(digests) < MIN_PARALLEL_PASSWORDS:
+        with BreachedPasswords(path=path) as corpus:
+            result: list[bool] = corpus.contains_hashes(digests=digests)
+
+        return result
+
+    # NOTE: Sorted lookups walk the corpus forward (better page locality),
+    # contiguous slices keep every worker in its own part of the file
+    order: list[int] = sorted(range(len(digests)), key=digests.__getitem__)
+    sorted_digests: list[bytes] = [digests[index] for index in order]
+
+    slice_size: int = -(-len(sorted_digests) // workers)
+    slices: list[list[bytes]] = [
+        sorted_digests[start : start + slice_size]
+        for start in range(0, len(sorted_digests), slice_size)
+    ]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_open_worker_corpus,
+        initargs=(str(path),),
+    ) as executor:
+        found: list[bool] = [
+            is_found
+            for slice_result in executor.map(_check_worker_hashes, slices)
+            for is_found in slice_result
+        ]
+
+    result = [False] * len(digests)
+    for index, is_found in zip(order, found):
+        result[index] = is_found
+
+    return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
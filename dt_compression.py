@@ -0,0 +1,150 @@
+"""
+DT Compression
+"""
+
+import bz2
+import lzma
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__version__ = "1.0.0"
+
+# NOTE: Codec ids are stored in files, never change or reuse them!
+CODEC_NONE: int = 0
+CODEC_ZLIB: int = 1
+CODEC_LZMA: int = 2
+CODEC_BZ2: int = 3
+CODEC_ZSTD: int = 4
+
+CODEC_NAMES: dict[str, int] = {
+    "none": CODEC_NONE,
+    "zlib": CODEC_ZLIB,
+    "lzma": CODEC_LZMA,
+    "bz2": CODEC_BZ2,
+    "zstd": CODEC_ZSTD,
+}
+
+# NOTE: Preset dictionary for 'zlib': small JSON records mostly repeat the
+# same keys, which a preset dictionary lets zlib reference from the first
+# byte. It is part of the 'zlib' codec format, so it must never change!
+ZLIB_DICTIONARY: bytes = (
+    b'{"name": "", "email": "", "mobile": "", "username": "", '
+    b'"insert_time": "", "update_time": "", '
+    b'{"password": "", "description": ""}'
+    b"@gmail.com@yahoo.com@outlook.com.com.ir.org.net"
+    b"https://www."
+)
+
+# NOTE: Raw LZMA (no container header) and a small dictionary (fast setup)
+# keep small records small
+_LZMA_FILTERS: list[dict] = [{"id": lzma.FILTER_LZMA2, "dict_size": 1 << 16}]
+
+
+def get_available_codecs() -> dict[str, int]:
+    """
+    Get codecs that can be used on this system
+
+    Returns:
+        dict: codec name -> codec id
+    """
+
+    result: dict[str, int] = {
+        name: codec
+        for name, codec in CODEC_NAMES.items()
+        if codec != CODEC_ZSTD or zstandard is not None
+    }
+
+    return result
+
+
+def get_codec(name: str) -> int:
+    """
+    Get codec id by name
+
+    Args:
+        name (str): Codec name ('none', 'zlib', 'lzma', 'bz2' or 'zstd')
+
+    Returns:
+        int: Codec id
+    """
+
+    codecs: dict[str, int] = get_available_codecs()
+
+    if name not in codecs:
+        message: str = f"Compression codec '{name}' is not available!"
+        raise ValueError(message)
+
+    return codecs[name]
+
+
+def compress(data: bytes, codec: int) -> bytes:
+    """
+    Compress data with codec
+
+    Args:
+        data (bytes): Data to compress
+        codec (int): Codec id
+
+    Returns:
+        bytes: Compressed data
+    """
+
+    if codec == CODEC_NONE:
+        return data
+
+    if codec == CODEC_ZLIB:
+        compressor = zlib.compressobj(level=9, zdict=ZLIB_DICTIONARY)
+        return compressor.compress(data) + compressor.flush()
+
+    if codec == CODEC_LZMA:
+        return lzma.compress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+    if codec == CODEC_BZ2:
+        return bz2.compress(data)
+
+    if codec == CODEC_ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor().compress(data)
+
+    message: str = f"Compression codec {codec} is not available!"
+    raise ValueError(message)
+
+
+def decompress(data: bytes, codec: int) -> bytes:
+    """
+    Decompress data compressed with codec
+
+    Args:
+        data (bytes): Data to decompress
+        codec (int): Codec id (as stored with the data)
+
+    Returns:
+        bytes: Decompressed data
+    """
+
+    if codec == CODEC_NONE:
+        return bytes(data)
+
+    if codec == CODEC_ZLIB:
+        decompressor = zlib.decompressobj(zdict=ZLIB_DICTIONARY)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    if codec == CODEC_LZMA:
+        return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+
+    if codec == CODEC_BZ2:
+        return bz2.decompress(data)
+
+    if codec == CODEC_ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    message: str = f"Compression codec {codec} is not available!"
+    raise ValueError(message)
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
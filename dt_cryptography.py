@@ -6,9 +6,15 @@ import os
 import base64
 import random
 import string
+import struct
 import hashlib
+import itertools
 
 from typing import Tuple
+from typing import Union
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
 
 from cryptography.hazmat.backends import default_backend
 
@@ -19,7 +25,24 @@ from cryptography.hazmat.primitives.ciphers import algorithms
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 
-__version__ = "1.1.0"
+__version__ = "1.3.0"
+
+KDF_ITERATIONS: int = 600_000  # OWASP recommendation (2023+)
+
+# NOTE: Streaming AEAD (see 'encrypt_stream'):
+#
+#   magic (4s) | version (B) | chunk size (I) | nonce prefix (7s)
+#   | chunk ciphertext + tag | chunk ciphertext + tag | ...
+#
+# Nonce of chunk N is: nonce prefix (7) | N (4, big-endian) | last flag (1),
+# and the stream header is the associated data of every chunk.
+STREAM_MAGIC: bytes = b"DTSE"
+STREAM_VERSION: int = 1
+STREAM_HEADER = struct.Struct(">4sBI7s")
+STREAM_CHUNK_SIZE: int = 64 * 1024
+# NOTE: A chunk is held in memory (and read before its tag is checked)
+MAX_STREAM_CHUNK_SIZE: int = 16 * 1024 * 1024
+STREAM_TAG_LENGTH: int = 16
 
 
 def generate_password(length: int = 24) -> str:
@@ -73,13 +96,18 @@ def hash_data(data: str) -> str:
     return hashlib.sha256(data.encode()).hexdigest()
 
 
-def derive_key_from_password(password: str, salt: bytes) -> bytes:
+def derive_key_from_password(
+    password: str,
+    salt: bytes,
+    iterations: int = KDF_ITERATIONS,
+) -> bytes:
     """
     Derive a 256-bit encryption key from password using PBKDF2
 
     Args:
         password (str): User's password
         salt (bytes): 16-byte random salt for key derivation
+        iterations (int): PBKDF2 iteration count
 
     Returns:
         bytes: 32-byte (256-bit) key for AES-256
@@ -89,7 +117,7 @@ def derive_key_from_password(password: str, salt: bytes) -> bytes:
         algorithm=hashes.SHA256(),
         length=32,  # 256 bits for AES-256
         salt=salt,
-        iterations=600_000,  # OWASP recommendation (2023+)
+        iterations=iterations,
         backend=default_backend(),
     )
 
@@ -98,32 +126,28 @@ def derive_key_from_password(password: str, salt: bytes) -> bytes:
     return result
 
 
-def encrypt_plain_text(plain_text: str, password: str) -> dict:
+def encrypt_bytes(
+    data: bytes,
+    key: bytes,
+    associated_data: bytes = b"",
+    nonce: bytes = b"",
+) -> Tuple[bytes, bytes, bytes]:
     """
-    Encrypt text using AES-256-GCM (Quantum-resistant symmetric encryption)
-
-    AES-256 provides approximately 128-bit security against quantum computers
-    (Grover's algorithm reduces effective key length by half)
+    Encrypt raw bytes using AES-256-GCM with an already derived key
 
     Args:
-        plaintext (str): Text to encrypt
-        password (str): User's password (minimum 16 characters recommended)
+        data (bytes): Bytes to encrypt
+        key (bytes): 32-byte (256-bit) key for AES-256
+        associated_data (bytes): Authenticated (but not encrypted) data
+        nonce (bytes): 12-byte nonce (random if not given), never reuse it!
 
     Returns:
-        dict: Contains salt, nonce, ciphertext, and authentication tag
+        tuple: (nonce: bytes, ciphertext: bytes, tag: bytes)
     """
 
-    # Generate random salt (16 bytes)
-    salt = os.urandom(16)
-
-    # Derive 256-bit key from password
-    key = derive_key_from_password(
-        salt=salt,
-        password=password,
-    )
-
     # Generate random nonce (12 bytes for GCM)
-    nonce = os.urandom(12)
+    if not nonce:
+        nonce = os.urandom(12)
 
     # Create AES-256-GCM cipher
     cipher = Cipher(
@@ -134,18 +158,85 @@ def encrypt_plain_text(plain_text: str, password: str) -> dict:
 
     encryptor = cipher.encryptor()
 
-    # Encrypt the plaintext
-    ciphertext = (
-        encryptor.update(data=plain_text.encode(encoding="utf-8"))
-        + encryptor.finalize()
-    )
+    if associated_data:
+        encryptor.authenticate_additional_data(data=associated_data)
+
+    # Encrypt the data
+    ciphertext = encryptor.update(data=data) + encryptor.finalize()
 
     # Get authentication tag (prevents tampering)
     tag = encryptor.tag
 
+    return nonce, ciphertext, tag
+
+
+def decrypt_bytes(
+    nonce: bytes,
+    ciphertext: bytes,
+    tag: bytes,
+    key: bytes,
+    associated_data: bytes = b"",
+) -> bytes:
+    """
+    Decrypt raw bytes encrypted with AES-256-GCM
+
+    Any bytes-like object (e.g. a 'memoryview' slice) is accepted,
+    so callers can decrypt parts of a buffer without copying them.
+
+    Args:
+        nonce (bytes): 12-byte nonce used for encryption
+        ciphertext (bytes): Encrypted bytes
+        tag (bytes): 16-byte authentication tag
+        key (bytes): 32-byte (256-bit) key for AES-256
+        associated_data (bytes): Authenticated data given at encryption
+
+    Returns:
+        bytes: Decrypted bytes
+
+    Raises:
+        InvalidTag: If key is wrong, data is corrupted, or tampered
+    """
+
+    # Create AES-256-GCM cipher with authentication tag
+    cipher = Cipher(
+        backend=default_backend(),
+        algorithm=algorithms.AES(key=key),
+        mode=modes.GCM(initialization_vector=bytes(nonce), tag=bytes(tag)),
+    )
+
+    decryptor = cipher.decryptor()
+
+    if associated_data:
+        decryptor.authenticate_additional_data(data=associated_data)
+
+    # Decrypt and verify authentication
+    result = decryptor.update(data=ciphertext) + decryptor.finalize()
+
+    return result
+
+
+def encrypt_with_key(plain_text: str, key: bytes) -> dict:
+    """
+    Encrypt text using AES-256-GCM with an already derived key
+
+    A fresh random nonce is generated on every call, so the same key can be
+    reused safely for many saves without running the KDF again.
+
+    Args:
+        plain_text (str): Text to encrypt
+        key (bytes): 32-byte (256-bit) key for AES-256
+
+    Returns:
+        dict: Contains nonce, ciphertext, and authentication tag
+    """
+
+    nonce, ciphertext, tag = encrypt_bytes(
+        key=key,
+        data=plain_text.encode(encoding="utf-8"),
+    )
+
     # Return all components needed for decryption
     encrypted_data = {
-        "salt": base64.b64encode(salt).decode(encoding="utf-8"),
         "nonce": base64.b64encode(nonce).decode(encoding="utf-8"),
         "ciphertext": base64.b64encode(ciphertext).decode(encoding="utf-8"),
         "tag": base64.b64encode(tag).decode(encoding="utf-8"),
@@ -154,6 +245,78 @@ def encrypt_plain_text(plain_text: str, password: str) -> dict:
     return encrypted_data
 
 
+def decrypt_with_key(encrypted_data: dict, key: bytes) -> Tuple[bool, str]:
+    """
+    Decrypt text encrypted with AES-256-GCM using an already derived key
+
+    Args:
+        encrypted_data (dict): Dictionary containing nonce, ciphertext, tag
+        key (bytes): 32-byte (256-bit) key for AES-256
+
+    Returns:
+        tuple: (is_decrypted: bool, plain_text_or_error_message: str)
+    """
+
+    try:
+        # Decode Base64 components
+        tag = base64.b64decode(s=encrypted_data["tag"])
+        nonce = base64.b64decode(s=encrypted_data["nonce"])
+        cipher_text = base64.b64decode(s=encrypted_data["ciphertext"])
+
+        plain_text = decrypt_bytes(
+            key=key,
+            tag=tag,
+            nonce=nonce,
+            ciphertext=cipher_text,
+        )
+
+        result = True, plain_text.decode(encoding="utf-8")
+
+        return result
+    except:
+        return False, "Decryption failed! Wrong password or data corrupted/tampered."
+
+
+def encrypt_plain_text(plain_text: str, password: str) -> dict:
+    """
+    Encrypt text using AES-256-GCM (Quantum-resistant symmetric encryption)
+
+    AES-256 provides approximately 128-bit security against quantum computers
+    (Grover's algorithm reduces effective key length by half)
+
+    Args:
+        plaintext (str): Text to encrypt
+        password (str): User's password (minimum 16 characters recommended)
+
+    Returns:
+        dict: Contains salt, iterations, nonce, ciphertext, and authentication tag
+    """
+
+    # Generate random salt (16 bytes)
+    salt = os.urandom(16)
+
+    # Derive 256-bit key from password
+    key = derive_key_from_password(
+        salt=salt,
+        password=password,
+        iterations=KDF_ITERATIONS,
+    )
+
+    encrypted_data = {
+        "salt": base64.b64encode(salt).decode(encoding="utf-8"),
+        "iterations": KDF_ITERATIONS,
+    }
+
+    encrypted_data.update(
+        encrypt_with_key(
+            key=key,
+            plain_text=plain_text,
+        )
+    )
+
+    return encrypted_data
+
+
 def decrypt_encrypted_data(encrypted_data: dict, password: str) -> Tuple[bool, str]:
     """
     Decrypt text encrypted with AES-256-GCM
@@ -163,42 +326,241 @@ def decrypt_encrypted_data(encrypted_data: dict, password: str) -> Tuple[bool, s
         password (str): User's password (must match encryption password)
 
     Returns:
-        str: Decrypted plaintext
-
-    Raises:
-        Exception: If password is wrong, data is corrupted, or tampered
+        tuple: (is_decrypted: bool, plain_text_or_error_message: str)
     """
 
     try:
-        # Decode Base64 components
-        tag = base64.b64decode(s=encrypted_data["tag"])
         salt = base64.b64decode(s=encrypted_data["salt"])
-        nonce = base64.b64decode(s=encrypted_data["nonce"])
-        cipher_text = base64.b64decode(s=encrypted_data["ciphertext"])
+
+        # NOTE: Files written before 'iterations' was stored use the default
+        iterations: int = encrypted_data.get("iterations", KDF_ITERATIONS)
 
         # Derive the same key from password and salt
         key = derive_key_from_password(
             salt=salt,
             password=password,
+            iterations=iterations,
         )
+    except:
+        return False, "Decryption failed! Wrong password or data corrupted/tampered."
+
+    result = decrypt_with_key(
+        key=key,
+        encrypted_data=encrypted_data,
+    )
+
+    return result
+
+
+def _read_chunks(
+    source: Union[BinaryIO, Iterable[bytes]],
+    size: int,
+) -> Iterator[bytes]:
+    """Yield chunks of exactly 'size' bytes (the last one may be shorter)"""
+
+    if hasattr(source, "read"):
+        while True:
+            chunk: bytes = source.read(size)
+            if not chunk:
+                return
+
+            # NOTE: Raw (unbuffered) files may return less than asked
+            while len(chunk) < size:
+                more: bytes = source.read(size - len(chunk))
+                if not more:
+                    break
+                chunk += more
+
+            yield chunk
+
+    buffer = bytearray()
+    for data in source:
+        buffer += data
+
+        while len(buffer) >= size:
+            yield bytes(buffer[:size])
+            del buffer[:size]
+
+    if buffer:
+        yield bytes(buffer)
+
+
+def _read_header(
+    source: Union[BinaryIO, Iterable[bytes]],
+    size: int,
+) -> Tuple[bytes, Union[BinaryIO, Iterable[bytes]]]:
+    """Read the first 'size' bytes and return them with the rest of source"""
+
+    if hasattr(source, "read"):
+        return source.read(size), source
+
+    iterator: Iterator[bytes] = iter(source)
+
+    buffer = bytearray()
+    for data in iterator:
+        buffer += data
+        if len(buffer) >= size:
+            break
+
+    rest: Iterable[bytes] = itertools.chain((bytes(buffer[size:]),), iterator)
+
+    return bytes(buffer[:size]), rest
+
+
+def _validate_chunk_size(chunk_size: int) -> None:
+    """Check that a stream chunk size is between 1 and MAX_STREAM_CHUNK_SIZE"""
+
+    if not 0 < chunk_size <= MAX_STREAM_CHUNK_SIZE:
+        message: str = f"Stream chunk size must be between 1 and {MAX_STREAM_CHUNK_SIZE}!"
+        raise ValueError(message)
+
+
+def _stream_nonce(prefix: bytes, counter: int, is_last: bool) -> bytes:
+    """Nonce of one stream chunk: prefix | counter | last flag"""
+
+    if counter >= 2**32:
+        raise ValueError("Stream is too long (too many chunks)!")
+
+    result: bytes = prefix + counter.to_bytes(4, "big") + (b"\x01" if is_last else b"\x00")
+
+    return result
 
-        # Create AES-256-GCM cipher with authentication tag
-        cipher = Cipher(
-            backend=default_backend(),
-            algorithm=algorithms.AES(key=key),
-            mode=modes.GCM(initialization_vector=nonce, tag=tag),
+
+def encrypt_stream(
+    source: Union[BinaryIO, Iterable[bytes]],
+    key: bytes,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Encrypt a stream using chunked AES-256-GCM (constant memory)
+
+    Every chunk has its own authentication tag and a nonce made of a random
+    prefix, the chunk counter and a final-chunk flag, so truncated,
+    reordered or spliced streams are detected by 'decrypt_stream'.
+
+    Args:
+        source (BinaryIO | Iterable[bytes]): File-like object or generator
+        key (bytes): 32-byte (256-bit) key for AES-256
+        chunk_size (int): Plain text bytes per chunk
+
+    Returns:
+        Iterator[bytes]: Stream header, then one encrypted chunk per item
+
+    Raises:
+        ValueError: If chunk size is not between 1 and MAX_STREAM_CHUNK_SIZE
+    """
+
+    _validate_chunk_size(chunk_size=chunk_size)
+
+    prefix: bytes = os.urandom(7)
+    header: bytes = STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, chunk_size, prefix)
+
+    yield header
+
+    counter: int = 0
+    chunks: Iterator[bytes] = _read_chunks(source=source, size=chunk_size)
+
+    # NOTE: One chunk look-ahead to know which chunk is the last one
+    chunk: bytes = next(chunks, b"")
+    while True:
+        next_chunk: bytes | None = next(chunks, None)
+        is_last: bool = next_chunk is None
+
+        _, ciphertext, tag = encrypt_bytes(
+            key=key,
+            data=chunk,
+            associated_data=header,
+            nonce=_stream_nonce(prefix=prefix, counter=counter, is_last=is_last),
         )
 
-        decryptor = cipher.decryptor()
+        yield ciphertext + tag
 
-        # Decrypt and verify authentication
-        plain_text = decryptor.update(data=cipher_text) + decryptor.finalize()
+        if is_last:
+            return
 
-        result = True, plain_text.decode(encoding="utf-8")
+        chunk = next_chunk
+        counter += 1
 
-        return result
-    except:
-        return False, "Decryption failed! Wrong password or data corrupted/tampered."
+
+def decrypt_stream(
+    source: Union[BinaryIO, Iterable[bytes]],
+    key: bytes,
+) -> Iterator[bytes]:
+    """
+    Decrypt a stream made by 'encrypt_stream' (constant memory)
+
+    Args:
+        source (BinaryIO | Iterable[bytes]): File-like object or generator
+        key (bytes): 32-byte (256-bit) key for AES-256
+
+    Returns:
+        Iterator[bytes]: Decrypted chunks (each one is authenticated before it
+        is yielded, a truncated stream raises after the last intact chunk)
+
+    Raises:
+        ValueError: If the stream header is not valid (or its chunk size is
+        not between 1 and MAX_STREAM_CHUNK_SIZE) or stream is truncated
+        InvalidTag: If key is wrong, or a chunk is corrupted or tampered
+    """
+
+    header, source = _read_header(source=source, size=STREAM_HEADER.size)
+
+    if len(header) != STREAM_HEADER.size:
+        raise ValueError("Stream is too short!")
+
+    magic, version, chunk_size, prefix = STREAM_HEADER.unpack(header)
+
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("Stream has an unknown format!")
+
+    # NOTE: The header is only authenticated with the first chunk
+    _validate_chunk_size(chunk_size=chunk_size)
+
+    counter: int = 0
+    chunks: Iterator[bytes] = _read_chunks(
+        source=source,
+        size=chunk_size + STREAM_TAG_LENGTH,
+    )
+
+    chunk: bytes | None = next(chunks, None)
+    while chunk is not None:
+        next_chunk: bytes | None = next(chunks, None)
+        is_last: bool = next_chunk is None
+
+        if len(chunk) < STREAM_TAG_LENGTH:
+            raise ValueError("Stream is truncated!")
+
+        yield decrypt_bytes(
+            key=key,
+            nonce=_stream_nonce(prefix=prefix, counter=counter, is_last=is_last),
+            ciphertext=chunk[:-STREAM_TAG_LENGTH],
+            tag=chunk[-STREAM_TAG_LENGTH:],
+            associated_data=header,
+        )
+
+        chunk = next_chunk
+        counter += 1
+
+    if counter == 0:
+        raise ValueError("Stream is truncated!")
+
+
+def encrypt_file(source_path: str, target_path: str, key: bytes) -> None:
+    """Encrypt a file into another file with 'encrypt_stream'"""
+
+    with open(file=source_path, mode="rb") as source_file:
+        with open(file=target_path, mode="wb") as target_file:
+            for chunk in encrypt_stream(source=source_file, key=key):
+                target_file.write(chunk)
+
+
+def decrypt_file(source_path: str, target_path: str, key: bytes) -> None:
+    """Decrypt a file made by 'encrypt_file' into another file"""
+
+    with open(file=source_path, mode="rb") as source_file:
+        with open(file=target_path, mode="wb") as target_file:
+            for chunk in decrypt_stream(source=source_file, key=key):
+                target_file.write(chunk)
 
 
 def validate_password_strength(password: str) -> Tuple[bool, str]:
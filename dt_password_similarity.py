@@ -0,0 +1,190 @@
+"""
+DT Password Similarity
+
+Finds near-duplicate passwords ('Summer2024!' and 'Summer2025!') without
+comparing every pair: every password gets a MinHash signature of its
+character n-grams, signatures are split into bands, and only passwords that
+share a band bucket (LSH) are compared, by the Jaccard similarity of their
+n-gram sets.
+"""
+
+import struct
+import hashlib
+import itertools
+
+from typing import Hashable
+from collections import Counter
+from collections import defaultdict
+
+
+__version__ = "1.0.0"
+
+NGRAM_SIZE: int = 3
+
+# NOTE: Bands x rows = signature size. Two rows per band make passwords with
+# a Jaccard similarity of 0.5 candidates with a probability of 0.99
+# (1 - (1 - 0.5 ** 2) ** 16), candidates are verified exactly.
+SIGNATURE_BANDS: int = 16
+SIGNATURE_ROWS: int = 2
+SIGNATURE_SIZE: int = SIGNATURE_BANDS * SIGNATURE_ROWS
+
+SIMILARITY_THRESHOLD: float = 0.5
+
+# NOTE: One 64 bytes BLAKE2b digest of an n-gram holds its value for all
+# 32 hash functions (16 bits each), one C call instead of 32 hashes
+_NGRAM_HASHES: struct.Struct = struct.Struct(f">{SIGNATURE_SIZE}H")
+
+# NOTE: The same bytes read as one 32 bits key per band (of two rows)
+_BAND_KEYS: struct.Struct = struct.Struct(f">{SIGNATURE_BANDS}I")
+
+
+def get_ngrams(password: str, size: int = NGRAM_SIZE) -> frozenset[str]:
+    """
+    Get the character n-grams of a password (case-insensitive)
+
+    Args:
+        password (str): Password
+        size (int): N-gram size
+
+    Returns:
+        frozenset: N-grams (the whole password, if it is shorter)
+    """
+
+    text: str = password.casefold()
+
+    if len(text) <= size:
+        return frozenset((text,))
+
+    result: frozenset[str] = frozenset(
+        text[index : index + size] for index in range(len(text) - size + 1)
+    )
+
+    return result
+
+
+def get_minhash_signature(ngrams: frozenset[str]) -> tuple[int, ...]:
+    """
+    Get the MinHash signature of a set of n-grams
+
+    Args:
+        ngrams (frozenset[str]): N-grams
+
+    Returns:
+        tuple: Minimum of every hash function over the n-grams
+    """
+
+    rows: list[tuple[int, ...]] = [
+        _NGRAM_HASHES.unpack(
+            hashlib.blake2b(
+                ngram.encode("utf-8"),
+                digest_size=_NGRAM_HASHES.size,
+            ).digest()
+        )
+        for ngram in ngrams
+    ]
+
+    # NOTE: Column-wise minimum, every column is one hash function
+    result: tuple[int, ...] = tuple(map(min, zip(*rows)))
+
+    return result
+
+
+def get_jaccard_similarity(first: frozenset, second: frozenset) -> float:
+    """Get the Jaccard similarity (intersection / union) of two sets"""
+
+    if not first and not second:
+        return 1.0
+
+    result: float = len(first & second) / len(first | second)
+
+    return result
+
+
+def find_similar_groups(
+    passwords: dict[Hashable, str],
+    threshold: float = SIMILARITY_THRESHOLD,
+) -> list[list[Hashable]]:
+    """
+    Find groups of similar passwords
+
+    Args:
+        passwords (dict): key (like an item id) -> password
+        threshold (float): Minimum Jaccard similarity of the n-grams of two
+        passwords in one group (groups are connected, not every pair in a
+        group is that similar)
+
+    Returns:
+        list: Groups (of two or more keys, biggest group first)
+    """
+
+    # NOTE: Equal passwords are one group from the start (and one signature)
+    equal_keys: defaultdict[str, list[Hashable]] = defaultdict(list)
+    for key, password in passwords.items():
+        equal_keys[password].append(key)
+
+    distinct_passwords: list[str] = list(equal_keys)
+    ngrams: list[frozenset[str]] = [
+        get_ngrams(password=password) for password in distinct_passwords
+    ]
+
+    band_keys: list[tuple[int, ...]] = [
+        _BAND_KEYS.unpack(
+            _NGRAM_HASHES.pack(*get_minhash_signature(ngrams=item_ngrams))
+        )
+        for item_ngrams in ngrams
+    ]
+
+    # NOTE: Candidates: pairs with an equal key in any band. Band by band,
+    # counting keys first, so only shared keys (rare) are collected.
+    candidates: set[tuple[int, int]] = set()
+    for band_column in zip(*band_keys):
+        counts: Counter[int] = Counter(band_column)
+        shared_keys: set[int] = {key for key, count in counts.items() if count > 1}
+        if not shared_keys:
+            continue
+
+        buckets: defaultdict[int, list[int]] = defaultdict(list)
+        for index, key in enumerate(band_column):
+            if key in shared_keys:
+                buckets[key].append(index)
+
+        for bucket in buckets.values():
+            candidates.update(itertools.combinations(bucket, 2))
+
+    # NOTE: Union-find of the verified pairs
+    parents: list[int] = list(range(len(distinct_passwords)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for first, second in candidates:
+        first_root: int = find(index=first)
+        second_root: int = find(index=second)
+        if first_root == second_root:
+            continue
+
+        similarity: float = get_jaccard_similarity(
+            first=ngrams[first],
+            second=ngrams[second],
+        )
+        if similarity >= threshold:
+            parents[second_root] = first_root
+
+    groups: defaultdict[int, list[Hashable]] = defaultdict(list)
+    for index, password in enumerate(distinct_passwords):
+        groups[find(index=index)].extend(equal_keys[password])
+
+    result: list[list[Hashable]] = sorted(
+        (group for group in groups.values() if len(group) > 1),
+        key=len,
+        reverse=True,
+    )
+
+    return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
@@ -0,0 +1,268 @@
+"""
+DT Password Strength
+"""
+
+import math
+
+from typing import Tuple
+
+
+__version__ = "1.0.0"
+
+SCORE_VERY_WEAK: int = 0
+SCORE_WEAK: int = 1
+SCORE_FAIR: int = 2
+SCORE_STRONG: int = 3
+SCORE_VERY_STRONG: int = 4
+
+SCORE_LABELS: dict[int, str] = {
+    SCORE_VERY_WEAK: "Very Weak",
+    SCORE_WEAK: "Weak",
+    SCORE_FAIR: "Fair",
+    SCORE_STRONG: "Strong",
+    SCORE_VERY_STRONG: "Very Strong",
+}
+
+# NOTE: Minimum entropy (bits) of every score
+SCORE_BITS: Tuple[Tuple[int, float], ...] = (
+    (SCORE_VERY_STRONG, 80.0),
+    (SCORE_STRONG, 60.0),
+    (SCORE_FAIR, 40.0),
+    (SCORE_WEAK, 28.0),
+)
+
+# NOTE: Character set sizes
+CHARSET_LOWER: int = 26
+CHARSET_UPPER: int = 26
+CHARSET_DIGIT: int = 10
+CHARSET_SPECIAL: int = 33
+
+# NOTE: Bits of a character that continues a pattern
+REPEAT_BITS: float = 1.0
+SEQUENCE_BITS: float = 1.5
+KEYBOARD_WALK_BITS: float = 2.0
+
+MIN_WORD_LENGTH: int = 4
+
+KEYBOARD_ROWS: Tuple[str, ...] = (
+    "`1234567890-=",
+    "~!@#$%^&*()_+",
+    "qwertyuiop[]\\",
+    "asdfghjkl;'",
+    "zxcvbnm,./",
+)
+
+# NOTE: Common substitutions, words are matched after undoing them
+LEET_CHARACTERS: dict[str, str] = {
+    "0": "o",
+    "1": "l",
+    "3": "e",
+    "4": "a",
+    "5": "s",
+    "7": "t",
+    "8": "b",
+    "9": "g",
+    "@": "a",
+    "$": "s",
+    "!": "i",
+    "|": "l",
+    "+": "t",
+}
+
+# NOTE: Embedded wordlist: the most common passwords and password words
+COMMON_WORDS: frozenset[str] = frozenset(
+    """
+    password passw0rd pass word login admin administrator root user guest test
+    qwerty qwertz azerty asdf asdfgh zxcv zxcvbn zxcvbnm qazwsx wsxedc trustno
+    letmein welcome hello secret master dragon monkey shadow sunshine princess
+    football baseball soccer hockey basketball superman batman spiderman
+    michael jennifer jordan hunter ranger buster thomas robert daniel charlie
+    andrew matthew jessica ashley amanda joshua george harley hannah maggie
+    iloveyou love lover loveme angel angels freedom whatever computer internet
+    starwars pokemon minecraft google facebook twitter yahoo hotmail gmail
+    apple samsung microsoft windows linux ubuntu android iphone
+    summer winter spring autumn monday friday sunday january december
+    cheese cookie chocolate banana orange purple yellow silver golden diamond
+    killer pepper ginger tigger flower garden mother father family friend
+    money dollar bitcoin crypto bank banking secure security private access
+    changeme default system server office manager company business service
+    iran tehran persian irani salam dariush khoda ghorbanet
+    abcd abcde abcdef abcdefg abc123 pass123 admin123 test123 user123
+    nothing someone something blink butterfly rainbow phoenix matrix mustang
+    corvette ferrari porsche mercedes harley yamaha honda toyota nissan
+    """.split()
+)
+
+MAX_WORD_LENGTH: int = max(len(word) for word in COMMON_WORDS)
+
+# NOTE: Bits of a whole dictionary word (its index in the wordlist, plus case)
+WORD_BITS: float = math.log2(len(COMMON_WORDS)) + 1.0
+
+
+def _get_keyboard_positions() -> dict[str, Tuple[int, int]]:
+    """Get (row, column) of every key of 'KEYBOARD_ROWS'"""
+
+    result: dict[str, Tuple[int, int]] = {}
+
+    for row_index, row in enumerate(KEYBOARD_ROWS):
+        for column_index, char in enumerate(row):
+            result.setdefault(char, (row_index, column_index))
+
+    return result
+
+
+KEYBOARD_POSITIONS: dict[str, Tuple[int, int]] = _get_keyboard_positions()
+
+
+def _is_keyboard_neighbor(previous: str, char: str) -> bool:
+    """Check if two keys are next to each other on the keyboard"""
+
+    previous_position = KEYBOARD_POSITIONS.get(previous)
+    position = KEYBOARD_POSITIONS.get(char)
+
+    if previous_position is None or position is None:
+        return False
+
+    result: bool = (
+        abs(previous_position[0] - position[0]) <= 1
+        and abs(previous_position[1] - position[1]) <= 1
+    )
+
+    return result
+
+
+def get_score(bits: float) -> int:
+    """Get score (0 - 4) of an entropy in bits"""
+
+    for score, min_bits in SCORE_BITS:
+        if bits >= min_bits:
+            return score
+
+    return SCORE_VERY_WEAK
+
+
+def estimate_password_strength(password: str) -> Tuple[int, float, str]:
+    """
+    Estimate password strength in one pass
+
+    Every character adds the entropy of the character sets in use, unless it
+    repeats the previous character, continues a sequence ('abc', '321') or a
+    keyboard walk ('qwe', 'asdf'), which add only a bit or two. A common word
+    (also with leet substitutions, like 'p@ssw0rd') costs the same as one
+    choice from the embedded wordlist.
+
+    Args:
+        password (str): Password to estimate
+
+    Returns:
+        tuple: (score from 0 (very weak) to 4 (very strong),
+        entropy in bits, feedback message)
+    """
+
+    has_lower: bool = False
+    has_upper: bool = False
+    has_digit: bool = False
+    has_special: bool = False
+
+    # NOTE: Cheapest cover of the first i characters, as (random characters,
+    # pattern bits) with a look-back for words only
+    random_chars: list[int] = [0]
+    pattern_bits: list[float] = [0.0]
+
+    repeats: int = 0
+    sequences: int = 0
+    keyboard_walks: int = 0
+    words: list[str] = []
+
+    lowered: str = ""
+    normalized: str = ""
+    previous: str = ""
+
+    for index, char in enumerate(password):
+        if char.islower():
+            has_lower = True
+        elif char.isupper():
+            has_upper = True
+        elif char.isdigit():
+            has_digit = True
+        else:
+            has_special = True
+
+        lower_char: str = char.lower()
+        lowered += lower_char
+        normalized += LEET_CHARACTERS.get(lower_char, lower_char)
+
+        chars: int = random_chars[index]
+        bits: float = pattern_bits[index]
+
+        if previous and lower_char == previous:
+            bits += REPEAT_BITS
+            repeats += 1
+        elif previous and abs(ord(lower_char) - ord(previous)) == 1:
+            bits += SEQUENCE_BITS
+            sequences += 1
+        elif previous and _is_keyboard_neighbor(previous=previous, char=lower_char):
+            bits += KEYBOARD_WALK_BITS
+            keyboard_walks += 1
+        else:
+            chars += 1
+
+        # NOTE: The longest common word that ends here replaces its characters
+        end: int = index + 1
+        for length in range(min(MAX_WORD_LENGTH, end), MIN_WORD_LENGTH - 1, -1):
+            start: int = end - length
+
+            word: str = lowered[start:end]
+            if word not in COMMON_WORDS:
+                word = normalized[start:end]
+
+            if word in COMMON_WORDS:
+                chars = random_chars[start]
+                bits = pattern_bits[start] + WORD_BITS
+                words.append(word)
+                break
+
+        random_chars.append(chars)
+        pattern_bits.append(bits)
+
+        previous = lower_char
+
+    charset_size: int = (
+        has_lower * CHARSET_LOWER
+        + has_upper * CHARSET_UPPER
+        + has_digit * CHARSET_DIGIT
+        + has_special * CHARSET_SPECIAL
+    )
+
+    entropy: float = pattern_bits[-1]
+    if charset_size:
+        entropy += random_chars[-1] * math.log2(charset_size)
+
+    score: int = get_score(bits=entropy)
+
+    message: str
+    if words:
+        message = f"Contains a common word ('{words[-1]}')"
+    elif keyboard_walks >= 2:
+        message = "Contains a keyboard walk"
+    elif sequences >= 2:
+        message = "Contains a sequence"
+    elif repeats >= 2:
+        message = "Contains repeated characters"
+    elif charset_size < CHARSET_LOWER + CHARSET_UPPER + CHARSET_DIGIT:
+        message = "Use more character types"
+    else:
+        message = "Use a longer password"
+
+    if score >= SCORE_STRONG:
+        message = SCORE_LABELS[score]
+    else:
+        message = f"{SCORE_LABELS[score]}: {message}"
+
+    result = score, entropy, message
+
+    return result
+
+
+if __name__ == "__main__":
+    print("[-] This module is not meant to be run directly!")
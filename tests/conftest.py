@@ -0,0 +1,12 @@
+"""
+Test Configuration
+
+The modules of the application are flat files in the repository root.
+"""
+
+import sys
+
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,47 @@
+"""
+Tests of the batch operations of the CLI ('apply_operation')
+"""
+
+import json
+
+import pytest
+
+from app_cli import CliError
+from app_cli import apply_operation
+from app_vault import VaultItems
+
+
+@pytest.fixture
+def items() -> VaultItems:
+    result = VaultItems()
+    result.load(
+        records={1: json.dumps({"name": "github.com"})},
+        next_record_id=2,
+        password_tag_key=bytes(32),
+    )
+
+    return result
+
+
+@pytest.mark.parametrize("record_id", [True, False, "1", 1.0, 0, None])
+@pytest.mark.parametrize("op", ["rm", "set"])
+def test_invalid_item_id(items: VaultItems, op: str, record_id: object) -> None:
+    operation: dict = {"op": op, "id": record_id, "name": "gitlab.com"}
+
+    with pytest.raises(CliError):
+        apply_operation(vault=None, items=items, operation=operation, allow_weak=False)
+
+    assert 1 in items
+    assert not items.is_dirty
+
+
+def test_remove(items: VaultItems) -> None:
+    result: dict = apply_operation(
+        vault=None,
+        items=items,
+        operation={"op": "rm", "id": 1},
+        allow_weak=False,
+    )
+
+    assert result == {"op": "rm", "id": 1}
+    assert 1 not in items
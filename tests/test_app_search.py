@@ -0,0 +1,20 @@
+"""
+Tests of the search ranking ('get_best_record_ids')
+"""
+
+import pytest
+
+from app_search import get_best_record_ids
+
+
+SCORES: dict[int, float] = {1: 0.5, 2: 0.9, 3: 0.5, 4: 0.1}
+
+
+def test_best_first_ties_by_record_id() -> None:
+    assert get_best_record_ids(scores=SCORES, limit=3) == [2, 1, 3]
+    assert get_best_record_ids(scores=SCORES, limit=10) == [2, 1, 3, 4]
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_no_results_below_one(limit: int) -> None:
+    assert get_best_record_ids(scores=SCORES, limit=limit) == []
@@ -0,0 +1,204 @@
+"""
+Tests of the append-only log vault ('VaultLog')
+"""
+
+import json
+
+from pathlib import Path
+
+import pytest
+
+import app_vault
+
+from app_vault import TAG_LENGTH
+from app_vault import RECORD_HEADER
+from app_vault import RECORD_KIND_PUT_COMPRESSED
+from app_vault import VaultLog
+from app_vault import VaultSession
+from app_vault import VaultFormatError
+from app_vault import VaultDecryptionError
+
+
+PASSWORD: str = "correct horse battery staple"
+
+RECORDS: dict[int, tuple[str, str]] = {
+    1: (json.dumps({"name": "github.com"}), json.dumps({"password": "one"})),
+    2: (json.dumps({"name": "gitlab.com"}), json.dumps({"password": "two"})),
+}
+
+
+@pytest.fixture(autouse=True)
+def fast_kdf(monkeypatch: pytest.MonkeyPatch) -> None:
+    # NOTE: The iterations are stored in the header, 'open' uses them
+    monkeypatch.setattr(app_vault, "KDF_ITERATIONS", 1_000)
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    """A log with two records, then one update and one delete"""
+
+    result: Path = tmp_path / "data.bin"
+
+    vault = VaultLog.create(
+        path=result,
+        records=RECORDS,
+        session=VaultSession.create(password=PASSWORD),
+    )
+    vault.save(
+        puts={3: (json.dumps({"name": "gitea.com"}), json.dumps({"password": "three"}))},
+        deletes=[2],
+    )
+    vault.close()
+
+    return result
+
+
+def get_record_offsets(path: Path) -> dict[int, tuple[int, int]]:
+    vault, _ = VaultLog.open(path=path, password=PASSWORD)
+    vault.close()
+
+    return vault.offsets
+
+
+def assert_torn_tail_dropped(path: Path, intact: bytes, torn: bytes) -> None:
+    backups: list[Path] = list(path.parent.glob(f"{path.name}.*.torn"))
+
+    assert len(backups) == 1
+    assert backups[0].read_bytes() == torn
+    assert path.read_bytes() == intact
+
+
+def test_round_trip(path: Path) -> None:
+    vault, records = VaultLog.open(path=path, password=PASSWORD)
+
+    assert records == {1: RECORDS[1][0], 3: json.dumps({"name": "gitea.com"})}
+    assert vault.read_secrets(record_ids=[1, 3]) == {
+        1: {"password": "one"},
+        3: {"password": "three"},
+    }
+    assert vault.next_record_id == 4
+
+    vault.close()
+
+
+def test_wrong_password(path: Path) -> None:
+    with pytest.raises(VaultDecryptionError):
+        VaultLog.open(path=path, password="wrong password")
+
+
+def test_tampered_record(path: Path) -> None:
+    start, end = get_record_offsets(path=path)[1]
+
+    data = bytearray(path.read_bytes())
+    data[end - 1] ^= 0x01
+    path.write_bytes(data)
+
+    vault, _ = VaultLog.open(path=path, password=PASSWORD)
+
+    # NOTE: The last byte is the tag of the secrets part
+    with pytest.raises(VaultDecryptionError):
+        vault.read_secrets(record_ids=[1])
+
+    data[end - 1] ^= 0x01
+    data[start + RECORD_HEADER.size + 8] ^= 0x01
+    path.write_bytes(data)
+
+    with pytest.raises(VaultDecryptionError):
+        VaultLog.open(path=path, password=PASSWORD)
+
+
+def test_torn_tail_is_ignored_and_backed_up(path: Path) -> None:
+    vault, _ = VaultLog.open(path=path, password=PASSWORD)
+    record: bytes = vault.pack_record(
+        kind=RECORD_KIND_PUT_COMPRESSED,
+        record_id=9,
+        plain_text=json.dumps({"name": "torn"}),
+        secrets_text="{}",
+    )
+    vault.close()
+
+    intact: bytes = path.read_bytes()
+    path.write_bytes(intact + record[:-5])
+
+    vault, records = VaultLog.open(path=path, password=PASSWORD)
+    assert sorted(records) == [1, 3]
+
+    # NOTE: The torn record is dropped, but only after the file is backed up
+    assert_torn_tail_dropped(path=path, intact=intact, torn=intact + record[:-5])
+
+    vault.save(puts={4: (json.dumps({"name": "new"}), "{}")}, deletes=[])
+    vault.close()
+
+    _, records = VaultLog.open(path=path, password=PASSWORD)
+    assert sorted(records) == [1, 3, 4]
+
+
+def test_zero_filled_tail_is_dropped(path: Path) -> None:
+    intact: bytes = path.read_bytes()
+    path.write_bytes(intact + bytes(64))
+
+    _, records = VaultLog.open(path=path, password=PASSWORD)
+    assert sorted(records) == [1, 3]
+
+    assert_torn_tail_dropped(path=path, intact=intact, torn=intact + bytes(64))
+
+
+@pytest.mark.parametrize("part", ["index", "secrets"])
+def test_garbled_last_record_is_dropped(path: Path, part: str) -> None:
+    vault, _ = VaultLog.open(path=path, password=PASSWORD)
+    vault.save(puts={4: (json.dumps({"name": "last"}), "{}")}, deletes=[])
+    vault.close()
+
+    start, end = vault.offsets[4]
+
+    torn = bytearray(path.read_bytes())
+    assert end == len(torn)
+
+    # NOTE: Zero the last payload (or only its secrets part), keep the header
+    if part == "index":
+        torn[start + RECORD_HEADER.size : end] = bytes(end - start - RECORD_HEADER.size)
+    else:
+        torn[end - TAG_LENGTH : end] = bytes(TAG_LENGTH)
+
+    path.write_bytes(torn)
+
+    _, records = VaultLog.open(path=path, password=PASSWORD)
+    assert sorted(records) == [1, 3]
+
+    assert_torn_tail_dropped(path=path, intact=bytes(torn[:start]), torn=bytes(torn))
+
+
+def test_damaged_length_in_the_middle(path: Path) -> None:
+    start, _ = get_record_offsets(path=path)[1]
+
+    data = bytearray(path.read_bytes())
+    RECORD_HEADER.pack_into(data, start, RECORD_KIND_PUT_COMPRESSED, 1, 1)
+    path.write_bytes(data)
+
+    with pytest.raises(VaultFormatError):
+        VaultLog.open(path=path, password=PASSWORD)
+
+
+def test_damaged_kind_in_the_middle(path: Path) -> None:
+    start, _ = get_record_offsets(path=path)[1]
+
+    data = bytearray(path.read_bytes())
+    data[start] = 0xFF
+    path.write_bytes(data)
+
+    with pytest.raises(VaultFormatError):
+        VaultLog.open(path=path, password=PASSWORD)
+
+
+def test_save_does_not_truncate_a_shorter_file(path: Path) -> None:
+    vault, _ = VaultLog.open(path=path, password=PASSWORD)
+
+    data: bytes = path.read_bytes()
+    path.write_bytes(data[:-1])
+
+    with pytest.raises(VaultFormatError):
+        vault.save(puts={4: (json.dumps({"name": "new"}), "{}")}, deletes=[])
+
+    vault.close()
+
+    assert path.read_bytes() == data[:-1]
@@ -0,0 +1,127 @@
+"""
+Tests of the streaming AEAD ('encrypt_stream' and 'decrypt_stream')
+"""
+
+import io
+import os
+
+import pytest
+
+from cryptography.exceptions import InvalidTag
+
+from dt_cryptography import STREAM_MAGIC
+from dt_cryptography import STREAM_HEADER
+from dt_cryptography import STREAM_VERSION
+from dt_cryptography import STREAM_TAG_LENGTH
+from dt_cryptography import MAX_STREAM_CHUNK_SIZE
+from dt_cryptography import encrypt_stream
+from dt_cryptography import decrypt_stream
+
+
+KEY: bytes = bytes(range(32))
+CHUNK_SIZE: int = 16
+
+
+def encrypt(data: bytes) -> list[bytes]:
+    result: list[bytes] = list(
+        encrypt_stream(source=io.BytesIO(data), key=KEY, chunk_size=CHUNK_SIZE)
+    )
+
+    return result
+
+
+def decrypt(parts: list[bytes], key: bytes = KEY) -> bytes:
+    result: bytes = b"".join(decrypt_stream(source=io.BytesIO(b"".join(parts)), key=key))
+
+    return result
+
+
+@pytest.mark.parametrize("size", [0, 1, CHUNK_SIZE - 1, CHUNK_SIZE, 5 * CHUNK_SIZE + 3])
+def test_round_trip(size: int) -> None:
+    data: bytes = os.urandom(size)
+
+    assert decrypt(parts=encrypt(data=data)) == data
+
+    # NOTE: A generator source gives the same stream
+    parts: list[bytes] = list(
+        encrypt_stream(source=iter([data]), key=KEY, chunk_size=CHUNK_SIZE)
+    )
+    assert b"".join(decrypt_stream(source=iter(parts), key=KEY)) == data
+
+
+def test_wrong_key() -> None:
+    with pytest.raises(InvalidTag):
+        decrypt(parts=encrypt(data=b"secret"), key=bytes(32))
+
+
+def test_tampered_chunk() -> None:
+    parts: list[bytes] = encrypt(data=os.urandom(3 * CHUNK_SIZE))
+
+    parts[2] = bytes([parts[2][0] ^ 0x01]) + parts[2][1:]
+
+    with pytest.raises(InvalidTag):
+        decrypt(parts=parts)
+
+
+def test_tampered_header() -> None:
+    parts: list[bytes] = encrypt(data=os.urandom(3 * CHUNK_SIZE))
+
+    # NOTE: The last byte of the header is the last byte of the nonce prefix
+    parts[0] = parts[0][:-1] + bytes([parts[0][-1] ^ 0x01])
+
+    with pytest.raises(InvalidTag):
+        decrypt(parts=parts)
+
+
+def test_truncated_at_a_chunk_boundary() -> None:
+    parts: list[bytes] = encrypt(data=os.urandom(3 * CHUNK_SIZE))
+
+    # NOTE: The new last chunk was not encrypted as the last one
+    with pytest.raises(InvalidTag):
+        decrypt(parts=parts[:-1])
+
+
+def test_truncated_in_a_chunk() -> None:
+    parts: list[bytes] = encrypt(data=os.urandom(3 * CHUNK_SIZE))
+
+    with pytest.raises((InvalidTag, ValueError)):
+        decrypt(parts=parts[:-1] + [parts[-1][: STREAM_TAG_LENGTH // 2]])
+
+
+def test_truncated_after_the_header() -> None:
+    parts: list[bytes] = encrypt(data=b"secret")
+
+    with pytest.raises(ValueError):
+        decrypt(parts=parts[:1])
+
+    with pytest.raises(ValueError):
+        decrypt(parts=[parts[0][: STREAM_HEADER.size - 1]])
+
+
+def test_reordered_chunks() -> None:
+    parts: list[bytes] = encrypt(data=os.urandom(3 * CHUNK_SIZE))
+
+    parts[1], parts[2] = parts[2], parts[1]
+
+    with pytest.raises(InvalidTag):
+        decrypt(parts=parts)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1, MAX_STREAM_CHUNK_SIZE + 1])
+def test_invalid_chunk_size(chunk_size: int) -> None:
+    for source in (io.BytesIO(b"secret"), iter([b"secret"])):
+        with pytest.raises(ValueError):
+            list(encrypt_stream(source=source, key=KEY, chunk_size=chunk_size))
+
+
+@pytest.mark.parametrize("chunk_size", [0, MAX_STREAM_CHUNK_SIZE + 1, 2**32 - 1])
+def test_invalid_chunk_size_in_header(chunk_size: int) -> None:
+    header: bytes = STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, chunk_size, bytes(7))
+
+    source = io.BytesIO(header + bytes(64))
+
+    with pytest.raises(ValueError):
+        list(decrypt_stream(source=source, key=KEY))
+
+    # NOTE: Rejected before any chunk is read
+    assert source.tell() == STREAM_HEADER.size